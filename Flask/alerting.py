@@ -0,0 +1,251 @@
+import os
+import threading
+import time
+
+from logs import logger
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+# Rechargement complet périodique, au cas où une modification n'a pas été signalée
+THRESHOLD_CACHE_TTL = float(os.environ.get("THRESHOLD_CACHE_TTL", "300"))
+# Marge de retour (fraction du seuil) avant de lever ou d'abaisser une alerte
+ALERT_HYSTERESIS = float(os.environ.get("ALERT_HYSTERESIS", "0.05"))
+# Délai minimal (s) avant de renotifier une alerte toujours active (0 = jamais)
+ALERT_RENOTIFY_INTERVAL = float(os.environ.get("ALERT_RENOTIFY_INTERVAL", "3600"))
+
+# Gravité des niveaux : une alerte ne monte que vers un rang supérieur
+RANGS = {None: 0, "LOW": 1, "WARNING": 2, "CRITICAL": 3}
+
+
+def _to_float(value):
+    return None if value is None or value == "" else float(value)
+
+
+# --------------------------------------------------------------------
+# ⚠️ Évaluation des seuils (fonction pure)
+# --------------------------------------------------------------------
+def evaluer_seuils(seuils, valeur):
+    """Renvoie (type_alerte, seuil_declencheur, niveau) ou None si la valeur est normale.
+
+    ``seuils`` est le triplet (seuil_min, seuil_warning, seuil_max) déjà
+    converti en float (None = seuil absent).
+    """
+    seuil_min, seuil_warning, seuil_max = seuils
+
+    # 🔥 Seuil critique — priorité absolue
+    if seuil_max is not None and valeur > seuil_max:
+        return "SeuilMax", seuil_max, "CRITICAL"
+
+    # ⚠️ Seuil warning
+    if seuil_warning is not None and valeur > seuil_warning:
+        return "SeuilWarning", seuil_warning, "WARNING"
+
+    # 🔽 Seuil minimal
+    if seuil_min is not None and valeur < seuil_min:
+        return "SeuilMin", seuil_min, "LOW"
+
+    return None
+
+
+# --------------------------------------------------------------------
+# 🗂️ Index des seuils en mémoire
+# --------------------------------------------------------------------
+class ThresholdCache:
+    """Seuils de chaque OID indexés par OID.id.
+
+    Chargé en une requête au premier accès ; les routes qui modifient un
+    OID appellent invalidate() pour forcer la relecture.
+    """
+
+    def __init__(self, connect, ttl=THRESHOLD_CACHE_TTL):
+        self.connect = connect
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._seuils = {}
+        self._loaded_at = None
+        self.stats = dict.fromkeys(("hits", "misses", "reloads"), 0)
+
+    def _load_all(self):
+        conn = self.connect()
+        try:
+            rows = conn.execute("SELECT id, seuilMin, seuilWarning, seuilMax FROM OID").fetchall()
+        finally:
+            conn.close()
+
+        seuils = {}
+        for row in rows:
+            try:
+                seuils[row[0]] = (_to_float(row[1]), _to_float(row[2]), _to_float(row[3]))
+            except (TypeError, ValueError) as e:
+                logger.warning("seuils", "Seuils invalides pour l'OID {oid_id} : {erreur}", oid_id=row[0], erreur=str(e))
+        return seuils
+
+    def get(self, oid_id):
+        """Triplet (min, warning, max) de l'OID, ou None s'il n'existe pas."""
+        with self._lock:
+            expired = self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+            if not expired and oid_id in self._seuils:
+                self.stats["hits"] += 1
+                return self._seuils[oid_id]
+
+        # Premier accès, TTL dépassé, invalidation ou OID inconnu : relecture complète
+        seuils = self._load_all()
+        seuils.setdefault(oid_id, None)  # OID supprimé : inutile de relire à chaque mesure
+        with self._lock:
+            self._seuils = seuils
+            self._loaded_at = time.monotonic()
+            self.stats["misses"] += 1
+            self.stats["reloads"] += 1
+            return self._seuils.get(oid_id)
+
+    def invalidate(self, oid_id=None):
+        """Oublie un OID (ou tout l'index) : relu au prochain get()."""
+        with self._lock:
+            if oid_id is None:
+                self._loaded_at = None
+            else:
+                self._seuils.pop(oid_id, None)
+
+
+# --------------------------------------------------------------------
+# 🔁 État des alertes par (équipement, OID, indice)
+# --------------------------------------------------------------------
+class AlertState:
+    __slots__ = ("niveau", "type_alerte", "seuil", "last_notified", "seuils")
+
+    def __init__(self, niveau, type_alerte, seuil, last_notified, seuils=None):
+        self.niveau = niveau
+        self.type_alerte = type_alerte
+        self.seuil = seuil
+        self.last_notified = last_notified
+        self.seuils = seuils        # seuils en vigueur à l'ouverture (None : repris de la BDD)
+
+
+class AlertStateMachine:
+    """Ouverture / aggravation / levée des alertes avec hystérésis.
+
+    evaluate() ne renvoie un événement qu'à un changement d'état, ou pour
+    un rappel quand l'alerte dure depuis plus de renotify_interval : une
+    valeur bloquée au-dessus de seuilMax ne produit plus un Event par mesure.
+    Si les seuils de l'OID ont changé depuis l'ouverture, l'alerte est
+    réévaluée sans hystérésis contre les nouveaux seuils.
+    """
+
+    def __init__(self, hysteresis=ALERT_HYSTERESIS, renotify_interval=ALERT_RENOTIFY_INTERVAL):
+        self.hysteresis = hysteresis
+        self.renotify_interval = renotify_interval
+        self._lock = threading.Lock()
+        self._states = {}
+        self.stats = dict.fromkeys(("open", "escalate", "deescalate", "clear", "renotify", "suppressed"), 0)
+
+    def _cleared(self, state, valeur):
+        # La valeur doit repasser le seuil d'au moins la marge d'hystérésis
+        marge = abs(state.seuil) * self.hysteresis
+        if state.niveau == "LOW":
+            return valeur >= state.seuil + marge
+        return valeur <= state.seuil - marge
+
+    def evaluate(self, key, seuils, valeur, now=None):
+        """Renvoie (transition, type_alerte, seuil, niveau) ou None si rien à persister.
+
+        ``transition`` vaut open, escalate, deescalate, clear ou renotify.
+        """
+        now = time.monotonic() if now is None else now
+        alerte = evaluer_seuils(seuils, valeur)
+        niveau = alerte[2] if alerte else None
+
+        with self._lock:
+            state = self._states.get(key)
+
+            if state is None:
+                if alerte is None:
+                    return None
+                self._states[key] = AlertState(niveau, alerte[0], alerte[1], now, seuils)
+                self.stats["open"] += 1
+                return ("open",) + alerte
+
+            if state.seuils is None:
+                state.seuils = seuils
+            elif state.seuils != seuils:
+                return self._reevaluer(key, state, seuils, alerte, now)
+
+            if niveau == state.niveau:
+                if self.renotify_interval and now - state.last_notified >= self.renotify_interval:
+                    state.last_notified = now
+                    self.stats["renotify"] += 1
+                    return ("renotify",) + alerte
+                self.stats["suppressed"] += 1
+                return None
+
+            if RANGS[niveau] > RANGS[state.niveau]:
+                self._states[key] = AlertState(niveau, alerte[0], alerte[1], now, seuils)
+                self.stats["escalate"] += 1
+                return ("escalate",) + alerte
+
+            # Niveau plus bas (ou sens inverse) : on attend la marge d'hystérésis
+            if not self._cleared(state, valeur):
+                self.stats["suppressed"] += 1
+                return None
+
+            if alerte is None:
+                del self._states[key]
+                self.stats["clear"] += 1
+                return ("clear", state.type_alerte, state.seuil, "INFO")
+
+            self._states[key] = AlertState(niveau, alerte[0], alerte[1], now, seuils)
+            self.stats["deescalate"] += 1
+            return ("deescalate",) + alerte
+
+    def _reevaluer(self, key, state, seuils, alerte, now):
+        # ✏️ Seuils modifiés : l'hystérésis autour de l'ancien seuil ne s'applique plus (verrou déjà pris)
+        if alerte is None:
+            del self._states[key]
+            self.stats["clear"] += 1
+            return ("clear", state.type_alerte, state.seuil, "INFO")
+        niveau = alerte[2]
+        if niveau == state.niveau:
+            state.type_alerte, state.seuil, state.seuils = alerte[0], alerte[1], seuils
+            self.stats["suppressed"] += 1
+            return None
+        etape = "escalate" if RANGS[niveau] > RANGS[state.niveau] else "deescalate"
+        self._states[key] = AlertState(niveau, alerte[0], alerte[1], now, seuils)
+        self.stats[etape] += 1
+        return (etape,) + alerte
+
+    def forget(self, key):
+        with self._lock:
+            self._states.pop(key, None)
+
+    def forget_series(self, equipement_id=None, oid_id=None):
+        """Oublie les alertes d'un équipement ou d'un OID supprimé (ou dont l'alerte est désactivée)."""
+        with self._lock:
+            for key in [k for k in self._states
+                        if (equipement_id is not None and k[0] == equipement_id)
+                        or (oid_id is not None and k[1] == oid_id)]:
+                del self._states[key]
+
+    def niveau(self, key):
+        with self._lock:
+            state = self._states.get(key)
+            return state.niveau if state else None
+
+    def load(self, connect):
+        """Reprend les alertes encore ouvertes d'après le dernier Event de chaque série (ligne de table comprise)."""
+        conn = connect()
+        try:
+            rows = conn.execute("""
+                SELECT E.equipement_id, E.oid_id, E.indice, E.type_alerte, E.seuil_declencheur, E.niveau
+                FROM Event E
+                JOIN (SELECT MAX(id) AS id FROM Event GROUP BY equipement_id, oid_id, indice) L ON L.id = E.id
+            """).fetchall()
+        finally:
+            conn.close()
+
+        now = time.monotonic()
+        with self._lock:
+            for equipement_id, oid_id, indice, type_alerte, seuil, niveau in rows:
+                if niveau in RANGS and niveau is not None and seuil is not None:
+                    self._states[(equipement_id, oid_id, indice)] = AlertState(niveau, type_alerte, float(seuil), now)
+        return len(self._states)
@@ -1,7 +1,6 @@
 import signal
 import sys
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash # type: ignore
-from pysnmp.hlapi import getCmd, SnmpEngine, CommunityData, UdpTransportTarget, ContextData, ObjectType, ObjectIdentity # type: ignore
+from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash, Response, g # type: ignore
 from datetime import datetime
 from functools import wraps
 try:
@@ -34,23 +33,93 @@ import datetime
 import asyncio
 import threading, time
 
+from snmp_client import (get_snmp_values, get_snmp_values_async, walk_snmp_table,
+                         walk_snmp_table_async, shutdown_snmp_executor, est_texte, valeur_numerique,
+                         SNMP_MAX_REPETITIONS)
+from snmp_engine import registry as snmp_registry
+from health import health as snmp_health
+from ingest import IngestWriter
+from alerting import ThresholdCache, AlertStateMachine
+from scheduler import PollScheduler, SCHEDULER_RECONCILE_INTERVAL
+from rollup import RollupJob, SCHEMA as ROLLUP_SCHEMA, parse_horodatage
+from retention import RetentionJob, SCHEMA_INDEXES as RETENTION_INDEXES
+from storage import create_backend
+from latest import LatestValues, SCHEMA_INDEXES as LATEST_INDEXES
+from rates import CounterRates, bits_compteur
+import metrics
+import logs
+from logs import logger
+from metrics import ALERTS, INGEST_QUEUE, ROUTE_DURATION, SNMP_DECODE_FAILURES
+from stream import EventBroker
+from sweep import SweepManager
+from workers import POLLER_WORKERS, ShardedPollers
+from tail import IngestTail
+
 
 app = Flask(__name__)
 app.secret_key = "Cle_super_secrete_que_personne_ne_doit_connaitre"
 
+# Nombre de mesures par page du dashboard
+DASHBOARD_PAGE_SIZE = 50
+DASHBOARD_MAX_PAGE_SIZE = 500
+
 # --------------------------------------------------------------------
 # 🔌 Connexion à la base SQLite
 # --------------------------------------------------------------------
+# Backend choisi par STORAGE_BACKEND : sqlite (défaut, fichier DB_PATH) ou postgres (PG_DSN)
+storage = create_backend()
+
+
 def get_db_connection():
-    db_path = r"C:\Users\Alexa\OneDrive\Documents\M2\ETRS011\Flask\BDD\BDD_LeFlour"
+    # ♻️ Connexion empruntée au pool du backend ; close() la rend au pool.
+    # Chemin de la base SQLite : variable d'environnement DB_PATH (défaut : Flask/BDD/BDD_LeFlour)
+    return storage.connect()
 
-    if not os.path.exists(db_path):
-        raise FileNotFoundError(f"Base de données introuvable à l'emplacement : {db_path}")
+# --------------------------------------------------------------------
+# 🧱 Colonnes ajoutées au schéma existant
+# --------------------------------------------------------------------
+SCHEMA_COLUMNS = [
+    ("OID", "modeCollecte", "TEXT DEFAULT 'GET'"),   # GET (scalaire) ou WALK (table GETBULK)
+    ("OID", "maxRepetitions", "INTEGER"),            # max-repetitions du GETBULK (WALK)
+    ("OID", "intervalle", "INTEGER"),                # secondes entre deux collectes (sinon celui de l'équipement)
+    ("DonneeEquipement", "indice", "TEXT"),          # suffixe d'index d'une ligne de table
+    ("Event", "indice", "TEXT"),                     # ligne de table concernée par l'alerte (WALK)
+]
+
+# Index des requêtes paginées du dashboard (le rowid id est ajouté implicitement en fin d'index)
+SCHEMA_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_donnee_timestamp ON DonneeEquipement (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_donnee_equipement_timestamp ON DonneeEquipement (equipement_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_donnee_oid_timestamp ON DonneeEquipement (oid_id, timestamp)",
+]
+
+MODES_COLLECTE = ("GET", "WALK")
+
+
+def init_schema():
+    """Ajoute les tables, colonnes et index manquants à une base créée avec un ancien schéma."""
+    if storage.dialect != "sqlite":
+        # PostgreSQL : schéma complet créé d'un bloc, puis mêmes index
+        storage.init_schema()
+        conn = get_db_connection()
+        with conn:
+            for statement in SCHEMA_INDEXES + RETENTION_INDEXES + LATEST_INDEXES:
+                conn.execute(statement)
+        conn.close()
+        return
 
-    # Timeout de 5 secondes → SQLite réessaie si la base est temporairement bloquée
-    conn = sqlite3.connect(db_path, timeout=5)
-    conn.row_factory = sqlite3.Row
-    return conn
+    conn = get_db_connection()
+    cur = conn.cursor()
+    for statement in ROLLUP_SCHEMA:
+        cur.execute(statement)
+    for table, column, definition in SCHEMA_COLUMNS:
+        existing = [row["name"] for row in cur.execute(f"PRAGMA table_info({table})")]
+        if column not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    for statement in SCHEMA_INDEXES + RETENTION_INDEXES + LATEST_INDEXES:
+        cur.execute(statement)
+    conn.commit()
+    conn.close()
 
 # --------------------------------------------------------------------
 # Protection des routes Admin & Utilisateur
@@ -105,28 +174,84 @@ def home():
 @app.route('/dashboard')
 @login_required
 def dashboard():
+    # 🔎 Filtres côté serveur
+    equipement_id = request.args.get("equipement", type=int)
+    parametre = request.args.get("parametre") or None
+    debut = (request.args.get("debut") or "").replace("T", " ") or None
+    fin = (request.args.get("fin") or "").replace("T", " ") or None
+    limite = min(max(request.args.get("limite", DASHBOARD_PAGE_SIZE, type=int), 1), DASHBOARD_MAX_PAGE_SIZE)
+
+    # 📑 Curseur "horodatage|id" de la dernière ligne de la page précédente
+    curseur = request.args.get("curseur")
+
+    conditions, params = [], []
+    if equipement_id:
+        conditions.append("D.equipement_id = ?")
+        params.append(equipement_id)
+    if parametre:
+        conditions.append("D.oid_id IN (SELECT id FROM OID WHERE nomParametre = ?)")
+        params.append(parametre)
+    if debut:
+        conditions.append("D.timestamp >= ?")
+        params.append(debut)
+    if fin:
+        conditions.append("D.timestamp <= ?")
+        params.append(fin)
+    if curseur:
+        try:
+            curseur_ts, curseur_id = curseur.rsplit("|", 1)
+            conditions.append("(D.timestamp, D.id) < (?, ?)")
+            params.extend([curseur_ts, int(curseur_id)])
+        except ValueError:
+            return "Curseur invalide", 400
+
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
     conn = get_db_connection()
     cur = conn.cursor()
 
-    cur.execute("""
+    cur.execute(f"""
         SELECT 
             D.id AS id_donnee,
             E.nom AS equipement,
             E.ip AS ip,
-            O.nomParametre AS parametre,
-            O.identifiant AS oid,
+            O.nomParametre || COALESCE('[' || D.indice || ']', '') AS parametre,
+            O.identifiant || COALESCE('.' || D.indice, '') AS oid,
             D.valeur AS valeur,
             D.timestamp AS date
         FROM DonneeEquipement D
         JOIN Equipement E ON D.equipement_id = E.id
         JOIN OID O ON D.oid_id = O.id
-        ORDER BY D.timestamp DESC;
-    """)
-
+        {where}
+        ORDER BY D.timestamp DESC, D.id DESC
+        LIMIT ?;
+    """, params + [limite + 1])
     data = cur.fetchall()
+
+    # Listes des filtres
+    cur.execute("SELECT id, nom FROM Equipement ORDER BY nom;")
+    equipements = cur.fetchall()
+    cur.execute("SELECT DISTINCT nomParametre FROM OID ORDER BY nomParametre;")
+    parametres = [row["nomParametre"] for row in cur.fetchall()]
+
     conn.close()
 
-    return render_template('dashboard.html', data=data)
+    # Une ligne de plus que la page → il existe une page suivante
+    curseur_suivant = None
+    if len(data) > limite:
+        data = data[:limite]
+        curseur_suivant = f"{data[-1]['date']}|{data[-1]['id_donnee']}"
+
+    filtres = {
+        "equipement": equipement_id or "",
+        "parametre": parametre or "",
+        "debut": request.args.get("debut", ""),
+        "fin": request.args.get("fin", ""),
+        "limite": limite,
+    }
+
+    return render_template('dashboard.html', data=data, equipements=equipements, parametres=parametres,
+                           filtres=filtres, curseur=curseur, curseur_suivant=curseur_suivant)
 
 # --------------------------------------------------------------------
 # ⚙️ Configurations
@@ -201,6 +326,12 @@ def update_alert(oid_id):
     cur.execute("UPDATE OID SET alerte_active = ? WHERE id = ?", (1 if new_state else 0, oid_id))
     conn.commit()
     conn.close()
+    threshold_cache.invalidate(oid_id)
+    if not new_state:
+        # OID plus collecté : son alerte ne pourrait plus retomber
+        alert_states.forget_series(oid_id=oid_id)
+        latest_values.forget(oid_id=oid_id)
+    poll_scheduler.notify()
 
     return jsonify({"success": True, "oid_id": oid_id, "alerte_active": new_state})
 
@@ -228,13 +359,14 @@ def ajouter_equipement():
             """, (nom, ip, type_eq, community, intervalle))
 
             conn.commit()
+            poll_scheduler.notify()
             flash("✅ Machine ajoutée avec succès !", "success")
             return redirect(url_for("config"))
 
-        except sqlite3.IntegrityError as e:
+        except storage.integrity_error as e:
             conn.rollback()
 
-            if "UNIQUE constraint failed: Equipement.ip" in str(e):
+            if "UNIQUE constraint failed: Equipement.ip" in str(e) or "equipement_ip_key" in str(e):
                 flash("❌ La machine n’a pas été ajoutée : cette adresse IP existe déjà.", "error")
             else:
                 flash("❌ Une erreur est survenue lors de l’ajout de la machine.", "error")
@@ -256,6 +388,10 @@ def supprimer_equipement(id):
     cur.execute("DELETE FROM Equipement WHERE id = ?", (id,))
     conn.commit()
     conn.close()
+    latest_values.forget(equipement_id=id)
+    counter_rates.forget(equipement_id=id)
+    alert_states.forget_series(equipement_id=id)
+    poll_scheduler.notify()
     return redirect(url_for('config'))
 
 
@@ -279,6 +415,7 @@ def modifier_equipement(id):
         """, (nom, ip, type_eq, community, intervalle, id))
         conn.commit()
         conn.close()
+        poll_scheduler.notify()
         return redirect(url_for('config'))
 
     cur.execute("SELECT * FROM Equipement WHERE id = ?", (id,))
@@ -361,17 +498,27 @@ def ajouter_oid():
         seuil_warning = request.form['seuilWarning'] or None
         seuil_max = request.form['seuilMax'] or None
         alerte_active = 1 if 'alerte_active' in request.form else 0
+        mode_collecte = request.form.get('modeCollecte', 'GET')
+        if mode_collecte not in MODES_COLLECTE:
+            mode_collecte = 'GET'
+        max_repetitions = request.form.get('maxRepetitions') or None
+        intervalle = request.form.get('intervalle') or None
 
         # 4️⃣ Insertion dans la table OID
         cur.execute("""
             INSERT INTO OID (identifiant, nomParametre, typeValeur, equipement_id,
-                             seuilMin, seuilWarning, seuilMax, alerte_active)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                             seuilMin, seuilWarning, seuilMax, alerte_active,
+                             modeCollecte, maxRepetitions, intervalle)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (identifiant, nom_parametre, type_valeur, equipement_id,
-              seuil_min, seuil_warning, seuil_max, alerte_active))
+              seuil_min, seuil_warning, seuil_max, alerte_active,
+              mode_collecte, max_repetitions, intervalle))
+        oid_id = cur.lastrowid  # avant close() : sous PostgreSQL, lu sur la session
 
         conn.commit()
         conn.close()
+        threshold_cache.invalidate(oid_id)
+        poll_scheduler.notify()
         return redirect(url_for('config'))
 
     conn.close()
@@ -412,7 +559,7 @@ def demande_oid():
         return redirect(url_for('oids'))
 
     except Exception as e:
-        print("⚠️ ERREUR lors de la demande OID :", e)
+        logger.error("demande_oid", "Erreur lors de la demande d'OID : {erreur}", erreur=str(e))
         if conn:
             conn.rollback()
         return "Erreur lors de la création de la demande", 500
@@ -439,17 +586,26 @@ def modifier_oid(id):
         seuil_warning = request.form.get('seuilWarning') or None
         seuil_max = request.form.get('seuilMax') or None
         alerte_active = 1 if 'alerte_active' in request.form else 0
+        mode_collecte = request.form.get('modeCollecte', 'GET')
+        if mode_collecte not in MODES_COLLECTE:
+            mode_collecte = 'GET'
+        max_repetitions = request.form.get('maxRepetitions') or None
+        intervalle = request.form.get('intervalle') or None
 
         cur.execute("""
             UPDATE OID
             SET identifiant=?, nomParametre=?, typeValeur=?, equipement_id=?, 
-                seuilMin=?, seuilWarning=?, seuilMax=?, alerte_active=?
+                seuilMin=?, seuilWarning=?, seuilMax=?, alerte_active=?,
+                modeCollecte=?, maxRepetitions=?, intervalle=?
             WHERE id=?
         """, (identifiant, nom_parametre, type_valeur, equipement_id,
-              seuil_min, seuil_warning, seuil_max, alerte_active, id))
+              seuil_min, seuil_warning, seuil_max, alerte_active,
+              mode_collecte, max_repetitions, intervalle, id))
 
         conn.commit()
         conn.close()
+        threshold_cache.invalidate(id)
+        poll_scheduler.notify()
         return redirect(url_for('config'))
 
     cur.execute("SELECT * FROM OID WHERE id=?", (id,))
@@ -485,7 +641,8 @@ def demande_suppression_equipement(eq_id):
         conn.commit()
         return "OK"
     except Exception as e:
-        print("Erreur suppression équipement :", e)
+        logger.error("demande_suppression", "Erreur lors de la demande de suppression de l'équipement {equipement_id} : "
+                     "{erreur}", equipement_id=eq_id, erreur=str(e))
         return "ERROR", 500
     finally:
         conn.close()
@@ -570,61 +727,49 @@ def mes_demandes_oid():
 # --------------------------------------------------------------------
 #  ⚠️ Seuil
 # --------------------------------------------------------------------
-def verifier_seuils(oid_id, equipement_id, valeur_actuelle):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT seuilMin, seuilWarning, seuilMax FROM OID WHERE id=?", (oid_id,))
-    seuils = cur.fetchone()
+# Seuils gardés en mémoire : invalidés par /ajouter_oid, /modifier_oid, /update_alert
+threshold_cache = ThresholdCache(get_db_connection)
+
+
+# Alertes ouvertes par (équipement, OID, indice) : seuls les changements d'état sont enregistrés
+alert_states = AlertStateMachine()
+
+MESSAGES_ALERTE = {
+    "open": "Alerte {niveau} : valeur {valeur} dépasse {seuil}",
+    "escalate": "Alerte {niveau} : valeur {valeur} dépasse {seuil}",
+    "deescalate": "Alerte {niveau} : valeur {valeur} dépasse {seuil}",
+    "renotify": "Rappel {niveau} : valeur {valeur} dépasse toujours {seuil}",
+    "clear": "Retour à la normale : valeur {valeur} (seuil {seuil})",
+}
+
+
+def verifier_seuils(oid_id, equipement_id, valeur_actuelle, indice=None):
+    seuils = threshold_cache.get(oid_id)
+    key = (equipement_id, oid_id, indice)
 
     if not seuils:
-        conn.close()
+        alert_states.forget(key)
+        latest_values.set_niveau(equipement_id, oid_id, None, indice)
         return
 
-    seuil_min, seuil_warning, seuil_max = seuils
-    type_alerte, seuil_declencheur, niveau = None, None, None
-
     try:
         valeur_actuelle = float(valeur_actuelle)
-        if seuil_min is not None:
-            seuil_min = float(seuil_min)
-        if seuil_warning is not None:
-            seuil_warning = float(seuil_warning)
-        if seuil_max is not None:
-            seuil_max = float(seuil_max)
     except Exception as e:
-        print(f"⚠️ Erreur de conversion numérique : {e}")
-        conn.close()
+        logger.warning("seuils", "Erreur de conversion numérique : {erreur}", erreur=str(e))
         return
 
-    # 🔥 Seuil critique — priorité absolue
-    if seuil_max is not None and valeur_actuelle > seuil_max:
-        type_alerte = "SeuilMax"
-        seuil_declencheur = seuil_max
-        niveau = "CRITICAL"
-
-    # ⚠️ Seuil warning
-    elif seuil_warning is not None and valeur_actuelle > seuil_warning:
-        type_alerte = "SeuilWarning"
-        seuil_declencheur = seuil_warning
-        niveau = "WARNING"
-
-    # 🔽 Seuil minimal
-    elif seuil_min is not None and valeur_actuelle < seuil_min:
-        type_alerte = "SeuilMin"
-        seuil_declencheur = seuil_min
-        niveau = "LOW"
+    transition = alert_states.evaluate(key, seuils, valeur_actuelle)
 
-
-    if type_alerte:
-        message = f"Alerte {niveau} : valeur {valeur_actuelle} dépasse {seuil_declencheur}"
-        cur.execute("""
-            INSERT INTO Event (oid_id, equipement_id, type_alerte, valeur_actuelle, seuil_declencheur, message, niveau)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (oid_id, equipement_id, type_alerte, valeur_actuelle, seuil_declencheur, message, niveau))
-        conn.commit()
-        print(f"🚨 Alerte générée : {message}")  # 👈 Ajout pour debug
-
-    conn.close()
+    if transition:
+        etape, type_alerte, seuil_declencheur, niveau = transition
+        ALERTS.inc(etape=etape, niveau=niveau)
+        latest_values.set_niveau(equipement_id, oid_id, None if etape == "clear" else niveau, indice)
+        message = MESSAGES_ALERTE[etape].format(niveau=niveau, valeur=valeur_actuelle, seuil=seuil_declencheur)
+        # 💾 L'événement part dans le même lot d'écriture que les mesures
+        ingest_writer.push_event(oid_id, equipement_id, type_alerte, valeur_actuelle, seuil_declencheur, message, niveau,
+                                 indice=indice)
+        logger.warning("alerte", "🚨 Alerte générée : {alerte}", alerte=message, equipement_id=equipement_id,
+                       oid_id=oid_id, indice=indice, niveau=niveau, etape=etape)
 
 
 # --------------------------------------------------------------------
@@ -652,8 +797,30 @@ def events():
         ORDER BY E.horodatage DESC;
     """)
     events = cur.fetchall()
+
+    # Noms affichés pour les alertes reçues en direct (/stream ne transmet que les id)
+    noms_oid = {row["id"]: row["nomParametre"] for row in cur.execute("SELECT id, nomParametre FROM OID")}
+    noms_equipement = {row["id"]: row["nom"] for row in cur.execute("SELECT id, nom FROM Equipement")}
     conn.close()
-    return render_template('events.html', events=events)
+    return render_template('events.html', events=events, noms_oid=noms_oid, noms_equipement=noms_equipement)
+
+
+@app.route('/logs')
+@login_required
+def journaux():
+    """Derniers enregistrements des journaux JSON (site, collecteur, workers)."""
+    niveau = request.args.get("niveau", "INFO").upper()
+    if niveau not in logs.NIVEAUX:
+        niveau = "INFO"
+    recherche = request.args.get("q", "").strip()
+    source = request.args.get("source") or None
+    limite = min(request.args.get("limite", 200, type=int), 2000)
+    records = logs.lire(limite=limite, niveau=niveau, recherche=recherche, source=source)
+    for record in records:
+        record["date"] = datetime.datetime.fromtimestamp(record.get("ts", 0)).strftime("%Y-%m-%d %H:%M:%S")
+    return render_template('logs.html', records=records, niveaux=list(logs.NIVEAUX), niveau=niveau,
+                           recherche=recherche, source=source, sources=logs.sources(), limite=limite,
+                           stats=logger.stats)
 
 
 # --------------------------------------------------------------------
@@ -747,6 +914,21 @@ def logout():
     session.clear()  # Vide toutes les infos de session
     return redirect(url_for("index"))
 
+# --------------------------------------------------------------------
+# 📊 Durée de traitement de chaque route (/metrics)
+# --------------------------------------------------------------------
+@app.before_request
+def debut_requete():
+    g.debut_requete = time.perf_counter()
+
+
+@app.after_request
+def duree_requete(response):
+    if "debut_requete" in g:
+        ROUTE_DURATION.observe(time.perf_counter() - g.debut_requete, route=request.endpoint or "inconnue")
+    return response
+
+
 @app.after_request
 def no_cache(response):
     response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
@@ -851,6 +1033,18 @@ def admin_valider(id):
     conn.commit()
     conn.close()
 
+    if action == "DELETE_OID":
+        latest_values.forget(oid_id=target_id)
+        counter_rates.forget(oid_id=target_id)
+        alert_states.forget_series(oid_id=target_id)
+    elif action == "DELETE_EQ":
+        latest_values.forget(equipement_id=target_id)
+        counter_rates.forget(equipement_id=target_id)
+        alert_states.forget_series(equipement_id=target_id)
+    if action in ("DELETE_OID", "DELETE_EQ"):
+        threshold_cache.invalidate()
+        poll_scheduler.notify()
+
     return jsonify({"success": True})
 
 
@@ -873,40 +1067,11 @@ def admin_refuser(id):
     conn.close()
     return jsonify({"success": True})
 
-# --------------------------------------------------------------------
-# 📡 Fonction SNMP
-# --------------------------------------------------------------------
-def check_snmp_device(ip, community, oid):
-    try:
-        iterator = getCmd(
-            SnmpEngine(),
-            CommunityData(community, mpModel=1),  # SNMPv2c
-            UdpTransportTarget((ip, 161), timeout=3, retries=1),
-            ContextData(),
-            ObjectType(ObjectIdentity(oid))
-        )
-
-        errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
-
-        if errorIndication:
-            return {"status": "DOWN", "info": str(errorIndication)}
-        elif errorStatus:
-            return {"status": "DOWN", "info": str(errorStatus.prettyPrint())}
-        else:
-            # 🔍 On récupère la valeur SNMP
-            raw_value = str(varBinds[0])
-            if "No Such" in raw_value or "Timeout" in raw_value:
-                return {"status": "DOWN", "info": raw_value}
-            else:
-                return {"status": "UP", "info": raw_value}
-
-    except Exception as e:
-        return {"status": "DOWN", "info": str(e)}
-
 # --------------------------------------------------------------------
 # 🛰️ Vérification SNMP
 # --------------------------------------------------------------------
 @app.route("/snmp_check")
+@login_required
 def snmp_check():
     conn = get_db_connection()
     cur = conn.cursor()
@@ -920,37 +1085,134 @@ def snmp_check():
             E.community,
             O.id AS oid_id,
             O.identifiant AS oid,
-            O.nomParametre
+            O.nomParametre,
+            O.typeValeur,
+            O.modeCollecte,
+            O.maxRepetitions
         FROM Equipement E
         JOIN OID O ON E.id = O.equipement_id
+        ORDER BY E.id
     """)
 
-    devices = cur.fetchall()
+    # Clés explicites : sous PostgreSQL, les noms de colonnes reviennent en minuscules
+    colonnes = ("equipement_id", "equipement_nom", "ip", "community", "oid_id", "oid", "nomParametre", "typeValeur",
+                "modeCollecte", "maxRepetitions")
+    devices = [{colonne: row[colonne] for colonne in colonnes} for row in cur.fetchall()]
     conn.close()
 
-    results = []
+    # ⚡ Balayage en tâche de fond : la page affiche les résultats au fil de l'eau
+    sweep = sweep_manager.start(devices)
+    return render_template("snmp_check.html", sweep=sweep, deadline=sweep_manager.deadline)
 
-    for device in devices:
-        res = check_snmp_device(device["ip"], device["community"], device["oid"])
 
-        results.append({
-            "name": device["equipement_nom"],
-            "ip": device["ip"],
-            "oid": device["oid"],
-            "parametre": device["nomParametre"],
-            "status": res["status"],
-            "info": res["info"]
-        })
+@app.route("/snmp_check/<int:sweep_id>")
+@login_required
+def snmp_check_resultats(sweep_id):
+    sweep = sweep_manager.get(sweep_id)
+    if sweep is None:
+        return jsonify({"error": "Balayage inconnu"}), 404
+    return jsonify(sweep.snapshot(request.args.get("depuis", 0, type=int)))
+
+
+@app.route("/snmp_stats")
+@login_required
+def snmp_stats():
+    # ♻️ Taux de réutilisation des moteurs / cibles / OID SNMP
+    return jsonify(snmp_registry.snapshot())
+
+
+@app.route("/metrics")
+def metrics_texte():
+    # 📊 Format texte Prometheus, sans connexion pour les collecteurs de métriques
+    INGEST_QUEUE.set(ingest_writer.qsize())
+    return Response(metrics.registry.expose(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/health_stats")
+@login_required
+def health_stats():
+    # 🩺 RTT, délais adaptatifs et circuits ouverts par cible SNMP
+    return jsonify(snmp_health.snapshot())
+
+
+@app.route("/counter_stats")
+@login_required
+def counter_stats():
+    # 📈 Débits calculés, rebouclages et redémarrages détectés
+    return jsonify(counter_rates.snapshot())
+
+
+@app.route("/scheduler_stats")
+@login_required
+def scheduler_stats():
+    # ⏱️ Retard des collectes sur leur échéance : un poller saturé prend du retard
+    reponse = {"stats": poll_scheduler.stats, "lag": poll_scheduler.lag_snapshot()}
+    if POLLER_WORKERS > 0:
+        reponse["workers"] = poll_scheduler.worker_stats()
+    return jsonify(reponse)
+
+
+@app.route("/retention_stats")
+@login_required
+def retention_stats():
+    # 🧹 Lignes purgées par table / résolution et espace libéré
+    return jsonify({"retention": retention_job.retention, "stats": retention_job.stats})
+
+
+@app.route("/db_stats")
+@login_required
+def db_stats():
+    # 🔌 Réutilisation des connexions du pool du backend
+    return jsonify(storage.snapshot())
 
-        # 💾 Enregistre la valeur si l'équipement répond
-        if res["status"] == "UP":
-            try:
-                valeur = float(res["info"].split("=")[-1].strip())
-                insert_snmp_value(device["equipement_id"], device["oid_id"], valeur)
-            except Exception:
-                pass
 
-    return render_template("snmp_check.html", results=results)
+@app.route("/latest")
+@login_required
+def latest():
+    # 🟢 Valeur actuelle de chaque série, sans lire DonneeEquipement
+    valeurs = latest_values.snapshot(request.args.get("equipement", type=int))
+
+    conn = get_db_connection()
+    equipements = {row["id"]: row["nom"] for row in conn.execute("SELECT id, nom FROM Equipement")}
+    parametres = {row["id"]: row["nomParametre"] for row in conn.execute("SELECT id, nomParametre FROM OID")}
+    conn.close()
+
+    for valeur in valeurs:
+        valeur["equipement"] = equipements.get(valeur["equipement_id"])
+        valeur["parametre"] = (parametres.get(valeur["oid_id"]) or "") + (f"[{valeur['indice']}]" if valeur["indice"] else "")
+    valeurs.sort(key=lambda v: (v["equipement"] or "", v["parametre"]))
+    return jsonify(valeurs)
+
+
+@app.route("/stream")
+@login_required
+def stream():
+    # 📣 Flux SSE : une file bornée par navigateur, décroché s'il ne suit pas
+    subscriber = event_broker.subscribe()
+    if subscriber is None:
+        return "Trop de flux ouverts", 503
+    return Response(event_broker.stream(subscriber), mimetype="text/event-stream",
+                    headers={"X-Accel-Buffering": "no"})
+
+
+@app.route("/stream_stats")
+@login_required
+def stream_stats():
+    return jsonify(event_broker.snapshot())
+
+
+@app.route("/serie/<int:equipement_id>/<int:oid_id>")
+@login_required
+def serie(equipement_id, oid_id):
+    # 📉 Série agrégée : la résolution s'adapte à la plage demandée (24 h par défaut)
+    try:
+        fin = parse_horodatage(request.args.get("fin"), datetime.datetime.utcnow())
+        debut = parse_horodatage(request.args.get("debut"), fin - datetime.timedelta(days=1))
+        return jsonify(rollup_job.serie(equipement_id, oid_id, debut, fin,
+                                        indice=request.args.get("indice"),
+                                        resolution=request.args.get("resolution")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 # --------------------------------------------------------------------
 # 💎 Templates
@@ -1047,15 +1309,60 @@ def creer_template():
 # --------------------------------------------------------------------
 # 🚀 Stocker les données SNMP dans la BDD
 # --------------------------------------------------------------------
-def insert_snmp_value(equipement_id, oid_id, valeur):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO DonneeEquipement (equipement_id, oid_id, valeur) VALUES (?, ?, ?)",
-        (equipement_id, oid_id, valeur)
-    )
-    conn.commit()
-    conn.close()
+# Un seul thread écrit les mesures, par lots et en une transaction
+ingest_writer = IngestWriter(get_db_connection, backend=storage)
+
+# 🟢 Dernière valeur de chaque série, mise à jour à chaque mesure déposée
+latest_values = LatestValues()
+ingest_writer.subscribe(latest_values.on_record)
+
+# 📣 Mesures et alertes poussées aux navigateurs connectés à /stream
+event_broker = EventBroker()
+ingest_writer.subscribe(event_broker.on_record)
+
+
+def marquer_injoignable(equipement_id, oid_id, info, indice=None):
+    latest_values.mark_down(equipement_id, oid_id, info, indice)
+    event_broker.publish("down", {"equipement_id": equipement_id, "oid_id": oid_id, "indice": indice, "info": info})
+
+
+def insert_snmp_value(equipement_id, oid_id, valeur, indice=None):
+    ingest_writer.push_sample(equipement_id, oid_id, valeur, indice)
+
+
+# 📈 Compteurs (Counter32 / Counter64) : on stocke et on surveille leur débit par seconde
+counter_rates = CounterRates()
+
+
+def valeur_a_stocker(equipement_id, oid_id, res, type_valeur, indice=None):
+    """Nombre enregistré pour un relevé UP : la valeur, ou le débit par seconde d'un compteur.
+
+    None pour un OID déclaré texte (rien à stocker), ou tant qu'un compteur
+    n'a pas de relevé précédent exploitable.
+    """
+    if est_texte(type_valeur):
+        return None
+    try:
+        valeur = valeur_numerique(res["value"], type_valeur)
+    except ValueError:
+        SNMP_DECODE_FAILURES.inc(type=res.get("type") or "inconnu")
+        raise
+    bits = bits_compteur(res.get("type"), type_valeur)
+    if not bits:
+        return valeur
+    # Entier brut : un float perdrait les unités des Counter64 au-delà de 2**53
+    brut = res["value"] if isinstance(res["value"], int) else int(valeur)
+    return counter_rates.derive((equipement_id, oid_id, indice), brut, bits)
+
+
+def enregistrer_balayage(row, res, indice=None):
+    valeur = valeur_a_stocker(row["equipement_id"], row["oid_id"], res, row["typeValeur"], indice)
+    if valeur is not None:
+        insert_snmp_value(row["equipement_id"], row["oid_id"], valeur, indice)
+
+
+# 🔍 Balayages /snmp_check : parallélisme borné, délai global, valeurs via l'écriture différée
+sweep_manager = SweepManager(enregistrer_balayage)
 
 
 def collect_snmp_data():
@@ -1074,108 +1381,267 @@ def collect_snmp_data():
         community = equipement["community"]
 
         # 2️⃣ Récupérer les OID associés à cet équipement (incluant alerte_active)
-        cur.execute("SELECT id, identifiant, nomParametre, alerte_active FROM OID WHERE equipement_id = ?", (equipement_id,))
+        cur.execute("""
+            SELECT id, identifiant, nomParametre, typeValeur, alerte_active, modeCollecte, maxRepetitions
+            FROM OID WHERE equipement_id = ?
+        """, (equipement_id,))
         oids = cur.fetchall()
 
-        for oid in oids:
-            oid_id = oid["id"]
-            oid_value = oid["identifiant"]
-            param_name = oid["nomParametre"]
-
-            # ⛔ Ne rien faire si l’alerte est désactivée
-            if not oid["alerte_active"]:
-                continue
+        # ⛔ Ne rien faire si l’alerte est désactivée
+        oids = [oid for oid in oids if oid["alerte_active"]]
+        scalaires = [oid for oid in oids if oid["modeCollecte"] != "WALK"]
+        tables = [oid for oid in oids if oid["modeCollecte"] == "WALK"]
+
+        # 3️⃣ Interroger le périphérique via SNMP (tous les OID scalaires dans un même GET)
+        resultats = get_snmp_values(equipement_ip, community, [oid["identifiant"] for oid in scalaires])
+        mesures = [(oid, None, res) for oid, res in zip(scalaires, resultats)]
+
+        # 📋 Tables : un parcours GETBULK par OID, une mesure par ligne
+        for oid in tables:
+            walk = walk_snmp_table(equipement_ip, community, oid["identifiant"],
+                                   oid["maxRepetitions"] or SNMP_MAX_REPETITIONS)
+            if walk["status"] == "UP":
+                mesures.extend((oid, indice, res) for indice, res in walk["rows"])
+            else:
+                mesures.append((oid, None, walk))
 
-            # 3️⃣ Interroger le périphérique via SNMP
-            res = check_snmp_device(equipement_ip, community, oid_value)
+        for oid, indice, res in mesures:
+            oid_id = oid["id"]
+            param_name = oid["nomParametre"] + (f"[{indice}]" if indice else "")
 
             if res["status"] == "UP":
                 try:
-                    valeur_str = res["info"].split("=")[-1].strip()
-
-                    # ⛔ Ignore les valeurs texte (ex : "No Such Object")
-                    if not valeur_str.replace('.', '', 1).isdigit():
-                        print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ⚠️ Valeur non numérique pour {param_name} ({equipement_nom}) : {valeur_str}")
-                        continue
-
-                    valeur = float(valeur_str)
-                    insert_snmp_value(equipement_id, oid_id, valeur)
+                    # 🔢 Valeur décodée par type (les noSuchObject & co arrivent en DOWN)
+                    valeur = valeur_a_stocker(equipement_id, oid_id, res, oid["typeValeur"], indice)
+                    if valeur is None:
+                        continue  # OID texte, ou compteur : il faut deux relevés pour un débit
+                    insert_snmp_value(equipement_id, oid_id, valeur, indice)
 
-                    print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ✅ {param_name} ({equipement_nom}) = {valeur}")
+                    logger.info("mesure", "{parametre} ({equipement}) = {valeur}", parametre=param_name,
+                                equipement=equipement_nom, equipement_id=equipement_id, oid_id=oid_id, valeur=valeur)
 
                     # 🔔 Vérifie les seuils après récupération de la valeur
-                    verifier_seuils(oid_id, equipement_id, valeur)
+                    verifier_seuils(oid_id, equipement_id, valeur, indice)
 
-                except ValueError:
-                    print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ⚠️ Valeur non numérique reçue pour {param_name} ({equipement_nom}) : {res['info']}")
+                except ValueError as e:
+                    logger.warning("valeur_ignoree", "{parametre} ({equipement}) ignoré : {erreur}", parametre=param_name,
+                                   equipement=equipement_nom, equipement_id=equipement_id, oid_id=oid_id, erreur=str(e))
                 except Exception as e:
-                    print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ⚠️ Erreur d’insertion pour {param_name} ({equipement_nom}) : {e}")
+                    logger.error("insertion", "Erreur d’insertion pour {parametre} ({equipement}) : {erreur}",
+                                 parametre=param_name, equipement=equipement_nom, equipement_id=equipement_id,
+                                 oid_id=oid_id, erreur=str(e))
             else:
-                print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ❌ {equipement_nom} injoignable : {res['info']}")
+                marquer_injoignable(equipement_id, oid_id, res["info"], indice)
+                if not res.get("circuit"):  # circuit ouvert : déjà signalé à l'ouverture
+                    logger.warning("injoignable", "{equipement} injoignable : {info}", equipement=equipement_nom,
+                                   equipement_id=equipement_id, oid_id=oid_id, info=res["info"])
 
     conn.close()
 
 
-async def poll_snmp_device(equipement):
-    """Tâche asynchrone individuelle pour chaque équipement."""
-    while True:
-        try:
-            with app.app_context():
-                equipement_id = equipement["id"]
-                equipement_nom = equipement["nom"]
-                ip = equipement["ip"]
-                community = equipement["community"]
-
-                # 🔍 Récupérer les OID associés (incluant alerte_active)
-                conn = get_db_connection()
-                cur = conn.cursor()
-                cur.execute("SELECT id, identifiant, nomParametre, alerte_active FROM OID WHERE equipement_id = ?", (equipement_id,))
-                oids = cur.fetchall()
-                conn.close()
-
-                for oid in oids:
-                    # ⛔ Si l’alerte est désactivée → on passe
-                    if not oid["alerte_active"]:
-                        continue
-
-                    oid_id = oid["id"]
-                    oid_value = oid["identifiant"]
-                    param_name = oid["nomParametre"]
+def charger_oids(equipement_id):
+    """OID d'un équipement, avec leur mode de collecte (lecture bloquante)."""
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, identifiant, nomParametre, typeValeur, alerte_active, modeCollecte, maxRepetitions
+            FROM OID WHERE equipement_id = ?
+        """, (equipement_id,))
+        return cur.fetchall()
+    finally:
+        conn.close()
 
-                    res = check_snmp_device(ip, community, oid_value)
 
-                    if res["status"] == "UP":
-                        try:
-                            valeur_str = res["info"].split("=")[-1].strip()
-                            valeur = float(valeur_str)
-                            insert_snmp_value(equipement_id, oid_id, valeur)
-                            print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ✅ {param_name} ({equipement_nom}) = {valeur}")
-                            verifier_seuils(oid_id, equipement_id, valeur)
-                        except Exception as e:
-                            print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ⚠️ Erreur d’insertion ({equipement_nom}): {e}")
-                    else:
-                        print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ❌ {equipement_nom} injoignable : {res['info']}")
+async def poll_snmp_device(equipement, oid_ids=None):
+    """Collecte unique d'un équipement (appelée par l'ordonnanceur à chaque échéance).
 
-        except Exception as e:
-            print(f"⚠️ Erreur sur {equipement['nom']} : {e}")
+    ``oid_ids`` limite la collecte aux OID arrivés à échéance (tous si None).
+    """
+    try:
+        with app.app_context():
+            equipement_id = equipement["id"]
+            equipement_nom = equipement["nom"]
+            ip = equipement["ip"]
+            community = equipement["community"]
+
+            # 🔍 Récupérer les OID associés (incluant alerte_active), hors de la boucle :
+            # une base lente ou un pool plein ne doit pas bloquer les autres collectes
+            oids = await asyncio.get_running_loop().run_in_executor(None, charger_oids, equipement_id)
+
+            # ⛔ Si l’alerte est désactivée → on passe
+            oids = [oid for oid in oids if oid["alerte_active"]]
+            if oid_ids is not None:
+                oids = [oid for oid in oids if oid["id"] in oid_ids]
+            scalaires = [oid for oid in oids if oid["modeCollecte"] != "WALK"]
+            tables = [oid for oid in oids if oid["modeCollecte"] == "WALK"]
+
+            # ⚡ Un seul GET pour tous les OID scalaires, exécuté hors de la boucle
+            resultats = await get_snmp_values_async(ip, community, [oid["identifiant"] for oid in scalaires])
+            mesures = [(oid, None, res) for oid, res in zip(scalaires, resultats)]
+
+            # 📋 Tables : un parcours GETBULK par OID, une mesure par ligne
+            for oid in tables:
+                walk = await walk_snmp_table_async(ip, community, oid["identifiant"],
+                                                   oid["maxRepetitions"] or SNMP_MAX_REPETITIONS)
+                if walk["status"] == "UP":
+                    mesures.extend((oid, indice, res) for indice, res in walk["rows"])
+                else:
+                    mesures.append((oid, None, walk))
+
+            for oid, indice, res in mesures:
+                oid_id = oid["id"]
+                param_name = oid["nomParametre"] + (f"[{indice}]" if indice else "")
+
+                if res["status"] == "UP":
+                    try:
+                        valeur = valeur_a_stocker(equipement_id, oid_id, res, oid["typeValeur"], indice)
+                        if valeur is None:
+                            continue
+                        await ingest_writer.push_sample_async(equipement_id, oid_id, valeur, indice)
+                        logger.info("mesure", "{parametre} ({equipement}) = {valeur}", parametre=param_name,
+                                    equipement=equipement_nom, equipement_id=equipement_id, oid_id=oid_id, valeur=valeur)
+                        verifier_seuils(oid_id, equipement_id, valeur, indice)
+                    except ValueError as e:
+                        logger.warning("valeur_ignoree", "{parametre} ({equipement}) ignoré : {erreur}",
+                                       parametre=param_name, equipement=equipement_nom, equipement_id=equipement_id,
+                                       oid_id=oid_id, erreur=str(e))
+                    except Exception as e:
+                        logger.error("insertion", "Erreur d’insertion pour {parametre} ({equipement}) : {erreur}",
+                                     parametre=param_name, equipement=equipement_nom, equipement_id=equipement_id,
+                                     oid_id=oid_id, erreur=str(e))
+                else:
+                    marquer_injoignable(equipement_id, oid_id, res["info"], indice)
+                    if not res.get("circuit"):  # circuit ouvert : déjà signalé à l'ouverture
+                        logger.warning("injoignable", "{equipement} injoignable : {info}", equipement=equipement_nom,
+                                       equipement_id=equipement_id, oid_id=oid_id, info=res["info"])
 
-        # 🕐 Attente selon l’intervalle défini pour cet équipement
-        await asyncio.sleep(equipement["intervalle"])
+    except Exception as e:
+        logger.error("collecte", "Erreur sur {equipement} : {erreur}", equipement=equipement["nom"],
+                     equipement_id=equipement["id"], erreur=str(e))
 
 
-async def poll_snmp_data():
-    """Lance une tâche asynchrone pour chaque équipement SNMP."""
+def charger_equipements():
+    """Équipements et intervalle effectif de chacun de leurs OID actifs."""
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute("SELECT id, nom, ip, community, intervalle FROM Equipement;")
-    equipements = cur.fetchall()
+    cur.execute("""
+        SELECT E.id, E.nom, E.ip, E.community, E.intervalle,
+               O.id AS oid_id, COALESCE(O.intervalle, E.intervalle) AS oid_intervalle
+        FROM Equipement E
+        LEFT JOIN OID O ON O.equipement_id = E.id AND O.alerte_active = 1
+        ORDER BY E.id;
+    """)
+    rows = cur.fetchall()
     conn.close()
 
-    tasks = []
-    for equipement in equipements:
-        tasks.append(asyncio.create_task(poll_snmp_device(equipement)))
+    equipements = {}
+    for row in rows:
+        equipement = equipements.setdefault(row["id"], {
+            "id": row["id"], "nom": row["nom"], "ip": row["ip"],
+            "community": row["community"], "intervalle": row["intervalle"], "oids": {},
+        })
+        if row["oid_id"] is not None:
+            equipement["oids"][row["oid_id"]] = row["oid_intervalle"]
+    return list(equipements.values())
+
+
+# 📉 Agrégats minute / heure / jour, rattrapés sur les nouvelles mesures uniquement
+rollup_job = RollupJob(get_db_connection, dialect=storage.dialect)
+
+# 🧹 Purge des mesures, événements et agrégats au-delà de leur durée de conservation
+retention_job = RetentionJob(get_db_connection)
+
+# 🗓️ Planifie chaque OID selon son intervalle, et suit les ajouts / modifications / suppressions
+poll_scheduler = PollScheduler(charger_equipements, poll_snmp_device)
+
+
+async def poll_snmp_data():
+    """Lance l'ordonnanceur de collecte SNMP."""
+    await poll_scheduler.run()
+
+
+def recevoir_du_worker(kind, params):
+    """Enregistrement reçu d'un worker de collecte (POLLER_WORKERS > 0)."""
+    if kind == "niveau":
+        latest_values.set_niveau(*params)
+    elif kind == "down":
+        marquer_injoignable(*params)
+    else:
+        ingest_writer.push(kind, params)
+
+# --------------------------------------------------------------------
+# 🛰️ Démarrage / arrêt de la collecte
+# --------------------------------------------------------------------
+def demarrer_collecte(loop, separe=False):
+    """Schéma, états d'alerte, ordonnanceur (ou workers), agrégation et purge sur ``loop``.
+
+    ``separe`` : pas de serveur web dans ce processus (collector.py). Les
+    seuils modifiés depuis l'interface ne peuvent alors pas invalider le
+    cache : il est relu à chaque réconciliation de l'ordonnanceur.
+    """
+    global poll_scheduler
+    init_schema()
+    if retention_job.vacuum_pages:
+        retention_job.enable_incremental_vacuum()
+    if separe:
+        threshold_cache.ttl = min(threshold_cache.ttl, SCHEDULER_RECONCILE_INTERVAL)
+    alert_states.load(get_db_connection)
+    latest_values.rebuild(get_db_connection, niveau=alert_states.niveau)
+
+    if POLLER_WORKERS > 0:
+        # 🧩 Équipements répartis entre plusieurs processus, un seul écrivain ici
+        poll_scheduler = ShardedPollers(POLLER_WORKERS, recevoir_du_worker).start()
+    else:
+        loop.create_task(poll_snmp_data())
+    loop.create_task(rollup_job.run())
+    loop.create_task(retention_job.run())
+
+
+def arreter_collecte(loop):
+    for task in asyncio.all_tasks(loop):
+        task.cancel()
+    shutdown_snmp_executor()
+    if POLLER_WORKERS > 0:
+        poll_scheduler.stop()
+    # 💾 Écrit les mesures encore en file avant de quitter
+    ingest_writer.stop()
+    storage.close()
+    logger.stop()
+
+
+# --------------------------------------------------------------------
+# 🌐 Processus web seul (serveur WSGI, voir wsgi.py)
+# --------------------------------------------------------------------
+# La collecte tourne dans collector.py : /latest et /stream suivent ce qu'il écrit en BDD
+ingest_tail = IngestTail(get_db_connection)
+ingest_tail.subscribe(latest_values.on_record)
+ingest_tail.subscribe(event_broker.on_record)
+
+
+def suivre_niveau(kind, params):
+    """Niveau d'alerte des séries repris des événements écrits par le collecteur."""
+    if kind == "event":
+        oid_id, equipement_id, _, _, _, _, niveau, _, indice = params
+        latest_values.set_niveau(equipement_id, oid_id, None if niveau == "INFO" else niveau, indice)
+
+
+ingest_tail.subscribe(suivre_niveau)
+
+
+def demarrer_web():
+    """Une fois par processus web : schéma à jour, cache des dernières valeurs chargé, puis suivi de la BDD."""
+    if ingest_tail.running():
+        return
+    try:
+        # Le site peut démarrer avant le collecteur sur une base à l'ancien schéma (colonne indice absente...)
+        init_schema()
+    except Exception as e:
+        logger.error("schema", "Mise à jour du schéma impossible : {erreur}", erreur=str(e))
+    if ingest_tail.start():
+        alert_states.load(get_db_connection)
+        latest_values.rebuild(get_db_connection, niveau=alert_states.niveau)
 
-    await asyncio.gather(*tasks)
 
 # --------------------------------------------------------------------
 # 🚀 Lancement du serveur
@@ -1184,8 +1650,9 @@ def run_flask():
     app.run(host="192.168.141.72", port=5000, debug=True, use_reloader=False)
 
 if __name__ == "__main__":
+    # Tout-en-un pour le développement ; en production : collector.py + wsgi.py
     loop = asyncio.get_event_loop()
-    loop.create_task(poll_snmp_data())
+    demarrer_collecte(loop)
 
     flask_thread = threading.Thread(target=run_flask)
     flask_thread.daemon = True  # 👈 ce flag rend le thread “tuable”
@@ -1193,9 +1660,8 @@ if __name__ == "__main__":
 
     # Gestion du Ctrl+C
     def shutdown(signal_received=None, frame=None):
-        print("\n🛑 Arrêt demandé par l’utilisateur. Fermeture propre...")
-        for task in asyncio.all_tasks(loop):
-            task.cancel()
+        logger.info("arret", "🛑 Arrêt demandé par l’utilisateur. Fermeture propre...")
+        arreter_collecte(loop)
         loop.stop()
         sys.exit(0)
 
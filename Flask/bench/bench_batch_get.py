@@ -0,0 +1,47 @@
+"""Temps de collecte d'un équipement : un GET par OID contre GET groupés.
+
+    python Flask/bench/bench_batch_get.py --oids 20 --latency 0.05 --max-varbinds 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_agent import AgentFarm, BASE_OID, oid_str # noqa: E402
+from snmp_client import check_snmp_device, get_snmp_values, shutdown_snmp_executor # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--oids", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="latence simulée par aller-retour (s)")
+    parser.add_argument("--max-varbinds", type=int, default=None, help="varbinds max acceptés par l'agent (tooBig au-delà)")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    oids = [oid_str(BASE_OID + (i, 0)) for i in range(1, args.oids + 1)]
+
+    with AgentFarm(1, nb_oids=args.oids, latency=args.latency, max_varbinds=args.max_varbinds) as farm:
+        ip, agent = farm.targets[0], farm.agents[0]
+        check_snmp_device(ip, farm.community, oids[0])  # préchauffage du moteur
+
+        for label, collect in (
+            ("GET par OID", lambda: [check_snmp_device(ip, farm.community, oid) for oid in oids]),
+            ("GET groupé", lambda: get_snmp_values(ip, farm.community, oids)),
+        ):
+            requests_before = agent.requests
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                results = collect()
+            elapsed = (time.perf_counter() - start) / args.rounds
+            up = sum(1 for r in results if r["status"] == "UP")
+            pdus = (agent.requests - requests_before) / args.rounds
+            print(f"{label:<12} {elapsed * 1000:8.1f} ms/équipement  {pdus:5.1f} PDU  {up}/{len(oids)} UP")
+
+    shutdown_snmp_executor()
+
+
+if __name__ == "__main__":
+    main()
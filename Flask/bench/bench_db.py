@@ -0,0 +1,120 @@
+"""Débit des requêtes web et de l'ingestion : connexion neuve par appel contre pool WAL.
+
+    python Flask/bench/bench_db.py --rows 100000 --readers 8 --seconds 5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import ConnectionPool # noqa: E402
+from ingest import IngestWriter, now_utc # noqa: E402
+
+
+def make_db(path, nb_rows):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE Equipement (id INTEGER PRIMARY KEY, nom TEXT);
+        CREATE TABLE OID (id INTEGER PRIMARY KEY, nomParametre TEXT, seuilMin REAL, seuilWarning REAL, seuilMax REAL);
+        CREATE TABLE DonneeEquipement (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, equipement_id INTEGER, oid_id INTEGER,
+            valeur TEXT, indice TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE Event (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, oid_id INTEGER, equipement_id INTEGER, type_alerte TEXT,
+            valeur_actuelle REAL, seuil_declencheur REAL, message TEXT, niveau TEXT, horodatage DATETIME);
+        CREATE INDEX idx_donnee_equipement_timestamp ON DonneeEquipement (equipement_id, timestamp);
+    """)
+    conn.executemany("INSERT INTO Equipement VALUES (?, ?)", [(i, f"eq{i}") for i in range(1, 51)])
+    conn.executemany("INSERT INTO OID VALUES (?, ?, 10, 70, 90)", [(i, f"param{i % 20}") for i in range(1, 501)])
+    conn.executemany(
+        "INSERT INTO DonneeEquipement (equipement_id, oid_id, valeur, timestamp) VALUES (?, ?, ?, ?)",
+        [(random.randint(1, 50), random.randint(1, 500), str(random.random() * 100),
+          f"2026-01-{1 + i * 28 // nb_rows:02d} 12:00:00") for i in range(nb_rows)])
+    conn.commit()
+    conn.close()
+
+
+def request(connect):
+    # Une page du dashboard filtrée par équipement, puis la liste des équipements
+    conn = connect()
+    conn.execute("""
+        SELECT E.nom, O.nomParametre, D.valeur, D.timestamp
+        FROM DonneeEquipement D
+        JOIN Equipement E ON D.equipement_id = E.id
+        JOIN OID O ON D.oid_id = O.id
+        WHERE D.equipement_id = ?
+        ORDER BY D.timestamp DESC, D.id DESC
+        LIMIT 50
+    """, (random.randint(1, 50),)).fetchall()
+    conn.execute("SELECT id, nom FROM Equipement ORDER BY nom").fetchall()
+    conn.close()
+
+
+def run(label, connect, readers, seconds, batch_size):
+    # Écrivain : petits lots pour multiplier les commits, comme un parc peu chargé
+    writer = IngestWriter(connect, batch_size=batch_size, flush_interval=0.01, queue_max=1000)
+    stop = threading.Event()
+    requests = [0] * readers
+
+    def produce():
+        while not stop.is_set():
+            writer.push_sample(random.randint(1, 50), random.randint(1, 500), random.random() * 100,
+                               timestamp=now_utc())
+
+    def read(n):
+        while not stop.is_set():
+            request(connect)
+            requests[n] += 1
+
+    threads = [threading.Thread(target=produce)] + [threading.Thread(target=read, args=(n,)) for n in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    writer.stop()
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<28} {sum(requests) / elapsed:>10.0f} req/s {writer.stats['rows'] / elapsed:>10.0f} mesures/s"
+          f"   (lots : {writer.stats['batches']}, erreurs : {writer.stats['errors']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--batch-size", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        avant = os.path.join(tmp, "avant.sqlite")
+        apres = os.path.join(tmp, "apres.sqlite")
+        make_db(avant, args.rows)
+        with open(avant, "rb") as src, open(apres, "wb") as dst:
+            dst.write(src.read())
+
+        # Avant : connexion neuve à chaque appel, journal rollback par défaut
+        def connect():
+            conn = sqlite3.connect(avant, timeout=5, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            return conn
+
+        pool = ConnectionPool(apres)
+        run("connexion par appel", connect, args.readers, args.seconds, args.batch_size)
+        run("pool WAL", pool.connect, args.readers, args.seconds, args.batch_size)
+        print(f"pool : {pool.snapshot()}")
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Coût du décodage d'un varbind : str(varBind).split("=") contre décodage typé.
+
+    python Flask/bench/bench_decode.py --rounds 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pysnmp.hlapi import getCmd # type: ignore # noqa: E402
+
+from fake_agent import AgentFarm, BASE_OID, oid_str, pMod # noqa: E402
+from snmp_client import _format_varbind, parse_target, shutdown_snmp_executor, valeur_numerique # noqa: E402
+from snmp_engine import registry # noqa: E402
+
+# (valeur publiée par l'agent, type déclaré dans OID.typeValeur, valeur attendue)
+CAS = [
+    (pMod.Integer(42), "INTEGER", 42.0),
+    (pMod.Integer(-12), "INTEGER", -12.0),
+    (pMod.Counter32(4000000000), "COUNTER32", 4000000000.0),
+    (pMod.Counter64(2 ** 63 + 5), "COUNTER64", float(2 ** 63 + 5)),
+    (pMod.Gauge32(95), "GAUGE32", 95.0),
+    (pMod.TimeTicks(123456), "TIMETICKS", 123456.0),
+    (pMod.OctetString("0.15"), "", 0.15),            # nombre publié en texte, type non renseigné
+    (pMod.OctetString("seuil=5"), "STRING", None),
+    (pMod.IpAddress("10.0.0.1"), "IPADDRESS", None),
+    (None, "INTEGER", None),  # OID absent de l'agent : noSuchObject
+]
+
+
+def ancien(varBind):
+    """Chemin d'avant : prettyPrint du varbind, recherche de texte, split("=") et float()."""
+    raw_value = str(varBind)
+    if "No Such" in raw_value or "Timeout" in raw_value:
+        return None
+    try:
+        return float(raw_value.split("=")[-1].strip())
+    except ValueError:
+        return None
+
+
+def type_(varBind, type_valeur):
+    res = _format_varbind(varBind)
+    if res["status"] != "UP":
+        return None
+    try:
+        return valeur_numerique(res["value"], type_valeur)
+    except ValueError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    table = {BASE_OID + (i, 0): valeur for i, (valeur, _, _) in enumerate(CAS, 1) if valeur is not None}
+    oids = [oid_str(BASE_OID + (i, 0)) for i in range(1, len(CAS) + 1)]
+
+    with AgentFarm(1, table=table) as farm:
+        host, port = parse_target(farm.targets[0])
+        with registry.engine() as slot:
+            errorIndication, errorStatus, _, varBinds = next(getCmd(
+                slot.engine, slot.community(farm.community), slot.transport(host, port, timeout=3, retries=1), slot.context,
+                *[slot.object_type(oid) for oid in oids]))
+        if errorIndication or errorStatus:
+            sys.exit(f"GET impossible : {errorIndication or errorStatus.prettyPrint()}")
+
+    print(f"{'varbind':<32} {'attendu':>22} {'split(=)':>22} {'typé':>22}")
+    for varBind, (_, type_valeur, attendu) in zip(varBinds, CAS):
+        nom = type(varBind[1]).__name__ + f" ({type_valeur})"
+        print(f"{nom:<32} {attendu!s:>22} {ancien(varBind)!s:>22} {type_(varBind, type_valeur)!s:>22}")
+
+    types = [type_valeur for _, type_valeur, _ in CAS]
+    for label, decode in (("split(=)", lambda: [ancien(vb) for vb in varBinds]),
+                          ("typé", lambda: [type_(vb, t) for vb, t in zip(varBinds, types)])):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            decode()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12} {elapsed / (args.rounds * len(varBinds)) * 1e6:8.2f} µs/varbind")
+
+    shutdown_snmp_executor()
+
+
+if __name__ == "__main__":
+    main()
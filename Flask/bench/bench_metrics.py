@@ -0,0 +1,88 @@
+"""Surcoût de l'instrumentation /metrics sur le chemin de collecte.
+
+    python Flask/bench/bench_metrics.py --agents 20 --oids 20 --rounds 6
+
+Alterne des tours avec et sans métriques (METRICS_ENABLED) : GET SNMP vers
+des agents simulés, décodage, puis dépôt et écriture des mesures en BDD.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics # noqa: E402
+from fake_agent import AgentFarm, BASE_OID, make_oid_table, oid_str # noqa: E402
+from ingest import IngestWriter # noqa: E402
+from snmp_client import get_snmp_values, shutdown_snmp_executor, valeur_numerique # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--oids", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=6, help="tours par mode (alternés)")
+    parser.add_argument("--passes", type=int, default=20, help="collectes de chaque agent par tour")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""CREATE TABLE DonneeEquipement (id INTEGER PRIMARY KEY AUTOINCREMENT, equipement_id INTEGER,
+                    oid_id INTEGER, valeur REAL, indice TEXT, timestamp TEXT)""")
+    conn.close()
+
+    oids = [oid_str(BASE_OID + (i, 0)) for i in range(1, args.oids + 1)]
+    writer = IngestWriter(lambda: sqlite3.connect(path, timeout=30))
+
+    # 🔢 Coût unitaire d'une observation d'histogramme
+    histo = metrics.Histogram("bench_seconds", "bench", ("target",))
+    start = time.perf_counter()
+    for i in range(200000):
+        histo.observe(0.003, target="127.0.0.1:16100")
+    cout = (time.perf_counter() - start) / 200000
+    print(f"Histogram.observe : {cout * 1e6:.2f} µs")
+
+    with AgentFarm(args.agents, table=make_oid_table(args.oids)) as farm, \
+            ThreadPoolExecutor(max_workers=args.agents) as pool:
+
+        def poll(equipement_id, ip):
+            for res, oid_id in zip(get_snmp_values(ip, farm.community, oids), range(1, args.oids + 1)):
+                if res["status"] == "UP":
+                    writer.push_sample(equipement_id, oid_id, valeur_numerique(res["value"], "INTEGER"))
+
+        def tour():
+            start = time.perf_counter()
+            for _ in range(args.passes):
+                list(pool.map(poll, range(1, args.agents + 1), farm.targets))
+            writer.flush()
+            return args.passes * args.agents * args.oids / (time.perf_counter() - start)
+
+        tour()  # préchauffage (moteurs SNMP, OID résolus)
+        debits = {True: [], False: []}
+        for i in range(args.rounds * 2):
+            metrics.METRICS_ENABLED = i % 2 == 0
+            debits[metrics.METRICS_ENABLED].append(tour())
+
+    writer.stop()
+    shutdown_snmp_executor()
+
+    avec, sans = max(debits[True]), max(debits[False])
+    print(f"sans métriques : {sans:8.0f} mesures/s (meilleur tour)")
+    print(f"avec métriques : {avec:8.0f} mesures/s (meilleur tour)")
+    print(f"écart mesuré   : {(sans - avec) / sans * 100:+.1f} % (bruit réseau compris)")
+
+    # Borne indépendante du bruit : observations faites × coût unitaire, rapporté au temps par mesure
+    observations = sum(state[2] for histogramme in (metrics.SNMP_RTT, metrics.DB_WRITE, metrics.DB_BATCH)
+                       for state in histogramme._values.values())
+    mesures = args.rounds * args.passes * args.agents * args.oids
+    par_mesure = observations * cout / mesures
+    print(f"coût estimé    : {par_mesure * 1e6:.3f} µs/mesure, {par_mesure * sans * 100:.3f} % du temps de collecte")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Banc d'essai de bout en bout de la collecte, hors ligne, contre des agents SNMP v2c simulés.
+
+    python Flask/bench/bench_pipeline.py --agents 100 --oids 10 --interval 1 --duration 30 \\
+        --latency 0.02 --loss 0.01 --dead 5 --min-rate 900 --max-p99 0.5
+
+Les agents tournent dans un processus à part (le CPU mesuré est celui du
+collecteur seul). La vraie chaîne PollScheduler → poll_snmp_device →
+seuils → IngestWriter écrit dans une base temporaire (schéma de
+BDD/BDD_LeFlour, vidée). La mesure ne commence qu'une fois chaque agent
+collecté au moins une fois (moteurs SNMP créés, RTT connus), puis après
+--warmup s de régime. Affiche mesures/s, latence p50/p99 d'une
+collecte, débit d'écriture en BDD et CPU. --min-rate / --max-p99 :
+code de sortie 1 si l'objectif n'est pas tenu.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_agent import AgentFarm, BASE_OID, oid_str # noqa: E402
+
+SCHEMA_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "BDD", "BDD_LeFlour")
+
+
+def run_agents(options, ready, stop):
+    """Processus des agents simulés : démarre la ferme, puis attend l'ordre d'arrêt."""
+    with AgentFarm(**options):
+        ready.set()
+        stop.wait()
+
+
+def preparer_base(path, targets, community, nb_oids, intervalle):
+    """Copie du schéma de la base livrée, sans données, avec un équipement par agent."""
+    shutil.copy(SCHEMA_DB, path)
+    conn = sqlite3.connect(path)
+    for table in ("DonneeEquipement", "Event", "OID", "Equipement"):
+        conn.execute(f"DELETE FROM {table}")
+    conn.executemany(
+        "INSERT INTO Equipement (id, nom, ip, type, community, intervalle) VALUES (?, ?, ?, 'bench', ?, ?)",
+        [(i, f"agent{i}", ip, community, intervalle) for i, ip in enumerate(targets, start=1)])
+    # Seuils actifs mais jamais franchis (valeurs simulées : 10 × i) : la vérification est mesurée, pas les alertes
+    conn.executemany(
+        """INSERT INTO OID (identifiant, nomParametre, typeValeur, equipement_id, seuilMax, seuilWarning, alerte_active)
+           VALUES (?, ?, 'Integer', ?, ?, ?, 1)""",
+        [(oid_str(BASE_OID + (j, 0)), f"param{j}", i, 10 * nb_oids + 100, 10 * nb_oids + 50)
+         for i in range(1, len(targets) + 1) for j in range(1, nb_oids + 1)])
+    conn.commit()
+    conn.close()
+
+
+def quantile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--oids", type=int, default=10, help="OID scalaires par agent")
+    parser.add_argument("--interval", type=int, default=1, help="intervalle de collecte de chaque équipement (s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latence simulée par réponse (s)")
+    parser.add_argument("--loss", type=float, default=0.0, help="probabilité de perte d'une requête (0 à 1)")
+    parser.add_argument("--dead", type=int, default=0, help="nombre d'agents muets")
+    parser.add_argument("--timeout", type=float, default=1.0, help="SNMP_TIMEOUT avant la première mesure de RTT (s)")
+    parser.add_argument("--duration", type=float, default=20, help="durée de la mesure (s)")
+    parser.add_argument("--warmup", type=float, default=None,
+                        help="régime non mesuré après le premier tour complet (s, défaut : 2 intervalles)")
+    parser.add_argument("--ready-timeout", type=float, default=120,
+                        help="attente max du premier tour complet de collecte (s)")
+    parser.add_argument("--base-port", type=int, default=16100)
+    parser.add_argument("--min-rate", type=float, help="échec si moins de mesures/s")
+    parser.add_argument("--max-p99", type=float, help="échec si la latence p99 d'une collecte dépasse (s)")
+    args = parser.parse_args()
+    warmup = 2 * args.interval if args.warmup is None else args.warmup
+
+    # 📁 Base, journaux et réglages du collecteur fixés avant l'import de app
+    tmp = tempfile.mkdtemp(prefix="bench_pipeline_")
+    farm = AgentFarm(args.agents, nb_oids=args.oids, latency=args.latency, dead=args.dead, loss=args.loss,
+                     base_port=args.base_port)
+    preparer_base(os.path.join(tmp, "bench.sqlite"), farm.targets, farm.community, args.oids, args.interval)
+    os.environ.update(DB_PATH=os.path.join(tmp, "bench.sqlite"), LOG_DIR=os.path.join(tmp, "logs"), LOG_CONSOLE="0",
+                      POLLER_WORKERS="0", SNMP_TIMEOUT=str(args.timeout))
+
+    import app
+    import logs
+    import metrics
+    from scheduler import PollScheduler
+
+    ctx = multiprocessing.get_context("spawn")
+    ready, stop = ctx.Event(), ctx.Event()
+    options = dict(nb_agents=args.agents, nb_oids=args.oids, latency=args.latency, dead=args.dead, loss=args.loss,
+                   community=farm.community, base_port=args.base_port)
+    agents = ctx.Process(target=run_agents, args=(options, ready, stop), daemon=True)
+    agents.start()
+    if not ready.wait(30):
+        sys.exit("❌ agents simulés non démarrés")
+
+    app.init_schema()
+    latences = []
+    collectes = set()   # équipements collectés au moins une fois
+
+    async def collecte(equipement, oid_ids=None):
+        debut = time.perf_counter()
+        await app.poll_snmp_device(equipement, oid_ids)
+        latences.append(time.perf_counter() - debut)
+        collectes.add(equipement["id"])
+
+    scheduler = PollScheduler(app.charger_equipements, collecte)
+
+    def releve():
+        write = metrics.DB_WRITE._values.get((), [None, 0.0, 0])
+        return {
+            "wall": time.perf_counter(),
+            "cpu": time.process_time(),
+            "polls": len(latences),
+            "rows": app.ingest_writer.stats["rows"],
+            "batches": app.ingest_writer.stats["batches"],
+            "write_time": write[1],
+            "timeouts": sum(metrics.SNMP_TIMEOUTS._values.values()),
+            "overruns": scheduler.stats["overruns"],
+            "opened": app.snmp_health.stats["opened"],
+        }
+
+    async def banc():
+        task = asyncio.create_task(scheduler.run())
+        # ⏳ Premier tour complet : la création des moteurs SNMP et les premiers timeouts restent hors mesure
+        limite = time.monotonic() + args.ready_timeout
+        while len(collectes) < args.agents:
+            if task.done() or time.monotonic() > limite:
+                task.cancel()
+                sys.exit(f"❌ {len(collectes)}/{args.agents} agents collectés après {args.ready_timeout:g} s")
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(warmup)
+        app.ingest_writer.flush()
+        debut = releve()
+        await asyncio.sleep(args.duration)
+        app.ingest_writer.flush()
+        fin = releve()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return debut, fin
+
+    try:
+        debut, fin = asyncio.run(banc())
+    finally:
+        app.ingest_writer.stop()
+        app.shutdown_snmp_executor()
+        app.storage.close()
+        logs.logger.stop()
+        stop.set()
+        agents.join(10)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    duree = fin["wall"] - debut["wall"]
+    polls = latences[debut["polls"]:fin["polls"]]
+    rows = fin["rows"] - debut["rows"]
+    batches = fin["batches"] - debut["batches"]
+    taux = rows / duree
+    p50, p99 = quantile(polls, 0.5), quantile(polls, 0.99)
+    lag = scheduler.lag_snapshot()
+
+    print(f"{args.agents} agents × {args.oids} OID toutes les {args.interval} s, latence {args.latency * 1000:g} ms, "
+          f"perte {args.loss:.0%}, {args.dead} muets — {duree:.1f} s mesurées")
+    print(f"mesures          : {taux:10.0f} /s (attendu {(args.agents - args.dead) * args.oids / args.interval:.0f} /s)")
+    print(f"collectes        : {len(polls) / duree:10.1f} /s, p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms")
+    print(f"retard           : p95 {lag['p95']} s, {fin['overruns'] - debut['overruns']} collectes sautées")
+    print(f"timeouts SNMP    : {fin['timeouts'] - debut['timeouts']:10.0f}, "
+          f"{fin['opened'] - debut['opened']} circuits ouverts")
+    print(f"écriture BDD     : {batches / duree:10.1f} lots/s, {rows / max(batches, 1):.0f} lignes et "
+          f"{(fin['write_time'] - debut['write_time']) / max(batches, 1) * 1000:.1f} ms par lot")
+    print(f"CPU collecteur   : {(fin['cpu'] - debut['cpu']) / duree * 100:10.1f} % d'un cœur")
+
+    echecs = []
+    if args.min_rate is not None and taux < args.min_rate:
+        echecs.append(f"{taux:.0f} mesures/s < {args.min_rate:g}")
+    if args.max_p99 is not None and not p99 <= args.max_p99:
+        echecs.append(f"p99 {p99:.3f} s > {args.max_p99:g} s")
+    if echecs:
+        print("❌ " + ", ".join(echecs))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Latence cumulée d'un cycle de collecte en fonction du nombre d'équipements.
+
+Compare l'appel bloquant check_snmp_device (ancien comportement de
+poll_snmp_device) à check_snmp_device_async, contre des agents simulés.
+Chaque mesure part d'un état neuf (RTT, circuits et moteurs SNMP
+oubliés, puis moteurs reconstruits hors chronométrage) : un circuit
+ouvert pendant la première ne fausse pas la seconde. « joignables » :
+durée jusqu'à la dernière réponse d'un équipement qui n'est pas muet.
+
+    python Flask/bench/bench_poll_concurrency.py --devices 10 50 200 --latency 0.05 --dead 2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_agent import AgentFarm, BASE_OID, oid_str # noqa: E402
+from health import health # noqa: E402
+from snmp_client import check_snmp_device, check_snmp_device_async, shutdown_snmp_executor # noqa: E402
+from snmp_engine import registry # noqa: E402
+
+
+OID = oid_str(BASE_OID + (1, 0))
+
+
+async def cycle_blocking(targets, community):
+    # Chaque tâche bloque la boucle pendant sa requête : exécution en série
+    async def one(ip):
+        return check_snmp_device(ip, community, OID), time.perf_counter()
+    return await asyncio.gather(*(one(ip) for ip in targets))
+
+
+async def cycle_async(targets, community):
+    async def one(ip):
+        return await check_snmp_device_async(ip, community, OID), time.perf_counter()
+    return await asyncio.gather(*(one(ip) for ip in targets))
+
+
+def measure(cycle, targets, community, dead):
+    """(durée totale, durée jusqu'à la dernière réponse joignable, nombre d'UP)."""
+    # 🧼 État neuf : ni RTT ni circuit hérités d'une mesure précédente
+    registry.close()
+    health.reset()
+    asyncio.run(cycle(targets[dead:], community))   # moteurs SNMP construits hors chronométrage
+    health.reset()
+
+    start = time.perf_counter()
+    results = asyncio.run(cycle(targets, community))
+    elapsed = time.perf_counter() - start
+    joignables = max((fin for _, fin in results[dead:]), default=start) - start
+    up = sum(1 for r, _ in results if r["status"] == "UP")
+    return elapsed, joignables, up
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--latency", type=float, default=0.05, help="latence simulée par réponse (s)")
+    parser.add_argument("--dead", type=int, default=1, help="nombre d'équipements muets")
+    parser.add_argument("--skip-blocking", action="store_true", help="ne mesure que le chemin asynchrone")
+    args = parser.parse_args()
+
+    print(f"{'équipements':>12} {'bloquant (s)':>14} {'joignables':>11} {'async (s)':>10} {'joignables':>11} {'UP':>5}")
+    for n in args.devices:
+        dead = min(args.dead, n - 1)
+        with AgentFarm(n, latency=args.latency, dead=dead) as farm:
+            blocking = blocking_live = "-"
+            if not args.skip_blocking:
+                total, live, _ = measure(cycle_blocking, farm.targets, farm.community, dead)
+                blocking, blocking_live = f"{total:.2f}", f"{live:.2f}"
+            elapsed, live, up = measure(cycle_async, farm.targets, farm.community, dead)
+        print(f"{n:>12} {blocking:>14} {blocking_live:>11} {elapsed:>10.2f} {live:>11.2f} {up:>5}")
+
+    stats = registry.snapshot()
+    print(f"réutilisation : moteurs {stats['engine_hit_rate']}, cibles {stats['target_hit_rate']}, OID {stats['oid_hit_rate']}")
+    shutdown_snmp_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Évaluations de seuils par seconde : SELECT par mesure contre index en mémoire.
+
+    python Flask/bench/bench_thresholds.py --oids 200 --samples 20000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerting import ThresholdCache, evaluer_seuils # noqa: E402
+
+
+def make_db(path, nb_oids):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE OID (id INTEGER PRIMARY KEY, seuilMin REAL, seuilWarning REAL, seuilMax REAL)
+    """)
+    conn.executemany("INSERT INTO OID VALUES (?, ?, ?, ?)",
+                     [(i, 10.0, 70.0, 90.0) for i in range(1, nb_oids + 1)])
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--oids", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite")
+        make_db(path, args.oids)
+
+        def connect():
+            conn = sqlite3.connect(path, timeout=5)
+            conn.row_factory = sqlite3.Row
+            return conn
+
+        random.seed(1)
+        samples = [(random.randint(1, args.oids), random.uniform(0, 100)) for _ in range(args.samples)]
+
+        # Avant : une connexion et un SELECT par mesure (ancien verifier_seuils)
+        def per_sample():
+            alerts = 0
+            for oid_id, valeur in samples:
+                conn = connect()
+                row = conn.execute("SELECT seuilMin, seuilWarning, seuilMax FROM OID WHERE id=?", (oid_id,)).fetchone()
+                conn.close()
+                seuils = tuple(None if x is None else float(x) for x in row)
+                alerts += evaluer_seuils(seuils, valeur) is not None
+            return alerts
+
+        # Après : index chargé une fois, évaluation en mémoire
+        cache = ThresholdCache(connect)
+
+        def cached():
+            alerts = 0
+            for oid_id, valeur in samples:
+                alerts += evaluer_seuils(cache.get(oid_id), valeur) is not None
+            return alerts
+
+        for label, run in (("SELECT par mesure", per_sample), ("index en mémoire", cached)):
+            start = time.perf_counter()
+            alerts = run()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<18} {args.samples / elapsed:12.0f} évaluations/s  ({alerts} alertes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Parcours GETBULK d'une table d'interfaces contre un GET par ligne.
+
+    python Flask/bench/bench_walk.py --ports 48 --latency 0.05 --max-repetitions 25
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_agent import AgentFarm, IF_ENTRY, make_if_table, oid_str # noqa: E402
+from snmp_client import check_snmp_device, walk_snmp_table, shutdown_snmp_executor # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ports", type=int, default=48)
+    parser.add_argument("--latency", type=float, default=0.05, help="latence simulée par aller-retour (s)")
+    parser.add_argument("--max-repetitions", type=int, default=25)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    colonnes = [IF_ENTRY + (10,), IF_ENTRY + (16,)]  # ifInOctets, ifOutOctets
+    lignes = [oid_str(col + (port,)) for col in colonnes for port in range(1, args.ports + 1)]
+
+    with AgentFarm(1, latency=args.latency, table=make_if_table(args.ports)) as farm:
+        ip, agent = farm.targets[0], farm.agents[0]
+        check_snmp_device(ip, farm.community, lignes[0])  # préchauffage du moteur
+
+        def per_oid():
+            return [check_snmp_device(ip, farm.community, oid) for oid in lignes]
+
+        def walk():
+            rows = []
+            for col in colonnes:
+                rows.extend(walk_snmp_table(ip, farm.community, oid_str(col), args.max_repetitions)["rows"])
+            return [res for _, res in rows]
+
+        for label, collect in (("GET par ligne", per_oid), ("GETBULK", walk)):
+            requests_before = agent.requests
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                results = collect()
+            elapsed = (time.perf_counter() - start) / args.rounds
+            pdus = (agent.requests - requests_before) / args.rounds
+            up = sum(1 for r in results if r["status"] == "UP")
+            print(f"{label:<14} {elapsed * 1000:8.1f} ms  {pdus:5.1f} PDU  {up} lignes  "
+                  f"{up / elapsed:8.0f} lignes/s")
+
+    shutdown_snmp_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Agents SNMP v2c simulés sur 127.0.0.1, pour les benchmarks du collecteur."""
+import asyncio
+import bisect
+import random
+import threading
+
+from pyasn1.codec.ber import decoder, encoder # type: ignore
+from pysnmp.proto import api # type: ignore
+
+
+pMod = api.protoModules[api.protoVersion2c]
+
+# Racine des OIDs simulés : 1.3.6.1.4.1.99999.1.<i>.0
+BASE_OID = (1, 3, 6, 1, 4, 1, 99999, 1)
+# IF-MIB::ifEntry
+IF_ENTRY = (1, 3, 6, 1, 2, 1, 2, 2, 1)
+
+
+def make_oid_table(nb_oids):
+    """Table {oid: valeur} de nb_oids scalaires entiers."""
+    return {BASE_OID + (i, 0): 10 * i for i in range(1, nb_oids + 1)}
+
+
+def make_if_table(nb_ports):
+    """Colonnes ifInOctets (.10) et ifOutOctets (.16) d'un switch à nb_ports ports."""
+    table = {}
+    for port in range(1, nb_ports + 1):
+        table[IF_ENTRY + (10, port)] = pMod.Counter32(1000 * port)
+        table[IF_ENTRY + (16, port)] = pMod.Counter32(2000 * port)
+    return table
+
+
+def oid_str(oid):
+    return ".".join(str(x) for x in oid)
+
+
+# --------------------------------------------------------------------
+# 🛰️ Un agent = un port UDP
+# --------------------------------------------------------------------
+class FakeAgent(asyncio.DatagramProtocol):
+    def __init__(self, table, community="public", latency=0.0, dead=False, max_varbinds=None, loss=0.0):
+        self.table = table
+        self.sorted_oids = sorted(table)
+        self.community = community
+        self.latency = latency      # délai de réponse (secondes)
+        self.dead = dead            # True → ne répond jamais
+        self.loss = loss            # probabilité de perdre une requête (0 à 1)
+        self.max_varbinds = max_varbinds  # au-delà → tooBig
+        self.requests = 0
+        self.lost = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.requests += 1
+        if self.dead:
+            return
+        if self.loss and random.random() < self.loss:
+            self.lost += 1
+            return
+
+        try:
+            response = self.build_response(data)
+        except Exception:
+            return
+        if response is None:
+            return
+
+        if self.latency:
+            asyncio.get_running_loop().call_later(self.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+    def value(self, key):
+        value = self.table[key]
+        return pMod.Integer(value) if isinstance(value, int) else value
+
+    def next_varbind(self, oid):
+        i = bisect.bisect_right(self.sorted_oids, tuple(oid))
+        if i == len(self.sorted_oids):
+            return oid, pMod.EndOfMibView()
+        key = self.sorted_oids[i]
+        return pMod.ObjectIdentifier(key), self.value(key)
+
+    def build_response(self, data):
+        reqMsg, _ = decoder.decode(data, asn1Spec=pMod.Message())
+        if str(pMod.apiMessage.getCommunity(reqMsg)) != self.community:
+            return None
+
+        reqPDU = pMod.apiMessage.getPDU(reqMsg)
+        rspMsg = pMod.apiMessage.getResponse(reqMsg)
+        rspPDU = pMod.apiMessage.getPDU(rspMsg)
+
+        varBinds = []
+        if self.max_varbinds and len(pMod.apiPDU.getVarBinds(reqPDU)) > self.max_varbinds:
+            pMod.apiPDU.setErrorStatus(rspPDU, 1)  # tooBig
+        elif reqPDU.isSameTypeWith(pMod.GetRequestPDU()):
+            for oid, _ in pMod.apiPDU.getVarBinds(reqPDU):
+                key = tuple(oid)
+                if key in self.table:
+                    varBinds.append((oid, self.value(key)))
+                else:
+                    varBinds.append((oid, pMod.NoSuchObject()))
+        elif reqPDU.isSameTypeWith(pMod.GetNextRequestPDU()):
+            for oid, _ in pMod.apiPDU.getVarBinds(reqPDU):
+                varBinds.append(self.next_varbind(oid))
+        elif reqPDU.isSameTypeWith(pMod.GetBulkRequestPDU()):
+            requested = [oid for oid, _ in pMod.apiBulkPDU.getVarBinds(reqPDU)]
+            non_repeaters = int(pMod.apiBulkPDU.getNonRepeaters(reqPDU))
+            max_repetitions = int(pMod.apiBulkPDU.getMaxRepetitions(reqPDU))
+            for oid in requested[:non_repeaters]:
+                varBinds.append(self.next_varbind(oid))
+            repeaters = requested[non_repeaters:]
+            for _ in range(max_repetitions):
+                if not repeaters:
+                    break
+                row = [self.next_varbind(oid) for oid in repeaters]
+                varBinds.extend(row)
+                repeaters = [oid for oid, value in row if not isinstance(value, pMod.EndOfMibView)]
+        else:
+            pMod.apiPDU.setErrorStatus(rspPDU, 5)  # genErr
+
+        pMod.apiPDU.setVarBinds(rspPDU, varBinds)
+        return encoder.encode(rspMsg)
+
+
+# --------------------------------------------------------------------
+# 🏭 Ferme d'agents dans un thread dédié
+# --------------------------------------------------------------------
+class AgentFarm:
+    """Démarre n agents sur des ports consécutifs dans une boucle à part."""
+
+    def __init__(self, nb_agents, nb_oids=1, latency=0.0, dead=0, community="public", base_port=16100,
+                 max_varbinds=None, table=None, loss=0.0):
+        self.nb_agents = nb_agents
+        self.nb_oids = nb_oids
+        self.table = table          # table {oid: valeur} imposée (sinon make_oid_table)
+        self.latency = latency
+        self.loss = loss            # probabilité de perte de chaque requête
+        self.max_varbinds = max_varbinds
+        self.dead = dead            # nombre d'agents muets (les premiers)
+        self.community = community
+        self.base_port = base_port
+        self.agents = []
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    @property
+    def targets(self):
+        """Adresses "127.0.0.1:port" utilisables comme Equipement.ip."""
+        return [f"127.0.0.1:{self.base_port + i}" for i in range(self.nb_agents)]
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        table = self.table if self.table is not None else make_oid_table(self.nb_oids)
+        try:
+            for i in range(self.nb_agents):
+                agent = FakeAgent(table, self.community, self.latency, dead=i < self.dead,
+                                  max_varbinds=self.max_varbinds, loss=self.loss)
+                self._loop.run_until_complete(self._loop.create_datagram_endpoint(
+                    lambda agent=agent: agent, local_addr=("127.0.0.1", self.base_port + i)))
+                self.agents.append(agent)
+        except Exception as e:
+            self._error = e
+        self._ready.set()
+        if self._error is None:
+            self._loop.run_forever()
+        for agent in self.agents:
+            agent.transport.close()
+        # Laisse les transports libérer réellement leurs sockets
+        self._loop.run_until_complete(asyncio.sleep(0))
+        self._loop.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            raise self._error
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
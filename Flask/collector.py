@@ -0,0 +1,55 @@
+"""Démon de collecte SNMP, sans serveur web.
+
+Usage : python Flask/collector.py   (le site tourne à part : voir wsgi.py)
+
+Seule la BDD est partagée avec le serveur web : ajouts et modifications
+d'équipements / OID sont repris à chaque réconciliation de l'ordonnanceur
+(SCHEDULER_RECONCILE_INTERVAL).
+"""
+import asyncio
+import os
+import signal
+import sys
+
+import app
+import logs
+import metrics
+
+# Port d'exposition de /metrics (0 = désactivé) : le collecteur n'a pas de serveur web
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9105"))
+
+
+async def suivre_file():
+    # Jauge relevée périodiquement : pas de requête /metrics dans ce processus pour la mettre à jour
+    while True:
+        metrics.INGEST_QUEUE.set(app.ingest_writer.qsize())
+        await asyncio.sleep(1)
+
+
+def main():
+    logs.logger.source = "collector"   # journal LOG_DIR/collector.jsonl, relu par la page /logs du site
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    app.demarrer_collecte(loop, separe=True)
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+        loop.create_task(suivre_file())
+    logs.logger.info("demarrage", "🛰️ Collecteur SNMP démarré")
+
+    def shutdown(signal_received=None, frame=None):
+        logs.logger.info("arret", "🛑 Arrêt du collecteur. Fermeture propre...")
+        app.arreter_collecte(loop)
+        loop.stop()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import threading
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+DB_PATH = os.environ.get("DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "BDD", "BDD_LeFlour"))
+DB_TIMEOUT = float(os.environ.get("DB_TIMEOUT", "5"))                  # attente max d'un verrou (s)
+DB_JOURNAL_MODE = os.environ.get("DB_JOURNAL_MODE", "WAL")             # WAL : les lecteurs ne bloquent plus l'écrivain
+DB_SYNCHRONOUS = os.environ.get("DB_SYNCHRONOUS", "NORMAL")            # NORMAL suffit en WAL (pas de corruption)
+DB_CACHE_KB = int(os.environ.get("DB_CACHE_KB", "20000"))              # cache de pages par connexion (Kio)
+DB_MMAP_SIZE = int(os.environ.get("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "16"))               # connexions inactives conservées
+DB_STATEMENT_CACHE = int(os.environ.get("DB_STATEMENT_CACHE", "256"))  # requêtes préparées gardées par connexion
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connexion dont close() la rend au pool au lieu de la fermer."""
+
+    pool = None
+    idle = False
+
+    def close(self):
+        if self.idle:
+            return  # déjà rendue
+        if self.pool is None or not self.pool.release(self):
+            super().close()
+
+    def really_close(self):
+        super().close()
+
+
+# --------------------------------------------------------------------
+# 🔌 Pool de connexions SQLite
+# --------------------------------------------------------------------
+class ConnectionPool:
+    """Connexions SQLite réglées une fois et réutilisées.
+
+    connect() rend une connexion inactive (ou en ouvre une), que l'appelant
+    utilise seul jusqu'à close() : elle est alors annulée si une transaction
+    est restée ouverte et remise dans le pool. Une connexion peut changer de
+    thread entre deux emprunts (SQLite est compilé en mode sérialisé), ce qui
+    permet aux threads de requête Flask de profiter des connexions ouvertes
+    par les précédents et de leur cache de requêtes préparées.
+    """
+
+    def __init__(self, path=DB_PATH, size=DB_POOL_SIZE, timeout=DB_TIMEOUT, journal_mode=DB_JOURNAL_MODE,
+                 synchronous=DB_SYNCHRONOUS, cache_kb=DB_CACHE_KB, mmap_size=DB_MMAP_SIZE,
+                 statement_cache=DB_STATEMENT_CACHE):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_kb = cache_kb
+        self.mmap_size = mmap_size
+        self.statement_cache = statement_cache
+        self._lock = threading.Lock()
+        self._idle = []
+        self._journal_set = False
+        self.stats = dict.fromkeys(("opened", "reused", "released", "closed", "rollbacks"), 0)
+
+    def _open(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Base de données introuvable à l'emplacement : {self.path}")
+
+        conn = sqlite3.connect(self.path, timeout=self.timeout, factory=PooledConnection,
+                               cached_statements=self.statement_cache, check_same_thread=False)
+        conn.pool = self
+        conn.row_factory = sqlite3.Row
+        if not self._journal_set and self.journal_mode:
+            # Mode persistant, stocké dans le fichier : une fois suffit
+            conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+            self._journal_set = True
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {-self.cache_kb}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        self.stats["opened"] += 1
+        return conn
+
+    def connect(self):
+        with self._lock:
+            if self._idle:
+                self.stats["reused"] += 1
+                conn = self._idle.pop()
+                conn.idle = False
+                return conn
+        return self._open()
+
+    def release(self, conn):
+        """Remet la connexion dans le pool ; False si elle doit être fermée."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+                self.stats["rollbacks"] += 1
+        except sqlite3.Error:
+            return False
+        with self._lock:
+            if len(self._idle) < self.size:
+                conn.idle = True
+                self._idle.append(conn)
+                self.stats["released"] += 1
+                return True
+            self.stats["closed"] += 1
+        return False
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.really_close()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, idle=len(self._idle), path=self.path)
+
+
+pool = ConnectionPool()
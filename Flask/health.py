@@ -0,0 +1,159 @@
+import math
+import os
+import threading
+import time
+
+from logs import logger
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+SNMP_TIMEOUT = float(os.environ.get("SNMP_TIMEOUT", "3"))            # délai avant la première mesure de RTT (s)
+SNMP_RETRIES = int(os.environ.get("SNMP_RETRIES", "1"))
+SNMP_TIMEOUT_MIN = float(os.environ.get("SNMP_TIMEOUT_MIN", "0.5"))
+SNMP_TIMEOUT_MAX = float(os.environ.get("SNMP_TIMEOUT_MAX", "5"))
+SNMP_TIMEOUT_STEP = 0.25   # délais arrondis au quart de seconde : peu de cibles différentes en cache
+# Échecs consécutifs avant d'ouvrir le circuit d'un équipement
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "3"))
+BREAKER_BACKOFF = float(os.environ.get("BREAKER_BACKOFF", "30"))          # premier délai avant une sonde (s)
+BREAKER_BACKOFF_MAX = float(os.environ.get("BREAKER_BACKOFF_MAX", "1800"))
+# OID interrogé seul pour sonder un équipement injoignable (SNMPv2-MIB::sysUpTime.0)
+BREAKER_SENTINEL_OID = os.environ.get("BREAKER_SENTINEL_OID", "1.3.6.1.2.1.1.3.0")
+
+
+class TargetHealth:
+    __slots__ = ("srtt", "rttvar", "failures", "open", "probing", "next_probe", "backoff", "opened_at")
+
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = None
+        self.failures = 0
+        self.open = False
+        self.probing = False
+        self.next_probe = 0.0
+        self.backoff = BREAKER_BACKOFF
+        self.opened_at = None
+
+
+# --------------------------------------------------------------------
+# 🩺 Délais adaptatifs et coupe-circuit par cible SNMP
+# --------------------------------------------------------------------
+class HealthRegistry:
+    """RTT lissé et état du circuit de chaque cible (hôte, port).
+
+    Le délai d'attente suit srtt + 4 × rttvar (RFC 6298), borné entre
+    SNMP_TIMEOUT_MIN et SNMP_TIMEOUT_MAX. Après BREAKER_FAILURES échecs de
+    suite, le circuit s'ouvre : les requêtes échouent aussitôt, sans
+    réseau, et seule une sonde sur BREAKER_SENTINEL_OID part, après un
+    délai qui double à chaque échec (jusqu'à BREAKER_BACKOFF_MAX). La
+    première réponse referme le circuit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._targets = {}
+        self.stats = dict.fromkeys(("opened", "closed", "probes", "short_circuits", "rtt_samples"), 0)
+
+    def _get(self, target):
+        health = self._targets.get(target)
+        if health is None:
+            health = self._targets[target] = TargetHealth()
+        return health
+
+    def timeout(self, target):
+        """(timeout, retries) à utiliser pour la prochaine requête vers ``target``."""
+        with self._lock:
+            health = self._get(target)
+            if health.srtt is None:
+                return SNMP_TIMEOUT, SNMP_RETRIES
+            rto = health.srtt + 4 * health.rttvar
+        rto = min(SNMP_TIMEOUT_MAX, max(SNMP_TIMEOUT_MIN, rto))
+        return math.ceil(rto / SNMP_TIMEOUT_STEP) * SNMP_TIMEOUT_STEP, SNMP_RETRIES
+
+    def allow(self, target, now=None):
+        """"closed" (requête normale), "probe" (sonder d'abord) ou "open" (échec immédiat)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            health = self._get(target)
+            if not health.open:
+                return "closed"
+            if health.probing or now < health.next_probe:
+                self.stats["short_circuits"] += 1
+                return "open"
+            health.probing = True   # une seule sonde à la fois par cible
+            self.stats["probes"] += 1
+            return "probe"
+
+    def record_success(self, target, rtt=None, timeout=None):
+        with self._lock:
+            health = self._get(target)
+            # Karn : une réponse arrivée après un premier délai dépassé peut venir d'un renvoi
+            if rtt is not None and (timeout is None or rtt < timeout):
+                if health.srtt is None:
+                    health.srtt, health.rttvar = rtt, rtt / 2
+                else:
+                    health.rttvar = 0.75 * health.rttvar + 0.25 * abs(health.srtt - rtt)
+                    health.srtt = 0.875 * health.srtt + 0.125 * rtt
+                self.stats["rtt_samples"] += 1
+            health.failures = 0
+            health.probing = False
+            if health.open:
+                health.open = False
+                health.backoff = BREAKER_BACKOFF
+                self.stats["closed"] += 1
+                logger.info("circuit_ferme", "{target} répond de nouveau, collecte normale",
+                            target=f"{target[0]}:{target[1]}")
+
+    def record_failure(self, target, now=None):
+        """Compte un échec ; renvoie True si le circuit vient de s'ouvrir."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            health = self._get(target)
+            health.failures += 1
+            if health.open:
+                if not health.probing:
+                    return False  # requête partie avant l'ouverture du circuit
+                # 🔁 Sonde sans réponse : on attend deux fois plus longtemps
+                health.probing = False
+                health.backoff = min(BREAKER_BACKOFF_MAX, health.backoff * 2)
+                health.next_probe = now + health.backoff
+                return False
+            if health.failures < BREAKER_FAILURES:
+                return False
+            health.open = True
+            health.opened_at = now
+            health.next_probe = now + health.backoff
+            self.stats["opened"] += 1
+        logger.warning("circuit_ouvert", "⛔ {target} injoignable ({echecs} échecs), prochaine sonde dans {delai:g} s",
+                       target=f"{target[0]}:{target[1]}", echecs=BREAKER_FAILURES, delai=health.backoff)
+        return True
+
+    def reset(self):
+        """Oublie RTT et circuits de toutes les cibles (bancs d'essai successifs)."""
+        with self._lock:
+            self._targets.clear()
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def describe(self, target, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            health = self._get(target)
+            return f"Circuit ouvert : nouvel essai dans {max(0, health.next_probe - now):.0f} s"
+
+    def snapshot(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return dict(self.stats, targets={
+                f"{host}:{port}": {
+                    "srtt_ms": round(h.srtt * 1000, 1) if h.srtt is not None else None,
+                    "rttvar_ms": round(h.rttvar * 1000, 1) if h.rttvar is not None else None,
+                    "failures": h.failures,
+                    "open": h.open,
+                    "next_probe_in": round(max(0.0, h.next_probe - now), 1) if h.open else None,
+                }
+                for (host, port), h in self._targets.items()
+            })
+
+
+health = HealthRegistry()
@@ -0,0 +1,235 @@
+import asyncio
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from logs import logger
+from metrics import DB_BATCH, DB_WRITE
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "500"))          # lignes max par transaction
+INGEST_FLUSH_INTERVAL = float(os.environ.get("INGEST_FLUSH_INTERVAL", "1.0"))  # délai max avant écriture (s)
+INGEST_QUEUE_MAX = int(os.environ.get("INGEST_QUEUE_MAX", "10000"))          # au-delà, les pollers attendent
+INGEST_MAX_BACKOFF = 30.0   # délai max entre deux reconnexions de l'écrivain (s)
+
+# Requêtes d'insertion par type d'enregistrement
+STATEMENTS = {
+    "sample": "INSERT INTO DonneeEquipement (equipement_id, oid_id, valeur, indice, timestamp) VALUES (?, ?, ?, ?, ?)",
+    "event": """
+        INSERT INTO Event (oid_id, equipement_id, type_alerte, valeur_actuelle, seuil_declencheur,
+                           message, niveau, horodatage, indice)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+}
+
+_STOP = object()
+
+
+def now_utc():
+    """Horodatage au format de CURRENT_TIMESTAMP (UTC, 'YYYY-MM-DD HH:MM:SS')."""
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# --------------------------------------------------------------------
+# 📥 Écrivain unique alimenté par une file
+# --------------------------------------------------------------------
+class IngestWriter:
+    """File d'écriture différée vers la BDD.
+
+    Les pollers déposent des enregistrements avec push(), un thread unique
+    les écrit par executemany dans une seule transaction dès que
+    INGEST_BATCH_SIZE lignes sont en attente ou que INGEST_FLUSH_INTERVAL
+    est écoulé. Quand la file est pleine, push() bloque (contre-pression).
+    Si la connexion échoue, le thread réessaie avec un délai croissant ;
+    s'il s'est arrêté malgré tout, le prochain push() le relance.
+
+    Avec un ``backend`` (storage.py), chaque lot passe par son bulk_insert
+    (COPY sous PostgreSQL) au lieu d'un executemany.
+    """
+
+    def __init__(self, connect, batch_size=INGEST_BATCH_SIZE, flush_interval=INGEST_FLUSH_INTERVAL,
+                 queue_max=INGEST_QUEUE_MAX, backend=None):
+        self.connect = connect
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_max)
+        self._listeners = []
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(("rows", "batches", "dropped", "errors", "max_batch", "restarts"), 0)
+
+    # ---------------- Côté producteurs ----------------
+    def subscribe(self, callback):
+        """Appelle ``callback(kind, params)`` pour chaque enregistrement déposé (avant l'écriture en BDD)."""
+        self._listeners.append(callback)
+
+    def _notify(self, kind, params):
+        for callback in self._listeners:
+            try:
+                callback(kind, params)
+            except Exception as e:
+                logger.error("abonne_ingestion", "Abonné de l'ingestion en erreur : {erreur}", erreur=str(e))
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is not None:
+                    # 💥 Thread mort sans stop() : les enregistrements en file seront écrits par le suivant
+                    self.stats["restarts"] += 1
+                    logger.error("ecrivain", "Thread d'écriture arrêté, relance ({attente} en file)",
+                                 attente=self._queue.qsize())
+                self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+                self._thread.start()
+
+    def _ensure_started(self):
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self.start()
+
+    def push(self, kind, params):
+        """Ajoute un enregistrement ; bloque tant que la file est pleine."""
+        self._ensure_started()
+        self._queue.put((kind, params))
+        self._notify(kind, params)
+
+    async def push_async(self, kind, params):
+        """Comme push(), sans bloquer la boucle asyncio quand la file est pleine."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((kind, params))
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, (kind, params))
+        self._notify(kind, params)
+
+    def push_sample(self, equipement_id, oid_id, valeur, indice=None, timestamp=None):
+        self.push("sample", (equipement_id, oid_id, valeur, indice, timestamp or now_utc()))
+
+    async def push_sample_async(self, equipement_id, oid_id, valeur, indice=None, timestamp=None):
+        await self.push_async("sample", (equipement_id, oid_id, valeur, indice, timestamp or now_utc()))
+
+    def push_event(self, oid_id, equipement_id, type_alerte, valeur_actuelle, seuil_declencheur, message, niveau,
+                   horodatage=None, indice=None):
+        self.push("event", (oid_id, equipement_id, type_alerte, valeur_actuelle, seuil_declencheur,
+                            message, niveau, horodatage or now_utc(), indice))
+
+    def flush(self, timeout=None):
+        """Attend que tout ce qui a été déposé avant l'appel soit écrit."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def stop(self, timeout=10):
+        """Vide la file, écrit le dernier lot et arrête le thread."""
+        if self._thread is None:
+            return
+        self._queue.put((_STOP, None))
+        self._thread.join(timeout)
+        self._thread = None
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    # ---------------- Thread écrivain ----------------
+    def _run(self):
+        conn = None
+        batch = []
+        waiters = []
+        deadline = None
+        running = True
+        backoff = 0.5
+
+        try:
+            while running:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    kind, params = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    kind = None
+
+                if kind is _STOP:
+                    running = False
+                elif kind == "flush":
+                    waiters.append(params)
+                elif kind is not None:
+                    batch.append((kind, params))
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                full = len(batch) >= self.batch_size
+                expired = deadline is not None and time.monotonic() >= deadline
+                if batch and (full or expired or waiters or not running):
+                    try:
+                        if conn is None:
+                            conn = self.connect()
+                    except Exception as e:
+                        # 🔌 BDD injoignable : le lot attend, les pollers finissent par attendre aussi
+                        self.stats["errors"] += 1
+                        logger.error("ecrivain", "Connexion de l'écrivain impossible, nouvel essai dans {delai:g} s : "
+                                     "{erreur}", delai=backoff, erreur=str(e))
+                        if running:
+                            time.sleep(backoff)
+                            backoff = min(INGEST_MAX_BACKOFF, backoff * 2)
+                            deadline = time.monotonic()
+                            continue
+                        self.stats["dropped"] += len(batch)
+                        batch = []
+                    else:
+                        backoff = 0.5
+                        if not self._write(conn, batch):
+                            # Connexion peut-être rompue : une neuve pour le lot suivant
+                            conn.close()
+                            conn = None
+                        batch = []
+                        deadline = None
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _write(self, conn, batch):
+        """Écrit un lot en une transaction ; False si le lot a été abandonné."""
+        grouped = {}
+        for kind, params in batch:
+            grouped.setdefault(kind, []).append(params)
+
+        retryable = self.backend.retryable if self.backend else (sqlite3.OperationalError,)
+        for attempt in range(3):
+            try:
+                start = time.perf_counter()
+                with conn:  # 🧾 une seule transaction (un seul fsync) pour tout le lot
+                    for kind, rows in grouped.items():
+                        if self.backend:
+                            self.backend.bulk_insert(conn, kind, rows)
+                        else:
+                            conn.executemany(STATEMENTS[kind], rows)
+                DB_WRITE.observe(time.perf_counter() - start)
+                DB_BATCH.observe(len(batch))
+                self.stats["rows"] += len(batch)
+                self.stats["batches"] += 1
+                self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+                return True
+            except retryable as e:
+                # 🔒 Base verrouillée : on réessaie avant d'abandonner le lot
+                self.stats["errors"] += 1
+                logger.warning("ecriture_differee", "Écriture différée, tentative {tentative}/3 : {erreur}",
+                               tentative=attempt + 1, erreur=str(e))
+                time.sleep(0.5 * (attempt + 1))
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error("ecriture_differee", "Écriture différée impossible : {erreur}", erreur=str(e))
+                break
+
+        self.stats["dropped"] += len(batch)
+        logger.error("lot_abandonne", "{nombre} enregistrements abandonnés", nombre=len(batch))
+        return False
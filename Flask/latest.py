@@ -0,0 +1,106 @@
+import threading
+
+from ingest import now_utc
+
+
+# Index utilisé par rebuild() : la dernière ligne de chaque série se lit sans toucher la table
+SCHEMA_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_donnee_serie ON DonneeEquipement (equipement_id, oid_id, indice)",
+]
+
+
+class LastValue:
+    __slots__ = ("valeur", "timestamp", "status", "niveau", "info")
+
+    def __init__(self, valeur=None, timestamp=None, status="UP", niveau=None, info=None):
+        self.valeur = valeur
+        self.timestamp = timestamp
+        self.status = status
+        self.niveau = niveau
+        self.info = info
+
+
+# --------------------------------------------------------------------
+# 🟢 Dernière valeur de chaque série, en mémoire
+# --------------------------------------------------------------------
+class LatestValues:
+    """Valeur, horodatage, état (UP / DOWN) et niveau d'alerte par (équipement, OID, indice).
+
+    Tenu à jour par l'ingestion (on_record() est abonné à l'IngestWriter),
+    par la collecte pour les échecs (mark_down()) et par l'alerting
+    (set_niveau()) ; reconstruit au démarrage par rebuild().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def update(self, equipement_id, oid_id, valeur, timestamp=None, indice=None):
+        with self._lock:
+            entry = self._values.get((equipement_id, oid_id, indice))
+            if entry is None:
+                entry = self._values[(equipement_id, oid_id, indice)] = LastValue()
+            entry.valeur = valeur
+            entry.timestamp = timestamp or now_utc()
+            entry.status = "UP"
+            entry.info = None
+
+    def on_record(self, kind, params):
+        """Abonné de l'IngestWriter : chaque mesure déposée devient la dernière valeur."""
+        if kind == "sample":
+            equipement_id, oid_id, valeur, indice, timestamp = params
+            self.update(equipement_id, oid_id, valeur, timestamp, indice)
+
+    def mark_down(self, equipement_id, oid_id, info, indice=None):
+        # On garde la dernière valeur connue, seul l'état change
+        with self._lock:
+            entry = self._values.setdefault((equipement_id, oid_id, indice), LastValue())
+            entry.status = "DOWN"
+            entry.info = info
+
+    def set_niveau(self, equipement_id, oid_id, niveau, indice=None):
+        with self._lock:
+            entry = self._values.setdefault((equipement_id, oid_id, indice), LastValue())
+            entry.niveau = niveau
+
+    def forget(self, equipement_id=None, oid_id=None):
+        """Oublie les séries d'un équipement ou d'un OID supprimé."""
+        with self._lock:
+            for key in [k for k in self._values
+                        if (equipement_id is not None and k[0] == equipement_id)
+                        or (oid_id is not None and k[1] == oid_id)]:
+                del self._values[key]
+
+    def rebuild(self, connect, niveau=None):
+        """Recharge la dernière mesure de chaque série en une requête (index idx_donnee_serie).
+
+        ``niveau(key)`` fournit le niveau d'alerte en cours (AlertStateMachine.niveau).
+        """
+        conn = connect()
+        try:
+            rows = conn.execute("""
+                SELECT D.equipement_id, D.oid_id, D.indice, D.valeur, D.timestamp
+                FROM DonneeEquipement D
+                JOIN (
+                    SELECT MAX(id) AS id FROM DonneeEquipement GROUP BY equipement_id, oid_id, indice
+                ) L ON L.id = D.id
+            """).fetchall()
+        finally:
+            conn.close()
+
+        values = {}
+        for equipement_id, oid_id, indice, valeur, timestamp in rows:
+            key = (equipement_id, oid_id, indice)
+            values[key] = LastValue(valeur, timestamp, "UP", niveau(key) if niveau else None)
+        with self._lock:
+            self._values = values
+        return len(values)
+
+    def snapshot(self, equipement_id=None):
+        with self._lock:
+            return [
+                {"equipement_id": key[0], "oid_id": key[1], "indice": key[2], "valeur": entry.valeur,
+                 "timestamp": entry.timestamp, "status": entry.status, "niveau": entry.niveau, "info": entry.info}
+                for key, entry in self._values.items()
+                if equipement_id is None or key[0] == equipement_id
+            ]
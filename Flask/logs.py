@@ -0,0 +1,191 @@
+import datetime
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+LOG_DIR = os.environ.get("LOG_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs"))
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", str(10 * 1024 * 1024)))   # taille d'un fichier avant rotation
+LOG_BACKUPS = int(os.environ.get("LOG_BACKUPS", "5"))
+LOG_QUEUE_MAX = int(os.environ.get("LOG_QUEUE_MAX", "10000"))      # au-delà, les messages sont perdus (comptés)
+LOG_CONSOLE = os.environ.get("LOG_CONSOLE", "1") != "0"            # recopie lisible sur la sortie standard
+# Messages répétitifs : un sur N est gardé (le nombre de messages représentés est noté dans "sampled")
+LOG_SAMPLING = {"mesure": int(os.environ.get("LOG_SAMPLE_MESURE", "100"))}
+LOG_READ_MAX = 5000        # lignes relues au plus par fichier pour la page /logs
+
+NIVEAUX = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+EMOJIS = {"DEBUG": "🔹", "INFO": "✅", "WARNING": "⚠️", "ERROR": "❌"}
+
+_STOP = object()
+
+
+# --------------------------------------------------------------------
+# 📝 Journal structuré (JSON lines), écrit par un thread
+# --------------------------------------------------------------------
+class JsonLogger:
+    """Journal à niveaux dont l'appelant ne fait que déposer l'enregistrement.
+
+    debug() / info() / warning() / error() vérifient le niveau et
+    l'échantillonnage, puis mettent (horodatage, niveau, événement, gabarit,
+    champs) dans une file : le message n'est mis en forme, sérialisé et écrit
+    que par le thread du journal. Une ligne JSON par enregistrement, dans
+    LOG_DIR/<source>.jsonl, avec rotation par taille : un seul processus
+    doit écrire dans un fichier donné. ``source`` peut contenir {pid}
+    (workers d'un serveur WSGI) ; après un fork, le processus enfant
+    reprend avec sa propre file et son propre thread.
+    """
+
+    def __init__(self, source="app", level=LOG_LEVEL, sampling=None, console=LOG_CONSOLE):
+        self.source = source
+        self.level = NIVEAUX.get(level, 20)
+        self.sampling = dict(LOG_SAMPLING if sampling is None else sampling)
+        self.console = console
+        self._seen = {}
+        self._queue = queue.Queue(maxsize=LOG_QUEUE_MAX)
+        self._thread = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(("written", "sampled_out", "dropped", "errors"), 0)
+
+    # ---------------- Côté appelants ----------------
+    def log(self, niveau, event, message="", /, **fields):
+        if NIVEAUX[niveau] < self.level:
+            return
+        every = self.sampling.get(event)
+        if every and every > 1:
+            seen = self._seen.get(event, 0) + 1
+            self._seen[event] = seen
+            if seen % every != 1:
+                self.stats["sampled_out"] += 1
+                return
+            fields["sampled"] = every
+        if self._thread is None or self._pid != os.getpid():
+            self.start()
+        try:
+            self._queue.put_nowait((time.time(), niveau, event, message, fields))
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def debug(self, event, message="", /, **fields):
+        self.log("DEBUG", event, message, **fields)
+
+    def info(self, event, message="", /, **fields):
+        self.log("INFO", event, message, **fields)
+
+    def warning(self, event, message="", /, **fields):
+        self.log("WARNING", event, message, **fields)
+
+    def error(self, event, message="", /, **fields):
+        self.log("ERROR", event, message, **fields)
+
+    # ---------------- Thread d'écriture ----------------
+    def nom(self):
+        """Nom du fichier (sans extension) et champ "source" de ce processus."""
+        return self.source.format(pid=os.getpid())
+
+    def start(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # 🍴 Processus forké : le thread du parent n'existe pas ici, sa file non plus
+                self._pid = os.getpid()
+                self._queue = queue.Queue(maxsize=LOG_QUEUE_MAX)
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5):
+        """Écrit ce qui reste en file puis arrête le thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        source = self.nom()
+        os.makedirs(LOG_DIR, exist_ok=True)
+        handler = RotatingFileHandler(os.path.join(LOG_DIR, f"{source}.jsonl"), maxBytes=LOG_MAX_BYTES,
+                                      backupCount=LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                ts, niveau, event, message, fields = item
+                try:
+                    texte = message.format(**fields) if message else event
+                except (KeyError, IndexError, ValueError):
+                    texte = message
+                ligne = json.dumps({"ts": round(ts, 3), "level": niveau, "source": source, "event": event,
+                                    "message": texte, **fields}, ensure_ascii=False, default=str)
+                try:
+                    handler.emit(logging.makeLogRecord({"msg": ligne, "levelno": NIVEAUX[niveau]}))
+                    self.stats["written"] += 1
+                except Exception:
+                    self.stats["errors"] += 1
+                if self.console:
+                    print(f"[{datetime.datetime.fromtimestamp(ts):%Y-%m-%d %H:%M:%S}] {EMOJIS[niveau]} {texte}")
+        finally:
+            handler.close()
+
+
+# --------------------------------------------------------------------
+# 🔎 Relecture pour la page /logs
+# --------------------------------------------------------------------
+def _dernieres_lignes(path, max_lines, bloc=65536):
+    """Les ``max_lines`` dernières lignes d'un fichier, lues depuis la fin."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= max_lines:
+            taille = min(bloc, position)
+            position -= taille
+            f.seek(position)
+            data = f.read(taille) + data
+    lignes = data.splitlines()
+    if position > 0:
+        lignes = lignes[1:]  # première ligne coupée
+    return lignes[-max_lines:]
+
+
+def lire(limite=200, niveau="DEBUG", recherche=None, source=None, max_lines=LOG_READ_MAX):
+    """Derniers enregistrements de tous les journaux de LOG_DIR, du plus récent au plus ancien."""
+    seuil = NIVEAUX.get(niveau, 10)
+    recherche = (recherche or "").lower()
+    records = []
+    for path in glob.glob(os.path.join(LOG_DIR, "*.jsonl")):
+        if source and os.path.basename(path) != f"{source}.jsonl":
+            continue
+        try:
+            lignes = _dernieres_lignes(path, max_lines)
+        except OSError:
+            continue
+        for ligne in lignes:
+            try:
+                record = json.loads(ligne)
+            except ValueError:
+                continue
+            if NIVEAUX.get(record.get("level"), 0) < seuil:
+                continue
+            if recherche and recherche not in ligne.decode("utf-8", "replace").lower():
+                continue
+            records.append(record)
+    records.sort(key=lambda r: r.get("ts", 0), reverse=True)
+    return records[:limite]
+
+
+def sources():
+    return sorted(os.path.basename(p)[:-len(".jsonl")] for p in glob.glob(os.path.join(LOG_DIR, "*.jsonl")))
+
+
+logger = JsonLogger()
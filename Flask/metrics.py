@@ -0,0 +1,218 @@
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+# Bornes (s) des histogrammes de durée : de la milliseconde à la dizaine de secondes
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+RATIO_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+# --------------------------------------------------------------------
+# 📊 Métriques au format texte Prometheus
+# --------------------------------------------------------------------
+class Metric:
+    """Base : une valeur par combinaison d'étiquettes, protégée par un verrou."""
+
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels[n] for n in self.labels)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labels, key)} {value:g}")
+        return lines
+
+    def take(self):
+        """Valeurs accumulées depuis le dernier appel, remises à zéro (envoi d'un worker vers le parent)."""
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def merge(self, values):
+        with self._lock:
+            for key, amount in values.items():
+                self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [compte par intervalle (+Inf en dernier), somme, nombre]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def merge(self, values):
+        with self._lock:
+            for key, (counts, total, count) in values.items():
+                state = self._values.get(key)
+                if state is None:
+                    state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+                state[2] += count
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumul = 0
+            for borne, n in zip(self.buckets + ("+Inf",), counts):
+                cumul += n
+                le = borne if isinstance(borne, str) else f"{borne:g}"
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + (le,))} {cumul}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total:g}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def take_deltas(self):
+        """Compteurs et histogrammes accumulés dans ce processus depuis le dernier appel.
+
+        Un worker de collecte les envoie au parent, qui les ajoute aux siens
+        avec merge() : /metrics couvre ainsi tous les workers. Les jauges
+        restent locales.
+        """
+        deltas = {}
+        for metric in self._metrics:
+            if metric.kind in ("counter", "histogram"):
+                values = metric.take()
+                if values:
+                    deltas[metric.name] = values
+        return deltas
+
+    def merge(self, deltas):
+        by_name = {metric.name: metric for metric in self._metrics}
+        for name, values in deltas.items():
+            if name in by_name:
+                by_name[name].merge(values)
+
+    def expose(self):
+        """Corps de la réponse /metrics (text/plain; version=0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# 📡 Collecte SNMP
+SNMP_RTT = registry.register(Histogram(
+    "snmp_rtt_seconds", "Durée d'un aller-retour SNMP réussi (GET ou page GETBULK)", ("target",)))
+SNMP_TIMEOUTS = registry.register(Counter(
+    "snmp_timeouts_total", "Requêtes SNMP sans réponse", ("target",)))
+SNMP_DECODE_FAILURES = registry.register(Counter(
+    "snmp_decode_failures_total", "Valeurs reçues non convertibles en nombre", ("type",)))
+POLL_LAG = registry.register(Histogram(
+    "poll_lag_seconds", "Retard d'une collecte sur son échéance"))
+POLL_LAG_RATIO = registry.register(Histogram(
+    "poll_lag_ratio", "Retard d'une collecte rapporté à l'intervalle de l'équipement", buckets=RATIO_BUCKETS))
+ALERTS = registry.register(Counter(
+    "alerts_total", "Changements d'état d'alerte enregistrés", ("etape", "niveau")))
+
+# 💾 Écriture en BDD
+DB_WRITE = registry.register(Histogram(
+    "ingest_write_seconds", "Durée d'écriture d'un lot (une transaction)"))
+DB_BATCH = registry.register(Histogram(
+    "ingest_batch_size", "Enregistrements par lot écrit", buckets=SIZE_BUCKETS))
+INGEST_QUEUE = registry.register(Gauge(
+    "ingest_queue_depth", "Enregistrements en attente d'écriture"))
+
+# 🌐 Site
+ROUTE_DURATION = registry.register(Histogram(
+    "http_request_seconds", "Durée de traitement d'une requête (rendu compris)", ("route",)))
+
+
+def serve(port, host="0.0.0.0"):
+    """Expose /metrics sur ``port`` dans un thread (collecteur sans serveur web)."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.expose().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+# Au-delà de cet écart entre deux relevés (s), le delta n'est plus fiable (plusieurs rebouclages possibles)
+COUNTER_MAX_GAP = float(os.environ.get("COUNTER_MAX_GAP", "3600"))
+
+# Type pyasn1 reçu -> taille du compteur ; à défaut, type déclaré dans OID.typeValeur
+COUNTER_BITS = {"Counter32": 32, "Counter64": 64}
+TYPES_COMPTEUR = {"COUNTER": 32, "COUNTER32": 32, "COUNTER64": 64}
+
+
+def bits_compteur(type_recu, type_valeur=None):
+    """32 ou 64 si la valeur est un compteur, sinon None."""
+    return COUNTER_BITS.get(type_recu) or TYPES_COMPTEUR.get((type_valeur or "").upper().replace(" ", ""))
+
+
+# --------------------------------------------------------------------
+# 📈 Débit des compteurs (valeur / seconde)
+# --------------------------------------------------------------------
+class CounterRates:
+    """Transforme les relevés de compteurs en débits par seconde.
+
+    Garde en mémoire le relevé précédent de chaque série (équipement, OID,
+    indice). Un compteur qui diminue a rebouclé s'il était dans la moitié
+    haute de sa plage (2**32 ou 2**64) ; sinon l'agent a redémarré et la
+    série repart de ce relevé. Le premier relevé d'une série ne donne pas
+    de débit.
+    """
+
+    def __init__(self, max_gap=COUNTER_MAX_GAP):
+        self.max_gap = max_gap
+        self._lock = threading.Lock()
+        self._previous = {}
+        self.stats = dict.fromkeys(("rates", "baselines", "wraps", "resets", "gaps"), 0)
+
+    def derive(self, key, valeur, bits, now=None):
+        """Débit depuis le relevé précédent de ``key``, ou None (premier relevé, remise à zéro, trou)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            previous = self._previous.get(key)
+            self._previous[key] = (valeur, now)
+
+        if previous is None:
+            self.stats["baselines"] += 1
+            return None
+        precedent, instant = previous
+        duree = now - instant
+        if duree <= 0 or duree > self.max_gap:
+            self.stats["gaps"] += 1
+            return None
+
+        delta = valeur - precedent
+        if delta < 0:
+            modulo = 2 ** bits
+            if precedent - valeur > modulo // 2:
+                # 🔄 Rebouclage : le compteur est passé de 2**bits - 1 à 0
+                delta += modulo
+                self.stats["wraps"] += 1
+            else:
+                # ♻️ Redémarrage de l'agent (ou compteur remis à zéro)
+                self.stats["resets"] += 1
+                return None
+
+        self.stats["rates"] += 1
+        return delta / duree
+
+    def forget(self, equipement_id=None, oid_id=None):
+        """Oublie les séries d'un équipement ou d'un OID supprimé."""
+        with self._lock:
+            for key in [k for k in self._previous
+                        if (equipement_id is not None and k[0] == equipement_id)
+                        or (oid_id is not None and k[1] == oid_id)]:
+                del self._previous[key]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, series=len(self._previous))
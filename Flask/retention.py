@@ -0,0 +1,193 @@
+import asyncio
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+from logs import logger
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+def _jours(nom, defaut):
+    # 0 = conservation illimitée
+    return float(os.environ.get(nom, defaut))
+
+
+# Durée de conservation (jours) par table, et par résolution pour les agrégats.
+# Mesures brutes et événements : historique existant gardé tant qu'aucune durée n'est choisie
+RETENTION = {
+    "DonneeEquipement": _jours("RETENTION_DONNEE_JOURS", "0"),
+    "Event": _jours("RETENTION_EVENT_JOURS", "0"),
+    "minute": _jours("RETENTION_MINUTE_JOURS", "7"),
+    "heure": _jours("RETENTION_HEURE_JOURS", "90"),
+    "jour": _jours("RETENTION_JOUR_JOURS", "730"),
+}
+
+RETENTION_INTERVAL = float(os.environ.get("RETENTION_INTERVAL", "3600"))        # délai entre deux purges (s)
+RETENTION_BATCH_SIZE = int(os.environ.get("RETENTION_BATCH_SIZE", "2000"))      # lignes max par DELETE
+# Durée visée d'un lot : au-delà, le lot suivant est réduit de moitié (verrou d'écriture court)
+RETENTION_BATCH_TARGET = float(os.environ.get("RETENTION_BATCH_TARGET", "0.2"))
+RETENTION_PAUSE = float(os.environ.get("RETENTION_PAUSE", "0.05"))              # pause entre deux lots (s)
+RETENTION_MAX_DURATION = float(os.environ.get("RETENTION_MAX_DURATION", "30"))  # durée max d'une purge (s)
+# Pages rendues au système après chaque purge (0 = pas de VACUUM incrémental)
+RETENTION_VACUUM_PAGES = int(os.environ.get("RETENTION_VACUUM_PAGES", "0"))
+
+SCHEMA_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_event_horodatage ON Event (horodatage)",
+    "CREATE INDEX IF NOT EXISTS idx_agregee_resolution_bucket ON DonneeAgregee (resolution, bucket)",
+]
+
+# Sous-requête qui sélectionne un lot de lignes périmées, par cible de purge
+PURGES = {
+    "DonneeEquipement": """
+        DELETE FROM DonneeEquipement WHERE id IN (
+            SELECT id FROM DonneeEquipement
+            WHERE timestamp < ? AND id <= ?
+            LIMIT ?
+        )
+    """,
+    "Event": """
+        DELETE FROM Event WHERE id IN (
+            SELECT id FROM Event WHERE horodatage < ? LIMIT ?
+        )
+    """,
+    "DonneeAgregee": """
+        DELETE FROM DonneeAgregee WHERE (resolution, equipement_id, oid_id, indice, bucket) IN (
+            SELECT resolution, equipement_id, oid_id, indice, bucket FROM DonneeAgregee
+            WHERE resolution = ? AND bucket < ?
+            LIMIT ?
+        )
+    """,
+}
+
+
+def limite_de(jours, now=None):
+    """Horodatage (format CURRENT_TIMESTAMP) avant lequel une ligne est périmée."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return (now - datetime.timedelta(days=jours)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# --------------------------------------------------------------------
+# 🧹 Purge par petits lots
+# --------------------------------------------------------------------
+class RetentionJob:
+    """Supprime les lignes plus vieilles que leur durée de conservation.
+
+    Chaque DELETE ne touche qu'un lot de lignes et s'exécute dans sa propre
+    transaction : le verrou d'écriture est rendu entre deux lots, et la taille
+    du lot est ajustée pour rester sous batch_target secondes, bien en deçà
+    du timeout de 5 s des autres connexions. Les mesures brutes pas encore
+    agrégées (id > AgregationEtat.dernier_id) ne sont jamais purgées.
+    """
+
+    def __init__(self, connect, retention=None, batch_size=RETENTION_BATCH_SIZE, batch_target=RETENTION_BATCH_TARGET,
+                 pause=RETENTION_PAUSE, max_duration=RETENTION_MAX_DURATION, vacuum_pages=RETENTION_VACUUM_PAGES,
+                 interval=RETENTION_INTERVAL):
+        self.connect = connect
+        self.retention = dict(RETENTION if retention is None else retention)
+        self.batch_size = batch_size
+        self.batch_target = batch_target
+        self.pause = pause
+        self.max_duration = max_duration
+        self.vacuum_pages = vacuum_pages
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.stats = {
+            "runs": 0, "batches": 0, "max_batch_seconds": 0.0, "bytes_reclaimed": 0, "free_bytes": 0,
+            "rows": dict.fromkeys(("DonneeEquipement", "Event", "minute", "heure", "jour"), 0),
+        }
+
+    def _cibles(self, conn, now):
+        # (nom des statistiques, requête, paramètres avant la taille du lot)
+        cibles = []
+        jours = self.retention.get("DonneeEquipement")
+        if jours:
+            row = conn.execute("SELECT dernier_id FROM AgregationEtat WHERE nom = 'DonneeEquipement'").fetchone()
+            cibles.append(("DonneeEquipement", PURGES["DonneeEquipement"], (limite_de(jours, now), row[0] if row else 0)))
+        jours = self.retention.get("Event")
+        if jours:
+            cibles.append(("Event", PURGES["Event"], (limite_de(jours, now),)))
+        for resolution in ("minute", "heure", "jour"):
+            jours = self.retention.get(resolution)
+            if jours:
+                cibles.append((resolution, PURGES["DonneeAgregee"], (resolution, limite_de(jours, now))))
+        return cibles
+
+    def purge(self, now=None):
+        """Une passe de purge, limitée à max_duration secondes ; renvoie les lignes supprimées par cible."""
+        with self._lock:
+            conn = self.connect()
+            debut = time.monotonic()
+            purgees = {}
+            try:
+                taille = self.batch_size
+                for nom, requete, params in self._cibles(conn, now):
+                    purgees[nom] = 0
+                    while time.monotonic() - debut < self.max_duration:
+                        t0 = time.monotonic()
+                        with conn:
+                            supprimees = conn.execute(requete, params + (taille,)).rowcount
+                        duree = time.monotonic() - t0
+
+                        purgees[nom] += supprimees
+                        self.stats["rows"][nom] += supprimees
+                        self.stats["batches"] += 1
+                        self.stats["max_batch_seconds"] = round(max(self.stats["max_batch_seconds"], duree), 4)
+                        if supprimees < taille:
+                            break
+
+                        # ⏱️ Lot trop long : on réduit ; lot rapide : on revient vers batch_size
+                        if duree > self.batch_target:
+                            taille = max(100, taille // 2)
+                        elif taille < self.batch_size:
+                            taille = min(self.batch_size, taille * 2)
+                        time.sleep(self.pause)
+
+                self._vacuum(conn)
+            finally:
+                conn.close()
+            self.stats["runs"] += 1
+            return purgees
+
+    def _vacuum(self, conn):
+        if not isinstance(conn, sqlite3.Connection):
+            return  # PRAGMA propres à SQLite (PostgreSQL : autovacuum)
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        if self.vacuum_pages and conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:  # INCREMENTAL
+            avant = conn.execute("PRAGMA page_count").fetchone()[0]
+            # executescript exécute le PRAGMA jusqu'au bout (execute() ne libère qu'une page)
+            conn.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});")
+            apres = conn.execute("PRAGMA page_count").fetchone()[0]
+            self.stats["bytes_reclaimed"] += (avant - apres) * page_size
+        # Pages libérées mais encore dans le fichier (réutilisées par les prochaines insertions)
+        self.stats["free_bytes"] = conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+
+    def enable_incremental_vacuum(self):
+        """Passe la base en auto_vacuum=INCREMENTAL (un VACUUM complet, une seule fois)."""
+        conn = self.connect()
+        try:
+            if not isinstance(conn, sqlite3.Connection):
+                return  # PRAGMA propres à SQLite (PostgreSQL : autovacuum)
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                logger.info("retention", "🧹 Conversion de la base en auto_vacuum incrémental (VACUUM complet)...")
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    async def run(self):
+        """Purge périodique, exécutée hors de la boucle asyncio."""
+        loop = asyncio.get_running_loop()
+        logger.info("retention", "🧹 Conservation (jours, 0 = illimitée) : {retention}",
+                    retention=self.retention, intervalle=self.interval)
+        while True:
+            try:
+                purgees = await loop.run_in_executor(None, self.purge)
+                if any(purgees.values()):
+                    logger.info("purge", "🧹 Purge : {purgees}", purgees=purgees)
+            except Exception as e:
+                logger.error("purge", "Purge des anciennes données impossible : {erreur}", erreur=str(e))
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,230 @@
+import asyncio
+import datetime
+import os
+import threading
+
+from logs import logger
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+ROLLUP_BATCH_SIZE = int(os.environ.get("ROLLUP_BATCH_SIZE", "5000"))    # mesures brutes lues par transaction
+ROLLUP_INTERVAL = float(os.environ.get("ROLLUP_INTERVAL", "30"))        # délai entre deux rattrapages (s)
+# Nombre minimal de points qu'une série doit contenir pour qu'une résolution convienne
+ROLLUP_MIN_POINTS = int(os.environ.get("ROLLUP_MIN_POINTS", "100"))
+
+# Résolution -> (durée d'un intervalle en s, préfixe conservé de l'horodatage, complément)
+# Les horodatages sont au format 'YYYY-MM-DD HH:MM:SS' : tronquer la chaîne suffit.
+RESOLUTIONS = {
+    "minute": (60, 16, ":00"),
+    "heure": (3600, 13, ":00:00"),
+    "jour": (86400, 10, " 00:00:00"),
+}
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS DonneeAgregee (
+        resolution TEXT NOT NULL,
+        equipement_id INTEGER NOT NULL,
+        oid_id INTEGER NOT NULL,
+        indice TEXT NOT NULL DEFAULT '',
+        bucket TEXT NOT NULL,
+        minimum REAL,
+        maximum REAL,
+        somme REAL,
+        nombre INTEGER,
+        derniere REAL,
+        derniere_ts TEXT,
+        PRIMARY KEY (resolution, equipement_id, oid_id, indice, bucket)
+    ) WITHOUT ROWID
+    """,
+    # Dernier DonneeEquipement.id déjà agrégé
+    """
+    CREATE TABLE IF NOT EXISTS AgregationEtat (
+        nom TEXT PRIMARY KEY,
+        dernier_id INTEGER NOT NULL
+    )
+    """,
+]
+
+# Fusion d'un agrégat partiel avec celui déjà stocké (les colonnes non préfixées sont les anciennes valeurs)
+UPSERT = """
+    INSERT INTO DonneeAgregee (resolution, equipement_id, oid_id, indice, bucket,
+                               minimum, maximum, somme, nombre, derniere, derniere_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (resolution, equipement_id, oid_id, indice, bucket) DO UPDATE SET
+        minimum = MIN(minimum, excluded.minimum),
+        maximum = MAX(maximum, excluded.maximum),
+        somme = somme + excluded.somme,
+        nombre = nombre + excluded.nombre,
+        derniere = CASE WHEN excluded.derniere_ts >= derniere_ts THEN excluded.derniere ELSE derniere END,
+        derniere_ts = MAX(derniere_ts, excluded.derniere_ts)
+"""
+
+# Même fusion pour PostgreSQL (LEAST / GREATEST, colonnes existantes qualifiées)
+UPSERT_POSTGRES = """
+    INSERT INTO DonneeAgregee (resolution, equipement_id, oid_id, indice, bucket,
+                               minimum, maximum, somme, nombre, derniere, derniere_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (resolution, equipement_id, oid_id, indice, bucket) DO UPDATE SET
+        minimum = LEAST(DonneeAgregee.minimum, excluded.minimum),
+        maximum = GREATEST(DonneeAgregee.maximum, excluded.maximum),
+        somme = DonneeAgregee.somme + excluded.somme,
+        nombre = DonneeAgregee.nombre + excluded.nombre,
+        derniere = CASE WHEN excluded.derniere_ts >= DonneeAgregee.derniere_ts
+                        THEN excluded.derniere ELSE DonneeAgregee.derniere END,
+        derniere_ts = GREATEST(DonneeAgregee.derniere_ts, excluded.derniere_ts)
+"""
+
+
+def bucket_de(timestamp, resolution):
+    """Début de l'intervalle de ``resolution`` contenant ``timestamp``."""
+    _, longueur, complement = RESOLUTIONS[resolution]
+    return timestamp[:longueur] + complement
+
+
+def choisir_resolution(debut, fin, min_points=ROLLUP_MIN_POINTS):
+    """Résolution la plus grossière qui donne encore au moins ``min_points`` points sur [debut, fin]."""
+    duree = (fin - debut).total_seconds()
+    for resolution, (secondes, _, _) in sorted(RESOLUTIONS.items(), key=lambda item: -item[1][0]):
+        if duree / secondes >= min_points:
+            return resolution
+    return min(RESOLUTIONS, key=lambda resolution: RESOLUTIONS[resolution][0])
+
+
+# --------------------------------------------------------------------
+# 📉 Agrégation incrémentale des mesures
+# --------------------------------------------------------------------
+class RollupJob:
+    """Tient à jour min/max/moyenne/nombre/dernière valeur par intervalle.
+
+    catch_up() ne lit que les mesures insérées depuis le dernier passage
+    (DonneeEquipement.id > AgregationEtat.dernier_id), par lots de
+    batch_size lignes ; chaque lot et le nouveau curseur sont écrits dans
+    la même transaction, donc une mesure n'est jamais comptée deux fois.
+    """
+
+    def __init__(self, connect, batch_size=ROLLUP_BATCH_SIZE, interval=ROLLUP_INTERVAL, dialect="sqlite"):
+        self.connect = connect
+        self.upsert = UPSERT_POSTGRES if dialect == "postgres" else UPSERT
+        self.batch_size = batch_size
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(("rows", "skipped", "batches", "buckets", "runs"), 0)
+
+    @staticmethod
+    def _aggregate(rows):
+        buckets = {}
+        skipped = 0
+        for equipement_id, oid_id, indice, valeur, timestamp in rows:
+            try:
+                valeur = float(valeur)
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            for resolution in RESOLUTIONS:
+                key = (resolution, equipement_id, oid_id, indice or "", bucket_de(timestamp, resolution))
+                agg = buckets.get(key)
+                if agg is None:
+                    buckets[key] = [valeur, valeur, valeur, 1, valeur, timestamp]
+                    continue
+                agg[0] = min(agg[0], valeur)
+                agg[1] = max(agg[1], valeur)
+                agg[2] += valeur
+                agg[3] += 1
+                if timestamp >= agg[5]:
+                    agg[4], agg[5] = valeur, timestamp
+        return [key + tuple(agg) for key, agg in buckets.items()], skipped
+
+    def catch_up(self, max_batches=None):
+        """Agrège les nouvelles mesures ; renvoie le nombre de lignes brutes traitées."""
+        with self._lock:
+            conn = self.connect()
+            total = 0
+            batches = 0
+            try:
+                row = conn.execute("SELECT dernier_id FROM AgregationEtat WHERE nom = 'DonneeEquipement'").fetchone()
+                dernier_id = row[0] if row else 0
+
+                while max_batches is None or batches < max_batches:
+                    rows = conn.execute("""
+                        SELECT id, equipement_id, oid_id, indice, valeur, timestamp
+                        FROM DonneeEquipement
+                        WHERE id > ? AND timestamp IS NOT NULL
+                        ORDER BY id
+                        LIMIT ?
+                    """, (dernier_id, self.batch_size)).fetchall()
+                    if not rows:
+                        break
+
+                    agregats, skipped = self._aggregate(tuple(r)[1:] for r in rows)
+                    dernier_id = rows[-1][0]
+                    with conn:  # 🧾 agrégats et curseur dans la même transaction
+                        conn.executemany(self.upsert, agregats)
+                        conn.execute("""
+                            INSERT INTO AgregationEtat (nom, dernier_id) VALUES ('DonneeEquipement', ?)
+                            ON CONFLICT (nom) DO UPDATE SET dernier_id = excluded.dernier_id
+                        """, (dernier_id,))
+
+                    total += len(rows)
+                    batches += 1
+                    self.stats["rows"] += len(rows)
+                    self.stats["skipped"] += skipped
+                    self.stats["buckets"] += len(agregats)
+                    self.stats["batches"] += 1
+                    if len(rows) < self.batch_size:
+                        break
+            finally:
+                conn.close()
+            self.stats["runs"] += 1
+            return total
+
+    def serie(self, equipement_id, oid_id, debut, fin, indice=None, resolution=None, min_points=ROLLUP_MIN_POINTS):
+        """Série agrégée d'un OID sur [debut, fin] (datetime UTC naïfs).
+
+        Sans ``resolution`` imposée, on lit la plus grossière qui fournit
+        au moins ``min_points`` points, pour parcourir le moins de lignes.
+        """
+        resolution = resolution or choisir_resolution(debut, fin, min_points)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Résolution inconnue : {resolution}")
+
+        conn = self.connect()
+        try:
+            rows = conn.execute("""
+                SELECT bucket, minimum, maximum, somme / nombre AS moyenne, nombre, derniere
+                FROM DonneeAgregee
+                WHERE resolution = ? AND equipement_id = ? AND oid_id = ? AND indice = ?
+                  AND bucket >= ? AND bucket <= ?
+                ORDER BY bucket
+            """, (resolution, equipement_id, oid_id, indice or "",
+                  bucket_de(debut.strftime("%Y-%m-%d %H:%M:%S"), resolution),
+                  fin.strftime("%Y-%m-%d %H:%M:%S"))).fetchall()
+        finally:
+            conn.close()
+
+        return {
+            "resolution": resolution,
+            "points": [
+                {"bucket": r[0], "min": r[1], "max": r[2], "avg": r[3], "count": r[4], "last": r[5]}
+                for r in rows
+            ],
+        }
+
+    async def run(self):
+        """Rattrapage périodique, exécuté hors de la boucle asyncio."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.catch_up)
+            except Exception as e:
+                logger.error("agregation", "Agrégation des mesures impossible : {erreur}", erreur=str(e))
+            await asyncio.sleep(self.interval)
+
+
+def parse_horodatage(valeur, defaut):
+    """Lit 'YYYY-MM-DD HH:MM[:SS]' (ou le format datetime-local) ; ``defaut`` si vide."""
+    if not valeur:
+        return defaut
+    return datetime.datetime.fromisoformat(valeur.replace("T", " "))
@@ -0,0 +1,252 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from collections import deque
+
+from logs import logger
+from metrics import POLL_LAG, POLL_LAG_RATIO
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+# Relecture de la table Equipement même sans notification (s)
+SCHEDULER_RECONCILE_INTERVAL = float(os.environ.get("SCHEDULER_RECONCILE_INTERVAL", "30"))
+# Étalement maximal du premier passage d'un équipement (s)
+SCHEDULER_MAX_JITTER = float(os.environ.get("SCHEDULER_MAX_JITTER", "10"))
+# Les OID d'un équipement dus à moins de SCHEDULER_TICK secondes d'écart partent ensemble
+SCHEDULER_TICK = float(os.environ.get("SCHEDULER_TICK", "1"))
+# Nombre de retards conservés pour les statistiques
+SCHEDULER_LAG_WINDOW = int(os.environ.get("SCHEDULER_LAG_WINDOW", "1000"))
+INTERVALLE_DEFAUT = 60
+
+
+def intervalle_de(valeur):
+    try:
+        return max(1.0, float(valeur or INTERVALLE_DEFAUT))
+    except (TypeError, ValueError):
+        return float(INTERVALLE_DEFAUT)
+
+
+class PollJob:
+    """Échéances des OID d'un équipement ; l'échéance du job est la plus proche."""
+    __slots__ = ("equipement", "oid_due", "oid_intervalle", "due", "generation", "task", "lag")
+
+    def __init__(self, equipement):
+        self.equipement = equipement
+        self.oid_due = {}          # oid_id -> prochaine échéance
+        self.oid_intervalle = {}   # oid_id -> intervalle effectif (s)
+        self.due = None
+        self.generation = 0
+        self.task = None
+        self.lag = None            # retard du dernier passage (s)
+
+
+# --------------------------------------------------------------------
+# 🗓️ Ordonnanceur des collectes
+# --------------------------------------------------------------------
+def resume_lags(lags, overruns, per_equipement):
+    """Forme commune de lag_snapshot() (ordonnanceur local ou workers réunis)."""
+    lags = sorted(lags)
+
+    def quantile(q):
+        return round(lags[min(len(lags) - 1, int(q * len(lags)))], 3) if lags else None
+
+    return {
+        "count": len(lags),
+        "avg": round(sum(lags) / len(lags), 3) if lags else None,
+        "p50": quantile(0.5),
+        "p95": quantile(0.95),
+        "max": round(lags[-1], 3) if lags else None,
+        "overruns": overruns,
+        "per_equipement": {eq_id: None if lag is None else round(lag, 3) for eq_id, lag in per_equipement.items()},
+    }
+
+
+class PollScheduler:
+    """Tas de prochaines échéances, un job par équipement.
+
+    Chaque OID a son propre intervalle (OID.intervalle, sinon celui de
+    l'équipement) ; à chaque échéance, tous les OID dus de l'équipement
+    partent dans une seule requête groupée. Le retard de chaque passage
+    sur son échéance est mesuré (lag_snapshot()) pour repérer un poller
+    saturé.
+
+    La liste des équipements est relue périodiquement, ou tout de suite
+    après notify() : ajouts planifiés (avec un décalage aléatoire pour ne
+    pas tous partir en même temps), modifications replanifiées,
+    suppressions annulées, sans redémarrer le processus.
+    """
+
+    def __init__(self, load_equipements, poll, reconcile_interval=SCHEDULER_RECONCILE_INTERVAL,
+                 max_jitter=SCHEDULER_MAX_JITTER, tick=SCHEDULER_TICK):
+        # load_equipements : fonction bloquante → [{id, nom, ip, community, intervalle, oids: {oid_id: intervalle}}]
+        self.load_equipements = load_equipements
+        self.poll = poll                           # coroutine poll(equipement, oid_ids) : une collecte
+        self.reconcile_interval = reconcile_interval
+        self.max_jitter = max_jitter
+        self.tick = tick
+        self._jobs = {}
+        self._heap = []     # (échéance, n°, equipement_id, génération)
+        self._seq = itertools.count()
+        self._loop = None
+        self._wakeup = None
+        self._reconcile_now = True
+        self._lags = deque(maxlen=SCHEDULER_LAG_WINDOW)
+        self.stats = dict.fromkeys(("polls", "overruns", "added", "updated", "removed", "reconciles"), 0)
+
+    # ---------------- Notifications (thread-safe) ----------------
+    def notify(self):
+        """Demande une relecture immédiate des équipements et de leurs OID."""
+        self._reconcile_now = True
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ---------------- Gestion des jobs ----------------
+    def _reschedule(self, job):
+        job.generation += 1
+        job.due = min(job.oid_due.values()) if job.oid_due else None
+        if job.due is not None:
+            heapq.heappush(self._heap, (job.due, next(self._seq), job.equipement["id"], job.generation))
+
+    def _jitter(self, intervalle):
+        return random.uniform(0, min(intervalle, self.max_jitter))
+
+    def _sync_oids(self, job, oids, now):
+        changed = False
+        for oid_id, valeur in oids.items():
+            intervalle = intervalle_de(valeur)
+            ancien = job.oid_intervalle.get(oid_id)
+            if ancien == intervalle:
+                continue
+            job.oid_intervalle[oid_id] = intervalle
+            debut = now + self._jitter(intervalle)
+            # Nouvel OID ou nouvelle cadence : prochaine collecte au plus tard dans un intervalle
+            job.oid_due[oid_id] = debut if ancien is None else min(job.oid_due[oid_id], debut)
+            changed = True
+
+        for oid_id in [oid_id for oid_id in job.oid_intervalle if oid_id not in oids]:
+            del job.oid_intervalle[oid_id]
+            del job.oid_due[oid_id]
+            changed = True
+        return changed
+
+    def apply(self, equipements, now=None):
+        """Aligne les jobs sur la liste d'équipements fournie."""
+        now = time.monotonic() if now is None else now
+        seen = set()
+
+        for equipement in equipements:
+            equipement = dict(equipement)
+            oids = equipement.pop("oids", {})
+            eq_id = equipement["id"]
+            seen.add(eq_id)
+            job = self._jobs.get(eq_id)
+
+            if job is None:
+                job = self._jobs[eq_id] = PollJob(equipement)
+                self._sync_oids(job, oids, now)
+                self._reschedule(job)
+                self.stats["added"] += 1
+                continue
+
+            updated = job.equipement != equipement
+            job.equipement = equipement
+            if self._sync_oids(job, oids, now):
+                self._reschedule(job)
+                updated = True
+            if updated:
+                self.stats["updated"] += 1
+
+        for eq_id in [eq_id for eq_id in self._jobs if eq_id not in seen]:
+            job = self._jobs.pop(eq_id)
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+            self.stats["removed"] += 1
+
+    async def reconcile(self):
+        loop = asyncio.get_running_loop()
+        try:
+            equipements = await loop.run_in_executor(None, self.load_equipements)
+        except Exception as e:
+            logger.error("reconciliation", "Relecture des équipements impossible : {erreur}", erreur=str(e))
+            return
+        self.apply(equipements)
+        self.stats["reconciles"] += 1
+
+    def _on_done(self, job, task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("collecte", "Erreur sur {equipement} : {erreur}", equipement=job.equipement["nom"],
+                         equipement_id=job.equipement["id"], erreur=str(task.exception()))
+
+    def _start(self, job, now):
+        # Tous les OID dus d'ici un tick partent dans la même requête
+        dus = [oid_id for oid_id, due in job.oid_due.items() if due <= now + self.tick]
+        job.lag = max(0.0, now - job.due)
+
+        if job.task is not None and not job.task.done():
+            # Collecte précédente encore en cours : on saute ce tour
+            self.stats["overruns"] += 1
+        else:
+            self._lags.append(job.lag)
+            POLL_LAG.observe(job.lag)
+            if dus:
+                POLL_LAG_RATIO.observe(job.lag / min(job.oid_intervalle[oid_id] for oid_id in dus))
+            job.task = asyncio.create_task(self.poll(job.equipement, dus))
+            job.task.add_done_callback(lambda task, job=job: self._on_done(job, task))
+            self.stats["polls"] += 1
+
+        for oid_id in dus:
+            intervalle = job.oid_intervalle[oid_id]
+            # On garde la cadence, sauf si on a pris plus d'un intervalle de retard
+            due = job.oid_due[oid_id] + intervalle
+            job.oid_due[oid_id] = due if due > now else now + intervalle
+        self._reschedule(job)
+
+    def recent_lags(self):
+        """Derniers retards mesurés (SCHEDULER_LAG_WINDOW au plus) et retard courant de chaque équipement."""
+        return list(self._lags), {eq_id: job.lag for eq_id, job in self._jobs.items()}
+
+    def lag_snapshot(self):
+        """Retard des collectes sur leur échéance (s) : global et par équipement."""
+        lags, per_equipement = self.recent_lags()
+        return resume_lags(lags, self.stats["overruns"], per_equipement)
+
+    # ---------------- Boucle principale ----------------
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        next_reconcile = 0.0
+
+        try:
+            while True:
+                now = time.monotonic()
+                if self._reconcile_now or now >= next_reconcile:
+                    self._reconcile_now = False
+                    await self.reconcile()
+                    next_reconcile = time.monotonic() + self.reconcile_interval
+
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, eq_id, generation = heapq.heappop(self._heap)
+                    job = self._jobs.get(eq_id)
+                    if job is None or job.generation != generation:
+                        continue  # entrée périmée (job supprimé ou replanifié)
+                    self._start(job, now)
+
+                delay = next_reconcile - now
+                if self._heap:
+                    delay = min(delay, self._heap[0][0] - now)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, delay))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for job in self._jobs.values():
+                if job.task is not None and not job.task.done():
+                    job.task.cancel()
+            self._loop = None
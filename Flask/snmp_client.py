@@ -0,0 +1,311 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pysnmp.hlapi import getCmd, bulkCmd # type: ignore
+from pysnmp.proto.rfc1902 import IpAddress # type: ignore
+from pysnmp.proto.rfc1905 import EndOfMibView, NoSuchInstance, NoSuchObject # type: ignore
+from pyasn1.type.univ import Integer, ObjectIdentifier, OctetString # type: ignore
+
+from snmp_engine import registry
+from health import health, BREAKER_SENTINEL_OID
+from metrics import SNMP_RTT, SNMP_TIMEOUTS
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+# Nombre maximal de requêtes SNMP en vol en même temps (taille du pool de threads)
+SNMP_MAX_CONCURRENCY = int(os.environ.get("SNMP_MAX_CONCURRENCY", "32"))
+# Nombre maximal de varbinds par PDU GET (réduit automatiquement sur tooBig)
+SNMP_MAX_VARBINDS = int(os.environ.get("SNMP_MAX_VARBINDS", "40"))
+# Valeur par défaut de max-repetitions pour les parcours GETBULK
+SNMP_MAX_REPETITIONS = int(os.environ.get("SNMP_MAX_REPETITIONS", "25"))
+SNMP_PORT = 161
+TOO_BIG = 1  # errorStatus tooBig (RFC 3416)
+
+_executor = None
+_max_varbinds = {}  # (hôte, port) -> taille de paquet apprise après un tooBig
+
+
+def parse_target(ip):
+    """Découpe "hôte" ou "hôte:port" en (hôte, port)."""
+    if ip.count(":") == 1:
+        host, port = ip.split(":")
+        return host, int(port)
+    return ip, SNMP_PORT
+
+
+# --------------------------------------------------------------------
+# 🔢 Décodage typé des valeurs
+# --------------------------------------------------------------------
+# Valeurs d'exception SNMPv2 (RFC 3416) : l'OID n'a pas de valeur, l'agent répond quand même
+EXCEPTIONS_SNMP = {NoSuchObject: "noSuchObject", NoSuchInstance: "noSuchInstance", EndOfMibView: "endOfMibView"}
+
+# OID.typeValeur est une saisie libre : comparé en majuscules, sans espaces
+TYPES_TEXTE = {"STRING", "OCTETSTRING", "DISPLAYSTRING", "IPADDRESS", "OID", "OBJECTIDENTIFIER"}
+
+
+def decode_value(value):
+    """Valeur Python d'un objet pyasn1 reçu dans un varbind (int, str), sans prettyPrint."""
+    if isinstance(value, Integer):  # Integer32, Counter32/64, Gauge32, TimeTicks, Unsigned32
+        return int(value)
+    if isinstance(value, IpAddress):
+        return ".".join(str(b) for b in value.asNumbers())
+    if isinstance(value, OctetString):
+        return value.asOctets().decode("utf-8", "replace")
+    if isinstance(value, ObjectIdentifier):
+        return ".".join(str(x) for x in value)
+    return value.prettyPrint()
+
+
+def _format_varbind(varBind):
+    """{"status", "info", "value", "type"} d'un varbind ; DOWN pour les valeurs d'exception."""
+    value = varBind[1]
+    exception = EXCEPTIONS_SNMP.get(type(value))
+    if exception:
+        return {"status": "DOWN", "info": exception, "value": None, "type": None}
+    decoded = decode_value(value)
+    return {"status": "UP", "info": str(decoded), "value": decoded, "type": type(value).__name__}
+
+
+def est_texte(type_valeur):
+    """Vrai si OID.typeValeur déclare une valeur texte (jamais stockée en nombre)."""
+    return (type_valeur or "").upper().replace(" ", "") in TYPES_TEXTE
+
+
+def valeur_numerique(valeur, type_valeur=None):
+    """Nombre à stocker pour une valeur décodée, selon OID.typeValeur.
+
+    Lève ValueError pour un OID déclaré texte ou une chaîne qui n'est pas
+    un nombre. Un type inconnu ou mal saisi suit le type reçu de l'agent.
+    """
+    if est_texte(type_valeur):
+        raise ValueError(f"OID de type {type_valeur} : valeur texte non stockée")
+    if isinstance(valeur, int):
+        return float(valeur)
+    try:
+        # Certains agents publient des nombres en OctetString (ex : UCD laLoad "0.15")
+        return float(str(valeur).strip())
+    except ValueError:
+        raise ValueError(f"Valeur non numérique : {valeur!r}") from None
+
+
+# --------------------------------------------------------------------
+# 📡 Requête SNMP (bloquante)
+# --------------------------------------------------------------------
+def _circuit_ouvert(target, oids):
+    # "circuit" : échec immédiat, sans requête réseau (la collecte ne le journalise pas)
+    info = health.describe(target)
+    return [{"status": "DOWN", "info": info, "value": None, "type": None, "circuit": True} for _ in oids]
+
+
+def _sonder(slot, host, port, community):
+    """Un GET de l'OID sentinelle, sans renvoi : toute réponse de l'agent referme le circuit."""
+    timeout, _ = health.timeout((host, port))
+    start = time.monotonic()
+    try:
+        errorIndication, _, _, _ = next(getCmd(
+            slot.engine, slot.community(community), slot.transport(host, port, timeout=timeout, retries=0),
+            slot.context, slot.object_type(BREAKER_SENTINEL_OID)))
+    except Exception:
+        errorIndication = True
+    if errorIndication:
+        health.record_failure((host, port))
+        SNMP_TIMEOUTS.inc(target=f"{host}:{port}")
+        return False
+    rtt = time.monotonic() - start
+    health.record_success((host, port), rtt, timeout)
+    SNMP_RTT.observe(rtt, target=f"{host}:{port}")
+    return True
+
+
+def get_snmp_values(ip, community, oids):
+    """Lit plusieurs OID d'un même équipement en un minimum de PDU GET.
+
+    Les OID sont regroupés par paquets de SNMP_MAX_VARBINDS varbinds ; si
+    l'agent répond tooBig, le paquet est coupé en deux et la taille retenue
+    pour cette cible. Renvoie une liste de {"status", "info", "value", "type"}
+    dans l'ordre de ``oids`` ("value" : valeur décodée, voir decode_value ;
+    "type" : classe pyasn1 reçue, ex. "Counter32").
+
+    Délai d'attente adapté au RTT de la cible ; une cible en échec répété
+    n'est plus interrogée que par une sonde espacée (voir health.py).
+    """
+    if not oids:
+        return []
+
+    try:
+        host, port = parse_target(ip)
+    except Exception as e:
+        return [{"status": "DOWN", "info": str(e)} for _ in oids]
+
+    target = (host, port)
+    circuit = health.allow(target)
+    if circuit == "open":
+        return _circuit_ouvert(target, oids)
+
+    size = _max_varbinds.get(target, SNMP_MAX_VARBINDS)
+    pending = [oids[i:i + size] for i in range(0, len(oids), size)]
+    results = []
+
+    # ♻️ Moteur, community, cible et OID réutilisés d'un appel à l'autre
+    with registry.engine() as slot:
+        # 🩺 Circuit ouvert et sonde due : un seul OID avant de relancer la collecte complète
+        if circuit == "probe" and not _sonder(slot, host, port, community):
+            return _circuit_ouvert(target, oids)
+
+        while pending:
+            chunk = pending.pop(0)
+            timeout, retries = health.timeout(target)
+            start = time.monotonic()
+            try:
+                iterator = getCmd(
+                    slot.engine,
+                    slot.community(community),
+                    slot.transport(host, port, timeout=timeout, retries=retries),
+                    slot.context,
+                    *[slot.object_type(oid) for oid in chunk]
+                )
+                errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
+            except Exception as e:
+                results.extend({"status": "DOWN", "info": str(e)} for _ in chunk)
+                continue
+
+            if errorIndication:
+                health.record_failure(target)
+                SNMP_TIMEOUTS.inc(target=f"{host}:{port}")
+            else:
+                rtt = time.monotonic() - start
+                health.record_success(target, rtt, timeout)
+                SNMP_RTT.observe(rtt, target=f"{host}:{port}")
+
+            if errorIndication:
+                # ⛔ Équipement injoignable : inutile d'attendre un timeout par paquet
+                info = str(errorIndication)
+                results.extend({"status": "DOWN", "info": info} for _ in chunk)
+                for rest in pending:
+                    results.extend({"status": "DOWN", "info": info} for _ in rest)
+                break
+            elif errorStatus and int(errorStatus) == TOO_BIG and len(chunk) > 1:
+                # ✂️ Réponse trop grande : on coupe en deux et on retient la taille
+                half = len(chunk) // 2
+                _max_varbinds[target] = half
+                pending[:0] = [chunk[:half], chunk[half:]]
+            elif errorStatus:
+                info = str(errorStatus.prettyPrint())
+                results.extend({"status": "DOWN", "info": info} for _ in chunk)
+            else:
+                results.extend(_format_varbind(varBind) for varBind in varBinds)
+
+    return results
+
+
+def check_snmp_device(ip, community, oid):
+    return get_snmp_values(ip, community, [oid])[0]
+
+
+def walk_snmp_table(ip, community, oid, max_repetitions=SNMP_MAX_REPETITIONS):
+    """Parcourt tout le sous-arbre ``oid`` par GETBULK.
+
+    Renvoie {"status", "info", "rows"} où rows est une liste de
+    (suffixe d'index, {"status", "info"}) : "3" pour ifInOctets.3, etc.
+    """
+    try:
+        host, port = parse_target(ip)
+        base = tuple(int(x) for x in oid.strip(".").split("."))
+        rows = []
+
+        target = (host, port)
+        circuit = health.allow(target)
+        if circuit == "open":
+            return dict(_circuit_ouvert(target, [oid])[0], rows=rows)
+
+        with registry.engine() as slot:
+            if circuit == "probe" and not _sonder(slot, host, port, community):
+                return dict(_circuit_ouvert(target, [oid])[0], rows=rows)
+
+            timeout, retries = health.timeout(target)
+            iterator = bulkCmd(
+                slot.engine,
+                slot.community(community),
+                slot.transport(host, port, timeout=timeout, retries=retries),
+                slot.context,
+                0, max(1, int(max_repetitions)),
+                slot.object_type(oid),
+                lexicographicMode=False  # 🛑 on s'arrête à la fin du sous-arbre
+            )
+
+            start = time.monotonic()
+            for errorIndication, errorStatus, errorIndex, varBinds in iterator:
+                if errorIndication:
+                    health.record_failure(target)
+                    SNMP_TIMEOUTS.inc(target=f"{host}:{port}")
+                    return {"status": "DOWN", "info": str(errorIndication), "rows": rows}
+                # RTT d'une page GETBULK : de la demande (fin de la page précédente) à la réponse
+                rtt = time.monotonic() - start
+                health.record_success(target, rtt, timeout)
+                SNMP_RTT.observe(rtt, target=f"{host}:{port}")
+                if errorStatus:
+                    return {"status": "DOWN", "info": str(errorStatus.prettyPrint()), "rows": rows}
+
+                for varBind in varBinds:
+                    # Fin du sous-arbre : pysnmp renvoie la dernière ligne marquée endOfMibView
+                    if type(varBind[1]) in EXCEPTIONS_SNMP:
+                        continue
+                    name = tuple(varBind[0])
+                    suffix = ".".join(str(x) for x in name[len(base):])
+                    rows.append((suffix, _format_varbind(varBind)))
+                start = time.monotonic()
+
+        if not rows:
+            return {"status": "DOWN", "info": f"Aucune ligne sous {oid}", "rows": rows}
+        return {"status": "UP", "info": f"{len(rows)} lignes", "rows": rows}
+
+    except Exception as e:
+        return {"status": "DOWN", "info": str(e), "rows": []}
+
+
+# --------------------------------------------------------------------
+# ⚡ Adaptateur asyncio
+# --------------------------------------------------------------------
+# Le hlapi asyncio de pysnmp 4.4.12 repose sur @asyncio.coroutine, supprimé
+# en Python 3.11 : on exécute donc le getCmd synchrone dans un pool de threads
+# borné. La boucle asyncio reste libre pendant qu'un équipement attend son
+# timeout, et seul cet équipement paie le délai.
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=SNMP_MAX_CONCURRENCY, thread_name_prefix="snmp")
+    return _executor
+
+
+async def check_snmp_device_async(ip, community, oid):
+    """Version non bloquante de check_snmp_device (même format de retour)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), check_snmp_device, ip, community, oid)
+
+
+async def get_snmp_values_async(ip, community, oids):
+    """Version non bloquante de get_snmp_values."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), get_snmp_values, ip, community, oids)
+
+
+async def walk_snmp_table_async(ip, community, oid, max_repetitions=SNMP_MAX_REPETITIONS):
+    """Version non bloquante de walk_snmp_table."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), walk_snmp_table, ip, community, oid, max_repetitions)
+
+
+def shutdown_snmp_executor():
+    """Arrête le pool (appelé à l'arrêt) : requêtes en file annulées, celles en cours terminées.
+
+    Les requêtes en cours sont bornées par leur délai d'attente ; fermer leur
+    moteur sous elles laisserait leur thread tourner à vide sans fin.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+    registry.close()
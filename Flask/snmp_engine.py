@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pysnmp.hlapi import SnmpEngine, CommunityData, UdpTransportTarget, ContextData, ObjectType, ObjectIdentity # type: ignore
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+# Durée (s) au-delà de laquelle un moteur, une cible ou un OID inutilisé est libéré
+SNMP_ENGINE_IDLE_TTL = float(os.environ.get("SNMP_ENGINE_IDLE_TTL", "600"))
+
+
+# --------------------------------------------------------------------
+# 🔧 Moteur SNMP d'un thread
+# --------------------------------------------------------------------
+class EngineSlot:
+    """Un SnmpEngine et ses objets résolus, utilisés par un seul thread à la fois.
+
+    SnmpEngine n'est pas thread-safe : chaque thread du pool SNMP garde le sien
+    et le réutilise d'une requête à l'autre (MIB chargées, socket UDP ouverte).
+    """
+
+    def __init__(self):
+        self.engine = SnmpEngine()
+        self.context = ContextData()
+        self.busy = False
+        self.last_used = time.monotonic()
+        self._communities = {}   # community -> CommunityData
+        self._targets = {}       # (hôte, port, timeout, retries) -> [UdpTransportTarget, dernier usage]
+        self._objects = {}       # oid -> [ObjectType résolu, dernier usage]
+        self.stats = dict.fromkeys(
+            ("target_hits", "target_misses", "oid_hits", "oid_misses", "target_evictions", "oid_evictions"), 0)
+
+    def community(self, community):
+        auth = self._communities.get(community)
+        if auth is None:
+            auth = self._communities[community] = CommunityData(community, mpModel=1)  # SNMPv2c
+        return auth
+
+    def transport(self, host, port, timeout, retries):
+        key = (host, port, timeout, retries)
+        entry = self._targets.get(key)
+        if entry is None:
+            self.stats["target_misses"] += 1
+            entry = self._targets[key] = [UdpTransportTarget((host, port), timeout=timeout, retries=retries), 0]
+        else:
+            self.stats["target_hits"] += 1
+        entry[1] = time.monotonic()
+        return entry[0]
+
+    def object_type(self, oid):
+        # Un ObjectType déjà résolu n'est plus repassé dans le MibViewController
+        entry = self._objects.get(oid)
+        if entry is None:
+            self.stats["oid_misses"] += 1
+            entry = self._objects[oid] = [ObjectType(ObjectIdentity(oid)), 0]
+        else:
+            self.stats["oid_hits"] += 1
+        entry[1] = time.monotonic()
+        return entry[0]
+
+    def evict_idle(self, ttl, now):
+        for cache, counter in ((self._targets, "target_evictions"), (self._objects, "oid_evictions")):
+            for key in [k for k, (_, used) in cache.items() if now - used > ttl]:
+                del cache[key]
+                self.stats[counter] += 1
+
+    def close(self):
+        dispatcher = self.engine.transportDispatcher
+        if dispatcher is not None:
+            dispatcher.closeDispatcher()
+
+
+# --------------------------------------------------------------------
+# 🗂️ Registre global des moteurs
+# --------------------------------------------------------------------
+class EngineRegistry:
+    def __init__(self, idle_ttl=SNMP_ENGINE_IDLE_TTL):
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._slots = {}   # ident du thread -> EngineSlot
+        self._retired = {}  # compteurs des moteurs déjà libérés
+        self.stats = dict.fromkeys(("engine_hits", "engine_misses", "engine_evictions"), 0)
+        self._last_sweep = time.monotonic()
+
+    @contextmanager
+    def engine(self):
+        """Fournit le EngineSlot du thread courant (créé au premier usage)."""
+        ident = threading.get_ident()
+        with self._lock:
+            slot = self._slots.get(ident)
+            if slot is None:
+                self.stats["engine_misses"] += 1
+            else:
+                self.stats["engine_hits"] += 1
+                slot.busy = True
+        if slot is None:
+            # Construction hors verrou : chargement des MIB coûteux
+            slot = EngineSlot()
+            slot.busy = True
+            with self._lock:
+                self._slots[ident] = slot
+        try:
+            yield slot
+        finally:
+            now = time.monotonic()
+            slot.last_used = now
+            slot.evict_idle(self.idle_ttl, now)
+            slot.busy = False
+            if now - self._last_sweep > self.idle_ttl:
+                self.evict_idle(now)
+
+    def evict_idle(self, now=None):
+        """Ferme les moteurs inutilisés depuis plus de idle_ttl (threads terminés, pool réduit)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._last_sweep = now
+            idle = [ident for ident, slot in self._slots.items()
+                    if not slot.busy and now - slot.last_used > self.idle_ttl]
+            slots = [self._slots.pop(ident) for ident in idle]
+            self.stats["engine_evictions"] += len(slots)
+            for slot in slots:
+                for key, value in slot.stats.items():
+                    self._retired[key] = self._retired.get(key, 0) + value
+        for slot in slots:
+            slot.close()
+        return len(slots)
+
+    def close(self):
+        with self._lock:
+            slots = list(self._slots.values())
+            self._slots.clear()
+        for slot in slots:
+            slot.close()
+
+    def snapshot(self):
+        """Compteurs de réutilisation et taux de succès du cache."""
+        with self._lock:
+            totals = dict(self.stats)
+            for key, value in self._retired.items():
+                totals[key] = totals.get(key, 0) + value
+            for slot in self._slots.values():
+                for key, value in slot.stats.items():
+                    totals[key] = totals.get(key, 0) + value
+            totals["engines"] = len(self._slots)
+
+        for name in ("engine", "target", "oid"):
+            hits = totals.get(f"{name}_hits", 0)
+            total = hits + totals.get(f"{name}_misses", 0)
+            totals[f"{name}_hit_rate"] = round(hits / total, 4) if total else None
+        return totals
+
+
+registry = EngineRegistry()
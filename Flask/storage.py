@@ -0,0 +1,345 @@
+import io
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+
+from db import pool as sqlite_pool
+from ingest import STATEMENTS
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "sqlite")    # sqlite ou postgres
+PG_DSN = os.environ.get("PG_DSN", "dbname=supervision")
+PG_POOL_MIN = int(os.environ.get("PG_POOL_MIN", "1"))
+PG_POOL_MAX = int(os.environ.get("PG_POOL_MAX", "16"))
+PG_POOL_TIMEOUT = float(os.environ.get("PG_POOL_TIMEOUT", "30"))   # attente max d'une connexion libre (s)
+
+# Colonnes chargées par COPY, dans l'ordre des paramètres de ingest.STATEMENTS
+COPY_TARGETS = {
+    "sample": ("DonneeEquipement", ("equipement_id", "oid_id", "valeur", "indice", "timestamp")),
+    "event": ("Event", ("oid_id", "equipement_id", "type_alerte", "valeur_actuelle", "seuil_declencheur",
+                        "message", "niveau", "horodatage", "indice")),
+}
+
+# Horodatages stockés en texte UTC 'YYYY-MM-DD HH:MM:SS', comme CURRENT_TIMESTAMP sous SQLite :
+# les comparaisons et troncatures par chaîne restent valables sur les deux moteurs.
+NOW_TEXT = "to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')"
+
+SCHEMA_POSTGRES = [
+    """CREATE TABLE IF NOT EXISTS Utilisateur (
+        id SERIAL PRIMARY KEY, nom TEXT NOT NULL, prenom TEXT NOT NULL, email TEXT NOT NULL UNIQUE,
+        mot_de_passe TEXT NOT NULL, date_creation TEXT DEFAULT {now}, is_admin INTEGER DEFAULT 0)""",
+    """CREATE TABLE IF NOT EXISTS Equipement (
+        id SERIAL PRIMARY KEY, nom TEXT NOT NULL, ip TEXT NOT NULL UNIQUE, type TEXT,
+        community TEXT DEFAULT 'public', intervalle INTEGER DEFAULT 60)""",
+    """CREATE TABLE IF NOT EXISTS OID (
+        id SERIAL PRIMARY KEY, identifiant TEXT NOT NULL, nomParametre TEXT NOT NULL, typeValeur TEXT NOT NULL,
+        equipement_id INTEGER NOT NULL REFERENCES Equipement (id) ON DELETE CASCADE,
+        seuilMax DOUBLE PRECISION, seuilMin DOUBLE PRECISION, alerte_active INTEGER DEFAULT 0,
+        seuilWarning DOUBLE PRECISION, modeCollecte TEXT DEFAULT 'GET', maxRepetitions INTEGER, intervalle INTEGER)""",
+    """CREATE TABLE IF NOT EXISTS DonneeEquipement (
+        id BIGSERIAL PRIMARY KEY,
+        equipement_id INTEGER NOT NULL REFERENCES Equipement (id) ON DELETE CASCADE,
+        oid_id INTEGER NOT NULL REFERENCES OID (id) ON DELETE CASCADE,
+        valeur DOUBLE PRECISION NOT NULL, timestamp TEXT DEFAULT {now}, indice TEXT)""",
+    """CREATE TABLE IF NOT EXISTS Event (
+        id BIGSERIAL PRIMARY KEY, oid_id INTEGER REFERENCES OID (id), equipement_id INTEGER REFERENCES Equipement (id),
+        type_alerte TEXT, valeur_actuelle DOUBLE PRECISION, seuil_declencheur DOUBLE PRECISION,
+        horodatage TEXT DEFAULT {now}, message TEXT,
+        niveau TEXT DEFAULT 'INFO' CHECK (niveau IN ('INFO', 'WARNING', 'CRITICAL', 'LOW')), indice TEXT)""",
+    """CREATE TABLE IF NOT EXISTS ValidationAdmin (
+        id SERIAL PRIMARY KEY, user_id INTEGER, action_type TEXT, target_id INTEGER,
+        created_at TEXT DEFAULT {now}, status TEXT DEFAULT 'PENDING', commentaire TEXT)""",
+    """CREATE TABLE IF NOT EXISTS CatalogueOID (
+        id SERIAL PRIMARY KEY, nomParametre TEXT NOT NULL, identifiant TEXT NOT NULL, typeValeur TEXT,
+        status TEXT DEFAULT 'PENDING')""",
+    """CREATE TABLE IF NOT EXISTS Template (
+        id SERIAL PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES Utilisateur (id), nom TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'PENDING', created_at TEXT DEFAULT {now})""",
+    """CREATE TABLE IF NOT EXISTS TemplateOID (
+        id SERIAL PRIMARY KEY, template_id INTEGER NOT NULL REFERENCES Template (id),
+        catalogue_oid_id INTEGER NOT NULL REFERENCES CatalogueOID (id))""",
+    """CREATE TABLE IF NOT EXISTS DonneeAgregee (
+        resolution TEXT NOT NULL, equipement_id INTEGER NOT NULL, oid_id INTEGER NOT NULL,
+        indice TEXT NOT NULL DEFAULT '', bucket TEXT NOT NULL,
+        minimum DOUBLE PRECISION, maximum DOUBLE PRECISION, somme DOUBLE PRECISION, nombre INTEGER,
+        derniere DOUBLE PRECISION, derniere_ts TEXT,
+        PRIMARY KEY (resolution, equipement_id, oid_id, indice, bucket))""",
+    "CREATE TABLE IF NOT EXISTS AgregationEtat (nom TEXT PRIMARY KEY, dernier_id BIGINT NOT NULL)",
+]
+
+
+# Chaînes '...' et identifiants "..." (guillemets doublés à l'intérieur) : leurs ? ne sont pas des paramètres
+QUOTED_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+
+@lru_cache(maxsize=1024)
+def to_pyformat(sql):
+    """Requête écrite pour sqlite3 (paramètres ?) → style psycopg2 (%s)."""
+    parts = QUOTED_RE.split(sql.replace("%", "%%"))
+    # split() avec un groupe : les morceaux entre guillemets sont aux indices impairs
+    return "".join(part if i % 2 else part.replace("?", "%s") for i, part in enumerate(parts))
+
+
+def _copy_field(value):
+    # CSV de COPY : champ vide non quoté = NULL, tout le reste entre guillemets
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+# --------------------------------------------------------------------
+# 🗄️ SQLite (par défaut)
+# --------------------------------------------------------------------
+class SQLiteBackend:
+    """Stockage dans le fichier SQLite, via le pool de connexions de db.py."""
+
+    dialect = "sqlite"
+    retryable = (sqlite3.OperationalError,)
+    integrity_error = sqlite3.IntegrityError
+
+    def __init__(self, pool=None):
+        self.pool = pool or sqlite_pool
+
+    def connect(self):
+        return self.pool.connect()
+
+    def bulk_insert(self, conn, kind, rows):
+        conn.executemany(STATEMENTS[kind], rows)
+
+    def init_schema(self):
+        pass  # géré par app.init_schema (ALTER TABLE sur une base existante)
+
+    def close(self):
+        self.pool.close_all()
+
+    def snapshot(self):
+        return dict(self.pool.snapshot(), backend=self.dialect)
+
+
+# --------------------------------------------------------------------
+# 🐘 PostgreSQL
+# --------------------------------------------------------------------
+class PgRow(tuple):
+    """Ligne lisible par indice ou par nom de colonne, sans tenir compte de la casse
+
+    (PostgreSQL renvoie nomparametre pour nomParametre), comme sqlite3.Row.
+    """
+
+    def __new__(cls, values, index):
+        row = super().__new__(cls, values)
+        row._index = index
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key.lower()]
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self._index)
+
+
+class PgCursor:
+    """Curseur psycopg2 qui accepte les requêtes sqlite3 (?) et rend des PgRow."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._raw = conn.raw
+        self._cursor = self._raw.cursor()
+        self._index = None
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(to_pyformat(sql), tuple(params))
+        self._index = ({col.name.lower(): i for i, col in enumerate(self._cursor.description)}
+                       if self._cursor.description else None)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(to_pyformat(sql), [tuple(p) for p in seq_of_params])
+        return self
+
+    def _row(self, values):
+        return None if values is None else PgRow(values, self._index)
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [PgRow(values, self._index) for values in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        # Dernière valeur de séquence (SERIAL) de la session, comme lastrowid après un INSERT
+        if self._conn.raw is None:
+            # Connexion rendue au pool : lastval() y lirait la séquence d'une autre session
+            raise RuntimeError("lastrowid lu après close() : le lire avant de rendre la connexion")
+        cursor = self._raw.cursor()
+        # Point de sauvegarde : un lastval() en erreur n'annule pas la transaction en cours
+        cursor.execute("SAVEPOINT lastrowid")
+        try:
+            cursor.execute("SELECT lastval()")
+            return cursor.fetchone()[0]
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT lastrowid")
+            return None
+        finally:
+            cursor.execute("RELEASE SAVEPOINT lastrowid")
+            cursor.close()
+
+    def close(self):
+        self._cursor.close()
+
+
+class PgConnection:
+    """Connexion du pool PostgreSQL avec l'interface de sqlite3.Connection utilisée par l'appli."""
+
+    def __init__(self, backend, raw):
+        self._backend = backend
+        self.raw = raw
+
+    def cursor(self):
+        return PgCursor(self)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    @property
+    def in_transaction(self):
+        return self.raw.get_transaction_status() != 0  # TRANSACTION_STATUS_IDLE
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.raw.commit()
+        else:
+            self.raw.rollback()
+        return False
+
+    def close(self):
+        if self.raw is not None:
+            self._backend.release(self.raw)
+            self.raw = None
+
+
+class PostgresBackend:
+    """Stockage PostgreSQL : connexions en pool, ingestion des lots par COPY.
+
+    ``pool`` accepte tout objet offrant getconn() / putconn() / closeall()
+    (psycopg2.pool.ThreadedConnectionPool par défaut), ce qui permet de
+    tester le backend contre une base locale ou un faux pool en mémoire.
+    ThreadedConnectionPool lève PoolError quand ses maxconn connexions sont
+    prises : connect() attend plutôt qu'une se libère (pool_timeout s au plus).
+    """
+
+    dialect = "postgres"
+
+    def __init__(self, dsn=PG_DSN, pool=None, minconn=PG_POOL_MIN, maxconn=PG_POOL_MAX, pool_timeout=PG_POOL_TIMEOUT):
+        try:
+            import psycopg2 # type: ignore
+            import psycopg2.pool # type: ignore
+            self.retryable = (psycopg2.OperationalError,)
+            self.integrity_error = psycopg2.IntegrityError
+        except ImportError:
+            if pool is None:
+                raise RuntimeError("STORAGE_BACKEND=postgres nécessite psycopg2 (pip install psycopg2)")
+            self.retryable = ()
+            self.integrity_error = sqlite3.IntegrityError
+        self.pool = pool if pool is not None else psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, dsn)
+        self.pool_timeout = pool_timeout
+        self._slots = threading.BoundedSemaphore(maxconn)   # une place par connexion du pool
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(("borrowed", "released", "waits", "timeouts", "copies", "copied_rows"), 0)
+
+    def connect(self):
+        if not self._slots.acquire(blocking=False):
+            # ⏳ Pool plein : on attend qu'une connexion soit rendue
+            with self._lock:
+                self.stats["waits"] += 1
+            if not self._slots.acquire(timeout=self.pool_timeout):
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                raise RuntimeError(f"Aucune connexion PostgreSQL libre après {self.pool_timeout:g} s")
+        try:
+            raw = self.pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.stats["borrowed"] += 1
+        return PgConnection(self, raw)
+
+    def release(self, raw):
+        try:
+            if raw.get_transaction_status() != 0:
+                raw.rollback()
+            self.pool.putconn(raw)
+        finally:
+            self._slots.release()
+        with self._lock:
+            self.stats["released"] += 1
+
+    def bulk_insert(self, conn, kind, rows):
+        """Un COPY ... FROM STDIN par lot : bien plus rapide qu'un INSERT par ligne."""
+        table, columns = COPY_TARGETS[kind]
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(",".join(_copy_field(value) for value in row))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        cursor = conn.raw.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+        with self._lock:
+            self.stats["copies"] += 1
+            self.stats["copied_rows"] += len(rows)
+
+    def init_schema(self):
+        conn = self.connect()
+        try:
+            with conn:
+                for statement in SCHEMA_POSTGRES:
+                    conn.execute(statement.format(now=NOW_TEXT))
+        finally:
+            conn.close()
+
+    def close(self):
+        self.pool.closeall()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, backend=self.dialect)
+
+
+def create_backend(name=STORAGE_BACKEND):
+    """Backend choisi par STORAGE_BACKEND."""
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "postgres":
+        return PostgresBackend()
+    raise ValueError(f"STORAGE_BACKEND inconnu : {name}")
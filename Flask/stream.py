@@ -0,0 +1,122 @@
+import json
+import os
+import queue
+import threading
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+STREAM_BUFFER = int(os.environ.get("STREAM_BUFFER", "500"))          # messages en attente max par navigateur
+STREAM_MAX_CLIENTS = int(os.environ.get("STREAM_MAX_CLIENTS", "50"))  # flux SSE ouverts en même temps
+STREAM_HEARTBEAT = float(os.environ.get("STREAM_HEARTBEAT", "15"))    # commentaire ": ping" si rien à envoyer (s)
+STREAM_RETRY_MS = int(os.environ.get("STREAM_RETRY_MS", "3000"))      # délai de reconnexion conseillé au navigateur
+
+_DROPPED = object()
+
+
+class Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = False
+
+
+# --------------------------------------------------------------------
+# 📣 Diffusion des mesures et alertes aux navigateurs (SSE)
+# --------------------------------------------------------------------
+class EventBroker:
+    """Répartit chaque message vers une file bornée par client.
+
+    publish() ne bloque jamais le poller : si la file d'un client est
+    pleine, ce client est décroché (son flux se termine), le navigateur se
+    reconnecte tout seul et recharge l'état complet depuis /latest au lieu
+    de rattraper un retard qu'il ne résorberait pas.
+    """
+
+    def __init__(self, buffer=STREAM_BUFFER, max_clients=STREAM_MAX_CLIENTS):
+        self.buffer = buffer
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self.stats = dict.fromkeys(("published", "delivered", "connected", "refused", "dropped_clients"), 0)
+
+    def subscribe(self):
+        """Nouveau client, ou None si max_clients est atteint."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                self.stats["refused"] += 1
+                return None
+            subscriber = Subscriber(self.buffer)
+            self._subscribers.add(subscriber)
+            self.stats["connected"] += 1
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event, data):
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.stats["published"] += 1
+
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+                self.stats["delivered"] += 1
+            except queue.Full:
+                # 🐢 Client trop lent : on le décroche plutôt que de retenir la mémoire
+                self._drop(subscriber)
+
+    def _drop(self, subscriber):
+        with self._lock:
+            if subscriber not in self._subscribers:
+                return
+            self._subscribers.discard(subscriber)
+            self.stats["dropped_clients"] += 1
+        subscriber.dropped = True
+        # Réveille le générateur : on retire un message pour faire place au signal de fin
+        try:
+            subscriber.queue.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            subscriber.queue.put_nowait(_DROPPED)
+        except queue.Full:
+            pass
+
+    def on_record(self, kind, params):
+        """Abonné de l'IngestWriter : mesures et événements d'alerte deviennent des messages."""
+        if kind == "sample":
+            equipement_id, oid_id, valeur, indice, timestamp = params
+            self.publish("sample", {"equipement_id": equipement_id, "oid_id": oid_id, "indice": indice,
+                                    "valeur": valeur, "timestamp": timestamp})
+        elif kind == "event":
+            oid_id, equipement_id, type_alerte, valeur, seuil, message, niveau, horodatage, indice = params
+            self.publish("alert", {"equipement_id": equipement_id, "oid_id": oid_id, "indice": indice,
+                                   "type_alerte": type_alerte,
+                                   "valeur_actuelle": valeur, "seuil_declencheur": seuil, "message": message,
+                                   "niveau": niveau, "horodatage": horodatage})
+
+    def stream(self, subscriber, heartbeat=STREAM_HEARTBEAT):
+        """Générateur du corps de la réponse text/event-stream."""
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            while not subscriber.dropped:
+                try:
+                    message = subscriber.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if message is _DROPPED:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, clients=len(self._subscribers))
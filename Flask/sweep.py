@@ -0,0 +1,171 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from logs import logger
+from snmp_client import SNMP_MAX_REPETITIONS, get_snmp_values_async, walk_snmp_table_async
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+SWEEP_PARALLELISM = int(os.environ.get("SWEEP_PARALLELISM", "16"))   # équipements interrogés en même temps
+SWEEP_DEADLINE = float(os.environ.get("SWEEP_DEADLINE", "20"))       # durée max d'un balayage (s)
+SWEEP_HISTORY = int(os.environ.get("SWEEP_HISTORY", "5"))            # balayages terminés conservés
+
+
+class Sweep:
+    """Un balayage /snmp_check : résultats ajoutés au fil de l'eau, lus par la page."""
+
+    def __init__(self, sweep_id, total):
+        self.id = sweep_id
+        self.total = total
+        self.results = []
+        self.done = False
+        self.started = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add(self, results):
+        with self._lock:
+            self.results.extend(results)
+
+    def since(self, index):
+        with self._lock:
+            return self.results[index:]
+
+    def snapshot(self, index=0):
+        return {
+            "id": self.id, "total": self.total, "done": self.done,
+            "duration": round((self.finished or time.time()) - self.started, 2),
+            "results": self.since(index),
+        }
+
+
+# --------------------------------------------------------------------
+# 🔍 Balayage SNMP en tâche de fond
+# --------------------------------------------------------------------
+class SweepManager:
+    """Lance les balayages dans un thread, un GET groupé par équipement.
+
+    Les OID en mode WALK sont parcourus comme par la collecte (GETBULK),
+    une ligne de résultat par OID avec le nombre de lignes de la table.
+
+    Au plus ``parallelism`` équipements sont interrogés en même temps ;
+    à ``deadline`` secondes, ceux qui n'ont pas répondu sont marqués
+    TIMEOUT et le balayage se termine. Un seul balayage tourne à la fois :
+    recharger la page rattache au balayage en cours.
+    """
+
+    def __init__(self, on_value, parallelism=SWEEP_PARALLELISM, deadline=SWEEP_DEADLINE, history=SWEEP_HISTORY):
+        self.on_value = on_value          # on_value(ligne, résultat, indice) : relevé UP à enregistrer
+        self.parallelism = parallelism
+        self.deadline = deadline
+        self.history = history
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._sweeps = OrderedDict()
+        self._running = None
+
+    def start(self, devices):
+        """Démarre un balayage des lignes Equipement × OID ``devices`` (ou rend celui en cours)."""
+        with self._lock:
+            if self._running is not None and not self._running.done:
+                return self._running
+            sweep = Sweep(next(self._ids), len(devices))
+            self._sweeps[sweep.id] = sweep
+            while len(self._sweeps) > self.history:
+                self._sweeps.popitem(last=False)
+            self._running = sweep
+
+        threading.Thread(target=self._run, args=(sweep, devices), name=f"sweep-{sweep.id}", daemon=True).start()
+        return sweep
+
+    def get(self, sweep_id):
+        with self._lock:
+            return self._sweeps.get(sweep_id)
+
+    def _run(self, sweep, devices):
+        try:
+            asyncio.run(self._sweep(sweep, devices))
+        except Exception as e:
+            logger.error("balayage", "Balayage SNMP interrompu : {erreur}", erreur=str(e))
+        finally:
+            sweep.finished = time.time()
+            sweep.done = True
+
+    async def _sweep(self, sweep, devices):
+        equipements = OrderedDict()
+        for device in devices:
+            equipements.setdefault(device["equipement_id"], []).append(device)
+
+        semaphore = asyncio.Semaphore(self.parallelism)
+        tasks = [asyncio.create_task(self._check(sweep, rows, semaphore)) for rows in equipements.values()]
+        if not tasks:
+            return
+
+        _, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    async def _check(self, sweep, rows, semaphore):
+        first = rows[0]
+        scalaires = [r for r in rows if r.get("modeCollecte") != "WALK"]
+        tables = [r for r in rows if r.get("modeCollecte") == "WALK"]
+        resultats = {}
+        try:
+            async with semaphore:
+                if scalaires:
+                    valeurs = await get_snmp_values_async(first["ip"], first["community"],
+                                                          [r["oid"] for r in scalaires])
+                    resultats.update((id(row), res) for row, res in zip(scalaires, valeurs))
+                # 📋 Tables : un parcours GETBULK par OID, comme la collecte
+                for row in tables:
+                    resultats[id(row)] = await walk_snmp_table_async(
+                        row["ip"], row["community"], row["oid"], row.get("maxRepetitions") or SNMP_MAX_REPETITIONS)
+        except asyncio.CancelledError:
+            delai = {"status": "DOWN", "info": f"Délai du balayage dépassé ({self.deadline:g} s)"}
+            sweep.add([self._result(row, resultats.get(id(row), delai)) for row in rows])
+            raise
+
+        for row in rows:
+            res = resultats[id(row)]
+            if res["status"] != "UP":
+                continue
+            # 💾 Les valeurs passent par l'écriture différée (lots, une transaction)
+            mesures = res["rows"] if "rows" in res else [(None, res)]
+            erreurs = [e for e in (self._store(row, indice, mesure) for indice, mesure in mesures) if e]
+            if erreurs:
+                resultats[id(row)] = dict(res, info=f"{res['info']} (non enregistré : {erreurs[0]})")
+        sweep.add([self._result(row, resultats[id(row)]) for row in rows])
+
+    def _store(self, row, indice, res):
+        """Enregistre un relevé UP ; rend l'erreur éventuelle (une ligne en erreur n'arrête pas les autres)."""
+        if res["status"] != "UP":
+            return None
+        try:
+            self.on_value(row, res, indice)
+        except ValueError:
+            pass
+        except Exception as e:
+            logger.warning("balayage", "Balayage : {equipement} / {parametre} non enregistré : {erreur}",
+                           equipement=row["equipement_nom"], parametre=row["nomParametre"],
+                           equipement_id=row["equipement_id"], oid_id=row["oid_id"], erreur=str(e))
+            return e
+        return None
+
+    @staticmethod
+    def _result(row, res):
+        return {
+            "name": row["equipement_nom"],
+            "ip": row["ip"],
+            "oid": row["oid"],
+            "parametre": row["nomParametre"],
+            "status": res["status"],
+            "info": res["info"],
+        }
@@ -0,0 +1,110 @@
+import os
+import threading
+
+from logs import logger
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+TAIL_INTERVAL = float(os.environ.get("TAIL_INTERVAL", "1"))          # délai entre deux relectures (s)
+TAIL_BATCH_SIZE = int(os.environ.get("TAIL_BATCH_SIZE", "5000"))     # lignes lues par requête
+
+# Table -> (type d'enregistrement, colonnes dans l'ordre des params de l'IngestWriter)
+TAIL_SOURCES = {
+    "DonneeEquipement": ("sample", "equipement_id, oid_id, valeur, indice, timestamp"),
+    "Event": ("event", "oid_id, equipement_id, type_alerte, valeur_actuelle, seuil_declencheur, "
+                       "message, niveau, horodatage, indice"),
+}
+
+
+# --------------------------------------------------------------------
+# 👀 Suivi des écritures d'un collecteur séparé
+# --------------------------------------------------------------------
+class IngestTail:
+    """Relit dans la BDD les mesures et événements écrits par un autre processus.
+
+    Le serveur web ne partage que la BDD avec le collecteur : ce thread
+    relit les lignes dont l'id dépasse le dernier vu et les passe aux
+    abonnés avec le même (kind, params) que l'IngestWriter, ce qui
+    alimente /latest et /stream sans collecte dans le processus web.
+    """
+
+    def __init__(self, connect, interval=TAIL_INTERVAL, batch_size=TAIL_BATCH_SIZE):
+        self.connect = connect
+        self.interval = interval
+        self.batch_size = batch_size
+        self._listeners = []
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pid = None
+        self.stats = dict.fromkeys(("sample", "event", "polls", "errors"), 0)
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def start(self):
+        """Démarre le suivi (une fois par processus : sûr après un fork de serveur WSGI)."""
+        with self._lock:
+            if self.running():
+                return False
+            # On part de la fin des tables : l'historique est chargé par ailleurs (rebuild)
+            try:
+                conn = self.connect()
+                try:
+                    self._cursors = {table: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                                     for table in TAIL_SOURCES}
+                finally:
+                    conn.close()
+            except Exception as e:
+                # Pas encore marqué démarré : nouvel essai au prochain appel
+                self.stats["errors"] += 1
+                logger.error("suivi", "Démarrage du suivi impossible : {erreur}", erreur=str(e))
+                return False
+            self._pid = os.getpid()
+            self._stop.clear()
+            threading.Thread(target=self._run, name="ingest-tail", daemon=True).start()
+            return True
+
+    def running(self):
+        """Vrai si le suivi tourne déjà dans ce processus."""
+        return self._pid == os.getpid()
+
+    def stop(self):
+        self._stop.set()
+
+    def poll(self):
+        """Passe aux abonnés les lignes apparues depuis le dernier appel ; renvoie leur nombre."""
+        total = 0
+        conn = self.connect()
+        try:
+            for table, (kind, colonnes) in TAIL_SOURCES.items():
+                rows = conn.execute(f"SELECT id, {colonnes} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                                    (self._cursors[table], self.batch_size)).fetchall()
+                for row in rows:
+                    params = tuple(row)[1:]
+                    for callback in self._listeners:
+                        try:
+                            callback(kind, params)
+                        except Exception as e:
+                            logger.error("abonne_suivi", "Abonné du suivi en erreur : {erreur}", erreur=str(e))
+                if rows:
+                    self._cursors[table] = rows[-1][0]
+                    self.stats[kind] += len(rows)
+                    total += len(rows)
+        finally:
+            conn.close()
+        self.stats["polls"] += 1
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                # Lot plein : on enchaîne sans attendre
+                if self.poll() >= self.batch_size:
+                    continue
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error("suivi", "Relecture des mesures impossible : {erreur}", erreur=str(e))
+            self._stop.wait(self.interval)
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Les modules de l'application s'importent par leur nom (import app, import sweep...), comme depuis Flask/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Journaux des tests hors du dépôt
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="etrs011_logs_"))
@@ -0,0 +1,166 @@
+"""Faux pool psycopg2 en mémoire, sur SQLite, pour tester storage.PostgresBackend sans serveur.
+
+Reproduit ce dont PgConnection / PgCursor / bulk_insert dépendent :
+paramètres %s, noms de colonnes repliés en minuscules, BEGIN implicite,
+transaction bloquée après une erreur (jusqu'au ROLLBACK), lastval() par
+session, COPY ... FROM STDIN WITH (FORMAT csv) (champ vide non quoté = NULL).
+"""
+import re
+import sqlite3
+
+IDLE, INTRANS, INERROR = 0, 2, 3
+
+COPY_RE = re.compile(r"COPY (\w+) \(([^)]*)\) FROM STDIN WITH \(FORMAT csv\)")
+
+
+class FakePgError(Exception):
+    pass
+
+
+class Column:
+    def __init__(self, name):
+        self.name = name
+
+
+def parse_csv(text):
+    """Lignes CSV de COPY : None pour un champ vide non quoté, '' pour ""."""
+    rows, row, i = [], [], 0
+    while i < len(text):
+        if text[i] == '"':
+            value, i = [], i + 1
+            while True:
+                j = text.index('"', i)
+                value.append(text[i:j])
+                if text[j + 1:j + 2] == '"':
+                    value.append('"')
+                    i = j + 2
+                else:
+                    i = j + 1
+                    break
+            row.append("".join(value))
+        else:
+            j = i
+            while j < len(text) and text[j] not in ",\n":
+                j += 1
+            row.append(text[i:j] or None)
+            i = j
+        if i >= len(text) or text[i] == "\n":
+            rows.append(row)
+            row = []
+        i += 1
+    return rows
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._cursor = conn.db.cursor()
+        self.description = None
+        self.rowcount = -1
+
+    def _run(self, sql, params):
+        conn = self.conn
+        commande = sql.strip().split()[0].upper()
+        if conn.status == INERROR and not sql.strip().upper().startswith(("ROLLBACK", "RELEASE")):
+            raise FakePgError("current transaction is aborted, commands ignored until end of transaction block")
+        if conn.status == IDLE:
+            conn.db.execute("BEGIN")
+            conn.status = INTRANS
+        try:
+            if sql.strip() == "SELECT lastval()":
+                if conn.lastval is None:
+                    raise FakePgError('lastval is not yet defined in this session')
+                self._cursor.execute("SELECT ?", (conn.lastval,))
+            else:
+                self._cursor.execute(sql.replace("%s", "?").replace("%%", "%"), params)
+        except Exception:
+            conn.status = INERROR
+            raise
+        if sql.strip().upper().startswith("ROLLBACK TO SAVEPOINT"):
+            conn.status = INTRANS
+        if commande == "INSERT":
+            conn.lastval = self._cursor.lastrowid
+        self.rowcount = self._cursor.rowcount
+        # PostgreSQL replie les identifiants non quotés en minuscules
+        self.description = ([Column(d[0].lower()) for d in self._cursor.description]
+                            if self._cursor.description else None)
+
+    def execute(self, sql, params=()):
+        self.conn.log.append(sql)
+        self._run(sql, tuple(params))
+
+    def executemany(self, sql, seq_of_params):
+        for params in seq_of_params:
+            self.execute(sql, params)
+
+    def copy_expert(self, sql, file):
+        self.conn.log.append(sql)
+        match = COPY_RE.fullmatch(sql)
+        if match is None:
+            raise FakePgError(f"COPY non reconnu : {sql}")
+        table, columns = match.group(1), [c.strip() for c in match.group(2).split(",")]
+        placeholders = ", ".join("%s" for _ in columns)
+        for row in parse_csv(file.read()):
+            self._run(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", tuple(row))
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class FakeRawConnection:
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.status = IDLE
+        self.lastval = None     # propre à la session, comme lastval()
+        self.log = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        if self.status == INERROR:
+            self.db.execute("ROLLBACK")
+        elif self.status == INTRANS:
+            self.db.execute("COMMIT")
+        self.status = IDLE
+
+    def rollback(self):
+        if self.status != IDLE:
+            self.db.execute("ROLLBACK")
+        self.status = IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.db.close()
+
+
+class FakePool:
+    """getconn() / putconn() / closeall(), comme psycopg2.pool.ThreadedConnectionPool."""
+
+    def __init__(self, path):
+        self.path = path
+        self.free = []
+        self.all = []
+
+    def getconn(self):
+        if self.free:
+            return self.free.pop()
+        raw = FakeRawConnection(self.path)
+        self.all.append(raw)
+        return raw
+
+    def putconn(self, raw):
+        self.free.append(raw)
+
+    def closeall(self):
+        for raw in self.all:
+            raw.close()
+        self.free, self.all = [], []
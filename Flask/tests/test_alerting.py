@@ -0,0 +1,100 @@
+import sqlite3
+
+from alerting import AlertState, AlertStateMachine
+
+SEUILS = (10.0, 80.0, 90.0)     # (min, warning, max)
+
+
+def test_low_puis_warning_est_une_aggravation():
+    machine = AlertStateMachine(hysteresis=0.05, renotify_interval=0)
+    key = (1, 2, None)
+    assert machine.evaluate(key, SEUILS, 5.0, now=0)[:1] == ("open",)
+    assert machine.evaluate(key, SEUILS, 85.0, now=1) == ("escalate", "SeuilWarning", 80.0, "WARNING")
+    assert machine.evaluate(key, SEUILS, 95.0, now=2) == ("escalate", "SeuilMax", 90.0, "CRITICAL")
+    assert machine.niveau(key) == "CRITICAL"
+
+
+def test_hysteresis_et_retour_a_la_normale():
+    machine = AlertStateMachine(hysteresis=0.05, renotify_interval=0)
+    key = (1, 2, None)
+    machine.evaluate(key, SEUILS, 95.0, now=0)
+    # Sous seuilMax mais dans la marge (90 - 4.5) : rien n'est émis
+    assert machine.evaluate(key, SEUILS, 88.0, now=1) is None
+    assert machine.evaluate(key, SEUILS, 84.0, now=2) == ("deescalate", "SeuilWarning", 80.0, "WARNING")
+    assert machine.evaluate(key, SEUILS, 78.0, now=3) is None
+    assert machine.evaluate(key, SEUILS, 70.0, now=4) == ("clear", "SeuilWarning", 80.0, "INFO")
+    assert machine.niveau(key) is None
+    assert machine.evaluate(key, SEUILS, 50.0, now=5) is None
+
+
+def test_rappel_apres_renotify_interval():
+    machine = AlertStateMachine(hysteresis=0.05, renotify_interval=60)
+    key = (1, 2, None)
+    machine.evaluate(key, SEUILS, 95.0, now=0)
+    assert machine.evaluate(key, SEUILS, 96.0, now=30) is None
+    assert machine.evaluate(key, SEUILS, 96.0, now=61)[0] == "renotify"
+    assert machine.evaluate(key, SEUILS, 96.0, now=62) is None
+    assert machine.stats["suppressed"] == 2
+
+
+def test_load_reprend_les_lignes_de_table(tmp_path):
+    path = str(tmp_path / "bdd.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE Event (id INTEGER PRIMARY KEY AUTOINCREMENT, oid_id INTEGER, equipement_id INTEGER,
+                    type_alerte TEXT, valeur_actuelle REAL, seuil_declencheur REAL, message TEXT, niveau TEXT,
+                    horodatage TEXT, indice TEXT)""")
+    conn.executemany("""INSERT INTO Event (oid_id, equipement_id, type_alerte, seuil_declencheur, niveau, indice)
+                        VALUES (?, ?, ?, ?, ?, ?)""", [
+        (2, 1, "SeuilMax", 90.0, "CRITICAL", "1"),
+        (2, 1, "SeuilMax", 90.0, "CRITICAL", "2"),
+        (2, 1, "SeuilMax", 90.0, "INFO", "2"),         # ligne 2 revenue à la normale
+        (3, 1, "SeuilWarning", 80.0, "WARNING", None),
+    ])
+    conn.commit()
+    conn.close()
+
+    machine = AlertStateMachine(hysteresis=0.05, renotify_interval=0)
+    assert machine.load(lambda: sqlite3.connect(path)) == 2
+    assert machine.niveau((1, 2, "1")) == "CRITICAL"
+    assert machine.niveau((1, 2, "2")) is None
+    assert machine.niveau((1, 3, None)) == "WARNING"
+    # Après redémarrage, la ligne 1 toujours en alerte ne produit pas de nouvel Event
+    assert machine.evaluate((1, 2, "1"), SEUILS, 95.0) is None
+
+
+def test_seuil_releve_leve_l_alerte():
+    machine = AlertStateMachine(hysteresis=0.05, renotify_interval=0)
+    key = (1, 2, None)
+    assert machine.evaluate(key, SEUILS, 95.0, now=0)[0] == "open"
+    # seuilMax relevé à 100 : 95 dépasse toujours l'ancien seuil, mais seulement le warning du nouveau
+    assert machine.evaluate(key, (10.0, 80.0, 100.0), 95.0, now=1) == ("deescalate", "SeuilWarning", 80.0, "WARNING")
+    # Seuils supprimés : l'alerte est levée aussitôt
+    assert machine.evaluate(key, (None, None, None), 95.0, now=2) == ("clear", "SeuilWarning", 80.0, "INFO")
+    assert machine.niveau(key) is None
+
+
+def test_seuil_modifie_meme_niveau_sans_evenement():
+    machine = AlertStateMachine(hysteresis=0.05, renotify_interval=0)
+    key = (1, 2, None)
+    machine.evaluate(key, SEUILS, 95.0, now=0)
+    assert machine.evaluate(key, (10.0, 80.0, 92.0), 95.0, now=1) is None
+    # L'hystérésis suit le nouveau seuil (92 - 4.6)
+    assert machine.evaluate(key, (10.0, 80.0, 92.0), 88.0, now=2) is None
+    assert machine.evaluate(key, (10.0, 80.0, 92.0), 87.0, now=3)[0] == "deescalate"
+
+
+def test_alerte_reprise_adopte_les_seuils_courants():
+    machine = AlertStateMachine(hysteresis=0.05, renotify_interval=0)
+    machine._states[(1, 2, None)] = AlertState("CRITICAL", "SeuilMax", 90.0, 0)   # comme après load()
+    # Dans la marge d'hystérésis : pas de levée prématurée
+    assert machine.evaluate((1, 2, None), SEUILS, 88.0, now=1) is None
+
+
+def test_oubli_par_equipement_ou_oid():
+    machine = AlertStateMachine(hysteresis=0.05, renotify_interval=0)
+    for key in ((1, 2, None), (1, 3, "1"), (4, 2, None)):
+        machine.evaluate(key, SEUILS, 95.0, now=0)
+    machine.forget_series(oid_id=2)
+    assert machine.niveau((1, 2, None)) is None and machine.niveau((4, 2, None)) is None
+    machine.forget_series(equipement_id=1)
+    assert machine.niveau((1, 3, "1")) is None
@@ -0,0 +1,91 @@
+import os
+import shutil
+
+import pytest
+
+import app as application
+from db import ConnectionPool
+from storage import SQLiteBackend
+
+BASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "BDD", "BDD_LeFlour")
+
+
+@pytest.fixture
+def tableau(tmp_path, monkeypatch):
+    """Client connecté sur une base temporaire ; rend la liste des contextes passés au gabarit."""
+    # Copie de la base livrée (schéma d'origine), vidée de ses données
+    chemin = tmp_path / "dashboard.db"
+    shutil.copy(BASE, chemin)
+    backend = SQLiteBackend(ConnectionPool(str(chemin), journal_mode=None))
+    monkeypatch.setattr(application, "storage", backend)
+
+    conn = backend.connect()
+    for table in ("DonneeEquipement", "OID", "Equipement"):
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute("DELETE FROM sqlite_sequence")
+    conn.execute("INSERT INTO Equipement (nom, ip) VALUES ('sw1', '10.0.0.1'), ('sw2', '10.0.0.2')")
+    conn.execute("INSERT INTO OID (identifiant, nomParametre, typeValeur, equipement_id) VALUES "
+                 "('1.3.6.1.2.1.1.3.0', 'uptime', 'Integer', 1), ('1.3.6.1.2.1.2.1.0', 'ifNumber', 'Integer', 2)")
+    # Cinq relevés au même horodatage : seul l'id les départage
+    conn.executemany("INSERT INTO DonneeEquipement (equipement_id, oid_id, valeur, timestamp) VALUES (?, ?, ?, ?)",
+                     [(1, 1, i, "2026-01-01 10:00:00") for i in range(5)]
+                     + [(2, 2, 100, "2026-01-01 09:00:00"), (1, 1, 99, "2026-01-01 08:00:00")])
+    conn.commit()
+    conn.close()
+    application.init_schema()
+
+    vues = []
+
+    def render_template(nom, **contexte):
+        vues.append(contexte)
+        return nom
+
+    monkeypatch.setattr(application, "render_template", render_template)
+    client = application.app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = 1
+    yield client, vues
+    backend.close()
+
+
+def pages(client, vues, **params):
+    """Parcourt toutes les pages ; rend les id_donnee de chacune."""
+    resultat, curseur = [], None
+    while True:
+        requete = dict(params, curseur=curseur) if curseur else params
+        assert client.get("/dashboard", query_string=requete).status_code == 200
+        vue = vues[-1]
+        resultat.append([row["id_donnee"] for row in vue["data"]])
+        curseur = vue["curseur_suivant"]
+        if not curseur:
+            return resultat
+
+
+def test_horodatages_egaux_departages_par_id(tableau):
+    client, vues = tableau
+    # Aucune ligne perdue ni répétée quand une page coupe un groupe de même horodatage
+    assert pages(client, vues, limite=2) == [[5, 4], [3, 2], [1, 6], [7]]
+
+
+def test_filtres(tableau):
+    client, vues = tableau
+    assert pages(client, vues, equipement=2) == [[6]]
+    assert pages(client, vues, parametre="uptime", limite=3) == [[5, 4, 3], [2, 1, 7]]
+    assert pages(client, vues, debut="2026-01-01T08:30", fin="2026-01-01T09:30") == [[6]]
+    assert vues[-1]["filtres"]["debut"] == "2026-01-01T08:30"
+
+
+def test_limite_bornee(tableau, monkeypatch):
+    client, vues = tableau
+    monkeypatch.setattr(application, "DASHBOARD_MAX_PAGE_SIZE", 3)
+    client.get("/dashboard", query_string={"limite": 1000})
+    assert vues[-1]["filtres"]["limite"] == 3 and len(vues[-1]["data"]) == 3
+    client.get("/dashboard", query_string={"limite": -5})
+    assert vues[-1]["filtres"]["limite"] == 1 and len(vues[-1]["data"]) == 1
+
+
+@pytest.mark.parametrize("curseur", ["2026-01-01 10:00:00", "2026-01-01 10:00:00|abc"])
+def test_curseur_invalide(tableau, curseur):
+    client, vues = tableau
+    assert client.get("/dashboard", query_string={"curseur": curseur}).status_code == 400
+    assert vues == []
@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+from db import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    chemin = tmp_path / "pool.db"
+    sqlite3.connect(chemin).close()
+    pool = ConnectionPool(str(chemin), size=1)
+    yield pool
+    pool.close_all()
+
+
+def test_connexion_reglee_puis_reutilisee(pool):
+    conn = pool.connect()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    conn.execute("CREATE TABLE t (x)")
+    conn.close()
+    conn.close()  # déjà rendue : sans effet
+
+    assert pool.connect() is conn
+    assert pool.snapshot()["opened"] == 1 and pool.snapshot()["reused"] == 1
+
+
+def test_transaction_ouverte_annulee_au_retour(pool):
+    conn = pool.connect()
+    conn.execute("CREATE TABLE t (x)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.close()
+
+    conn = pool.connect()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    assert pool.snapshot()["rollbacks"] == 1
+
+
+def test_au_dela_de_la_taille_les_connexions_sont_fermees(pool):
+    a, b = pool.connect(), pool.connect()
+    a.close()
+    b.close()  # pool plein (size=1)
+
+    assert pool.snapshot()["closed"] == 1 and pool.snapshot()["idle"] == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        b.execute("SELECT 1")
+
+
+def test_base_introuvable(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ConnectionPool(str(tmp_path / "absente.db")).connect()
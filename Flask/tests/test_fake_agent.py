@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+import snmp_client
+
+# Agents simulés des benchmarks (Flask/bench/fake_agent.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench"))
+from fake_agent import AgentFarm, BASE_OID, IF_ENTRY, make_if_table, oid_str  # noqa: E402
+
+
+@pytest.fixture
+def ferme():
+    with AgentFarm(2, nb_oids=6, base_port=26100, max_varbinds=4) as farm:
+        yield farm
+
+
+def test_get_groupe_contre_les_agents(ferme, monkeypatch):
+    monkeypatch.setattr(snmp_client, "_max_varbinds", {})
+    oids = [oid_str(BASE_OID + (i, 0)) for i in range(1, 7)] + [oid_str(BASE_OID + (99, 0))]
+
+    resultats = snmp_client.get_snmp_values(ferme.targets[0], "public", oids)
+    assert [r["value"] for r in resultats] == [10, 20, 30, 40, 50, 60, None]
+    assert resultats[-1]["info"] == "noSuchObject"
+    # L'agent refuse plus de 4 varbinds : tooBig, paquet coupé et taille retenue pour cette cible seule
+    assert snmp_client._max_varbinds == {("127.0.0.1", 26100): 3}
+    assert ferme.agents[0].requests == 3 and ferme.agents[1].requests == 0
+
+
+def test_parcours_d_une_table():
+    with AgentFarm(1, base_port=26110, table=make_if_table(3)) as farm:
+        walk = snmp_client.walk_snmp_table(farm.targets[0], "public", oid_str(IF_ENTRY + (10,)), 2)
+    assert walk["status"] == "UP"
+    assert [(indice, res["value"]) for indice, res in walk["rows"]] == [("1", 1000), ("2", 2000), ("3", 3000)]
+
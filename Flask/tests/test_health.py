@@ -0,0 +1,56 @@
+import health
+from health import HealthRegistry
+
+CIBLE = ("10.0.0.1", 161)
+
+
+def test_delai_adaptatif(monkeypatch):
+    monkeypatch.setattr(health, "SNMP_TIMEOUT_MIN", 0.5)
+    monkeypatch.setattr(health, "SNMP_TIMEOUT_MAX", 5.0)
+    registre = HealthRegistry()
+    # Sans mesure : délai configuré
+    assert registre.timeout(CIBLE) == (health.SNMP_TIMEOUT, health.SNMP_RETRIES)
+
+    # srtt = 0.4, rttvar = 0.2 : 0.4 + 4 × 0.2 = 1.2, arrondi au quart de seconde
+    registre.record_success(CIBLE, rtt=0.4)
+    assert registre.timeout(CIBLE)[0] == 1.25
+
+    # Agent très rapide : borné par SNMP_TIMEOUT_MIN
+    rapide = ("10.0.0.2", 161)
+    registre.record_success(rapide, rtt=0.001)
+    assert registre.timeout(rapide)[0] == 0.5
+
+    # Karn : une réponse plus lente que le délai (renvoi possible) n'est pas mesurée
+    registre.record_success(CIBLE, rtt=3.0, timeout=1.25)
+    assert registre.stats["rtt_samples"] == 2
+
+
+def test_coupe_circuit(monkeypatch):
+    monkeypatch.setattr(health, "BREAKER_FAILURES", 3)
+    monkeypatch.setattr(health, "BREAKER_BACKOFF", 30.0)
+    monkeypatch.setattr(health, "BREAKER_BACKOFF_MAX", 100.0)
+    registre = HealthRegistry()
+
+    assert not registre.record_failure(CIBLE, now=0)
+    assert not registre.record_failure(CIBLE, now=1)
+    assert registre.record_failure(CIBLE, now=2)       # 3e échec : ouverture
+    assert registre.allow(CIBLE, now=10) == "open"
+
+    # Échéance atteinte : une seule sonde à la fois
+    assert registre.allow(CIBLE, now=32) == "probe"
+    assert registre.allow(CIBLE, now=32) == "open"
+    # Sonde sans réponse : délai doublé
+    registre.record_failure(CIBLE, now=33)
+    assert registre.allow(CIBLE, now=60) == "open"
+    assert registre.allow(CIBLE, now=94) == "probe"
+    registre.record_failure(CIBLE, now=94)
+    assert registre.allow(CIBLE, now=193) == "open"     # plafonné à BREAKER_BACKOFF_MAX
+    assert registre.allow(CIBLE, now=195) == "probe"
+
+    # Réponse : circuit refermé, délai initial rétabli
+    registre.record_success(CIBLE)
+    assert registre.allow(CIBLE, now=196) == "closed"
+    assert registre.stats["opened"] == registre.stats["closed"] == 1
+
+    registre.reset()
+    assert registre.snapshot()["targets"] == {} and registre.stats["opened"] == 0
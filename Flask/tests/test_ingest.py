@@ -0,0 +1,96 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from ingest import IngestWriter
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "bdd.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE DonneeEquipement (id INTEGER PRIMARY KEY AUTOINCREMENT, equipement_id INTEGER,
+                    oid_id INTEGER, valeur REAL, indice TEXT, timestamp TEXT)""")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def compter(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM DonneeEquipement").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def attendre(condition, timeout=5):
+    fin = time.monotonic() + timeout
+    while not condition() and time.monotonic() < fin:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_lots_pleins_puis_dernier_lot_a_l_arret(path):
+    writer = IngestWriter(lambda: sqlite3.connect(path), batch_size=3, flush_interval=60)
+    for i in range(7):
+        writer.push_sample(1, 1, float(i))
+    # Deux lots pleins écrits sans attendre flush_interval
+    assert attendre(lambda: writer.stats["rows"] == 6)
+    assert writer.stats["batches"] == 2 and writer.stats["max_batch"] == 3
+    writer.stop()
+    assert compter(path) == 7
+
+
+def test_file_pleine_bloque_le_producteur(path):
+    libre = threading.Event()
+
+    def connect():
+        libre.wait(5)   # écrivain bloqué : la file se remplit
+        return sqlite3.connect(path)
+
+    writer = IngestWriter(connect, batch_size=1, flush_interval=60, queue_max=2)
+    for i in range(3):
+        writer.push_sample(1, 1, float(i))   # le 1er est retiré de la file par l'écrivain
+    producteur = threading.Thread(target=writer.push_sample, args=(1, 1, 3.0), daemon=True)
+    producteur.start()
+    assert attendre(lambda: writer.qsize() == 2)
+    producteur.join(0.2)
+    assert producteur.is_alive()
+
+    libre.set()
+    producteur.join(5)
+    assert not producteur.is_alive()
+    writer.stop()
+    assert compter(path) == 4
+
+
+def test_reconnexion_apres_echec(path):
+    tentatives = []
+
+    def connect():
+        tentatives.append(1)
+        if len(tentatives) == 1:
+            raise sqlite3.OperationalError("unable to open database file")
+        return sqlite3.connect(path)
+
+    writer = IngestWriter(connect, batch_size=1, flush_interval=60)
+    writer.push_sample(1, 1, 1.0)
+    assert writer.flush(timeout=5)
+    assert compter(path) == 1
+    assert writer.stats["errors"] == 1 and len(tentatives) == 2
+    writer.stop()
+
+
+def test_thread_mort_relance_au_push(path):
+    writer = IngestWriter(lambda: sqlite3.connect(path), batch_size=1, flush_interval=60)
+    mort = threading.Thread(target=lambda: None)
+    mort.start()
+    mort.join()
+    writer._thread = mort     # comme un thread tué par une exception imprévue
+    writer.push_sample(1, 1, 1.0)
+    assert writer.flush(timeout=5)
+    assert writer.stats["restarts"] == 1 and compter(path) == 1
+    writer.stop()
@@ -0,0 +1,61 @@
+import sqlite3
+
+from latest import LatestValues
+
+
+def test_mesure_panne_et_niveau():
+    latest = LatestValues()
+    latest.on_record("sample", (1, 10, 42.0, None, "2026-01-01 10:00:00"))
+    latest.on_record("event", (10, 1, "max", 42.0, 40.0, "", "CRITICAL", "", None))  # ignoré
+    latest.set_niveau(1, 10, "CRITICAL")
+    latest.mark_down(1, 10, "timeout")
+
+    # La panne garde la dernière valeur connue
+    assert latest.snapshot() == [{"equipement_id": 1, "oid_id": 10, "indice": None, "valeur": 42.0,
+                                  "timestamp": "2026-01-01 10:00:00", "status": "DOWN",
+                                  "niveau": "CRITICAL", "info": "timeout"}]
+
+    latest.update(1, 10, 43.0, "2026-01-01 10:01:00")
+    [entry] = latest.snapshot()
+    assert (entry["valeur"], entry["status"], entry["info"], entry["niveau"]) == (43.0, "UP", None, "CRITICAL")
+
+
+def test_series_par_indice_et_oubli():
+    latest = LatestValues()
+    latest.update(1, 10, 1.0, indice="1")
+    latest.update(1, 10, 2.0, indice="2")
+    latest.update(1, 11, 3.0)
+    latest.update(2, 20, 4.0)
+
+    assert len(latest.snapshot()) == 4
+    assert {e["oid_id"] for e in latest.snapshot(equipement_id=2)} == {20}
+
+    latest.forget(oid_id=10)
+    assert sorted((e["equipement_id"], e["oid_id"]) for e in latest.snapshot()) == [(1, 11), (2, 20)]
+    latest.forget(equipement_id=1)
+    assert [e["oid_id"] for e in latest.snapshot()] == [20]
+
+
+def test_rebuild_reprend_la_derniere_ligne_de_chaque_serie():
+    db = sqlite3.connect(":memory:", check_same_thread=False)
+    db.execute("CREATE TABLE DonneeEquipement (id INTEGER PRIMARY KEY, equipement_id INTEGER, oid_id INTEGER, "
+               "indice TEXT, valeur REAL, timestamp TEXT)")
+    db.executemany("INSERT INTO DonneeEquipement (equipement_id, oid_id, indice, valeur, timestamp) "
+                   "VALUES (?, ?, ?, ?, ?)",
+                   [(1, 10, None, 1.0, "t1"), (1, 10, None, 2.0, "t2"),
+                    (1, 10, "3", 5.0, "t1"), (2, 20, None, 7.0, "t1")])
+
+    class Connexion:
+        def execute(self, *args):
+            return db.execute(*args)
+
+        def close(self):
+            pass
+
+    latest = LatestValues()
+    latest.update(9, 90, 0.0)  # remplacé par l'état relu
+    niveaux = {(1, 10, None): "WARNING"}
+    assert latest.rebuild(Connexion, niveau=niveaux.get) == 3
+
+    valeurs = {(e["equipement_id"], e["oid_id"], e["indice"]): (e["valeur"], e["niveau"]) for e in latest.snapshot()}
+    assert valeurs == {(1, 10, None): (2.0, "WARNING"), (1, 10, "3"): (5.0, None), (2, 20, None): (7.0, None)}
@@ -0,0 +1,43 @@
+import json
+import os
+
+import pytest
+
+import logs
+from logs import JsonLogger
+
+
+def relire(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(ligne) for ligne in f]
+
+
+def test_un_fichier_par_processus(tmp_path, monkeypatch):
+    monkeypatch.setattr(logs, "LOG_DIR", str(tmp_path))
+    journal = JsonLogger(source="web-{pid}", console=False)
+    journal.warning("essai", "valeur {valeur}", valeur=3)
+    journal.stop()
+
+    (record,) = relire(tmp_path / f"web-{os.getpid()}.jsonl")
+    assert record["source"] == f"web-{os.getpid()}"
+    assert record["message"] == "valeur 3" and record["valeur"] == 3
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+def test_reprise_apres_fork(tmp_path, monkeypatch):
+    monkeypatch.setattr(logs, "LOG_DIR", str(tmp_path))
+    journal = JsonLogger(source="web-{pid}", console=False)
+    journal.info("parent")      # thread du parent démarré avant le fork (gunicorn --preload)
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            journal.info("enfant")
+            journal.stop()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    journal.stop()
+
+    assert [r["event"] for r in relire(tmp_path / f"web-{pid}.jsonl")] == ["enfant"]
+    assert [r["event"] for r in relire(tmp_path / f"web-{os.getpid()}.jsonl")] == ["parent"]
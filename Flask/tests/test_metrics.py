@@ -0,0 +1,35 @@
+import metrics
+
+
+def registre():
+    registry = metrics.Registry()
+    compteur = registry.register(metrics.Counter("timeouts_total", "t", ("target",)))
+    histo = registry.register(metrics.Histogram("rtt_seconds", "r", ("target",), buckets=(0.01, 0.1)))
+    jauge = registry.register(metrics.Gauge("queue_depth", "q"))
+    return registry, compteur, histo, jauge
+
+
+def test_deltas_d_un_worker_ajoutes_au_parent():
+    parent, p_compteur, p_histo, _ = registre()
+    worker, w_compteur, w_histo, w_jauge = registre()
+
+    p_compteur.inc(target="a")
+    w_compteur.inc(2, target="a")
+    w_compteur.inc(target="b")
+    w_histo.observe(0.005, target="a")
+    w_histo.observe(0.5, target="a")
+    w_jauge.set(7)
+
+    deltas = worker.take_deltas()
+    assert set(deltas) == {"timeouts_total", "rtt_seconds"}   # jauges non transmises
+    parent.merge(deltas)
+
+    assert p_compteur._values == {("a",): 3, ("b",): 1}
+    assert p_histo._values[("a",)] == [[1, 0, 1], 0.505, 2]
+    # Remis à zéro côté worker : le même delta n'est jamais envoyé deux fois
+    assert worker.take_deltas() == {}
+
+    w_histo.observe(0.05, target="a")
+    parent.merge(worker.take_deltas())
+    assert p_histo._values[("a",)][0] == [1, 1, 1]
+    assert 'rtt_seconds_bucket{target="a",le="0.1"} 2' in parent.expose()
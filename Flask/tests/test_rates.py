@@ -0,0 +1,38 @@
+from rates import CounterRates, bits_compteur
+
+
+def test_bits_compteur():
+    assert bits_compteur("Counter64") == 64
+    assert bits_compteur("Integer", "counter 32") == 32
+    assert bits_compteur("Gauge32", "Integer") is None
+
+
+def test_debit_et_rebouclage():
+    rates = CounterRates(max_gap=3600)
+    key = (1, 2, "1")
+    assert rates.derive(key, 1000, 32, now=0) is None
+    assert rates.derive(key, 3000, 32, now=10) == 200.0
+    # Counter32 proche du maximum, puis repassé par zéro
+    rates.derive(key, 2 ** 32 - 500, 32, now=20)
+    assert rates.derive(key, 500, 32, now=30) == 100.0
+    assert rates.stats["wraps"] == 1
+
+
+def test_redemarrage_de_l_agent():
+    rates = CounterRates(max_gap=3600)
+    key = (1, 2, None)
+    rates.derive(key, 5000, 64, now=0)
+    # Petite baisse loin de la limite : remise à zéro, la série repart de ce relevé
+    assert rates.derive(key, 40, 64, now=10) is None
+    assert rates.derive(key, 140, 64, now=20) == 10.0
+    assert rates.stats["resets"] == 1
+
+
+def test_trou_trop_long_et_oubli():
+    rates = CounterRates(max_gap=60)
+    rates.derive((1, 2, None), 0, 32, now=0)
+    assert rates.derive((1, 2, None), 100, 32, now=120) is None
+    assert rates.stats["gaps"] == 1
+    rates.derive((3, 2, None), 0, 32, now=0)
+    rates.forget(oid_id=2)
+    assert rates.snapshot()["series"] == 0
@@ -0,0 +1,77 @@
+import datetime
+import importlib
+import sqlite3
+
+import pytest
+
+import retention
+from retention import RetentionJob, limite_de
+from rollup import SCHEMA as ROLLUP_SCHEMA
+
+NOW = datetime.datetime(2026, 6, 1, tzinfo=datetime.timezone.utc)
+
+
+def il_y_a(jours):
+    return limite_de(jours, NOW)
+
+
+@pytest.fixture
+def connect(tmp_path):
+    path = str(tmp_path / "bdd.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE DonneeEquipement (id INTEGER PRIMARY KEY AUTOINCREMENT, equipement_id INTEGER,
+                    oid_id INTEGER, valeur TEXT, indice TEXT, timestamp TEXT)""")
+    conn.execute("""CREATE TABLE Event (id INTEGER PRIMARY KEY AUTOINCREMENT, oid_id INTEGER, equipement_id INTEGER,
+                    type_alerte TEXT, niveau TEXT, horodatage TEXT)""")
+    for statement in ROLLUP_SCHEMA + retention.SCHEMA_INDEXES:
+        conn.execute(statement)
+    # Mesures de 1 à 30 jours, les 20 premières (id 1 à 20) déjà agrégées
+    conn.executemany("INSERT INTO DonneeEquipement (equipement_id, oid_id, valeur, timestamp) VALUES (1, 1, '1', ?)",
+                     [(il_y_a(30 - i),) for i in range(30)])
+    conn.execute("INSERT INTO AgregationEtat (nom, dernier_id) VALUES ('DonneeEquipement', 20)")
+    conn.executemany("INSERT INTO Event (oid_id, equipement_id, type_alerte, niveau, horodatage) "
+                     "VALUES (1, 1, 'SeuilMax', 'CRITICAL', ?)", [(il_y_a(j),) for j in (200, 100, 10)])
+    conn.executemany("INSERT INTO DonneeAgregee (resolution, equipement_id, oid_id, bucket) VALUES (?, 1, 1, ?)",
+                     [("minute", il_y_a(10)), ("minute", il_y_a(1)), ("jour", il_y_a(1000))])
+    conn.commit()
+    conn.close()
+    return lambda: sqlite3.connect(path)
+
+
+def compter(connect, table):
+    conn = connect()
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_conservation_illimitee_par_defaut(connect, monkeypatch):
+    for nom in ("RETENTION_DONNEE_JOURS", "RETENTION_EVENT_JOURS"):
+        monkeypatch.delenv(nom, raising=False)
+    defauts = importlib.reload(retention).RETENTION
+    assert defauts["DonneeEquipement"] == defauts["Event"] == 0
+    # Seuls les agrégats (tables créées par le rollup) ont une durée par défaut
+    job = RetentionJob(connect, retention=defauts, pause=0)
+    assert job.purge(NOW) == {"minute": 1, "heure": 0, "jour": 1}
+    assert compter(connect, "DonneeEquipement") == 30 and compter(connect, "Event") == 3
+
+
+def test_purge_par_lots(connect):
+    job = RetentionJob(connect, retention={"DonneeEquipement": 15, "Event": 90, "minute": 7, "jour": 730},
+                       batch_size=100, pause=0)
+    # taille de lot plancher (100) : un seul lot par cible
+    assert job.purge(NOW) == {"DonneeEquipement": 15, "Event": 2, "minute": 1, "jour": 1}
+    assert compter(connect, "DonneeEquipement") == 15
+    assert compter(connect, "Event") == 1
+    assert compter(connect, "DonneeAgregee") == 1
+    assert job.stats["runs"] == 1 and job.stats["rows"]["Event"] == 2
+
+
+def test_mesures_pas_encore_agregees_jamais_purgees(connect):
+    job = RetentionJob(connect, retention={"DonneeEquipement": 1}, pause=0)
+    # 29 mesures périmées, mais seules les 20 déjà agrégées partent
+    assert job.purge(NOW) == {"DonneeEquipement": 20}
+    conn = connect()
+    assert conn.execute("SELECT MIN(id) FROM DonneeEquipement").fetchone()[0] == 21
+    conn.close()
@@ -0,0 +1,50 @@
+import datetime
+import sqlite3
+
+from rollup import RollupJob, SCHEMA, bucket_de, choisir_resolution
+
+T0 = datetime.datetime(2026, 6, 1)
+
+
+def test_choisir_resolution():
+    assert choisir_resolution(T0, T0 + datetime.timedelta(hours=1), min_points=100) == "minute"       # 60 points
+    assert choisir_resolution(T0, T0 + datetime.timedelta(hours=2), min_points=100) == "minute"       # 120 minutes, 2 heures
+    assert choisir_resolution(T0, T0 + datetime.timedelta(days=7), min_points=100) == "heure"         # 168 heures
+    assert choisir_resolution(T0, T0 + datetime.timedelta(days=365), min_points=100) == "jour"
+    assert choisir_resolution(T0, T0 + datetime.timedelta(days=7), min_points=200) == "minute"
+
+
+def test_bucket_de():
+    assert bucket_de("2026-06-01 13:45:12", "minute") == "2026-06-01 13:45:00"
+    assert bucket_de("2026-06-01 13:45:12", "heure") == "2026-06-01 13:00:00"
+    assert bucket_de("2026-06-01 13:45:12", "jour") == "2026-06-01 00:00:00"
+
+
+def test_rattrapage_incremental(tmp_path):
+    path = str(tmp_path / "bdd.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE DonneeEquipement (id INTEGER PRIMARY KEY AUTOINCREMENT, equipement_id INTEGER,
+                    oid_id INTEGER, valeur TEXT, indice TEXT, timestamp TEXT)""")
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.executemany("INSERT INTO DonneeEquipement (equipement_id, oid_id, valeur, timestamp) VALUES (1, 1, ?, ?)",
+                     [("10", "2026-06-01 13:00:05"), ("30", "2026-06-01 13:00:50"), ("abc", "2026-06-01 13:01:00")])
+    conn.commit()
+    conn.close()
+
+    job = RollupJob(lambda: sqlite3.connect(path), batch_size=2)
+    assert job.catch_up() == 3
+    assert job.stats["skipped"] == 1
+    # Rien de nouveau : aucune mesure relue
+    assert job.catch_up() == 0
+
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO DonneeEquipement (equipement_id, oid_id, valeur, timestamp) "
+                 "VALUES (1, 1, '50', '2026-06-01 13:00:59')")
+    conn.commit()
+    conn.close()
+    assert job.catch_up() == 1
+
+    serie = job.serie(1, 1, T0, T0 + datetime.timedelta(days=1), resolution="minute")
+    assert serie["points"] == [{"bucket": "2026-06-01 13:00:00", "min": 10.0, "max": 50.0, "avg": 30.0,
+                                "count": 3, "last": 50.0}]
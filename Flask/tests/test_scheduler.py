@@ -0,0 +1,104 @@
+import asyncio
+
+from scheduler import PollScheduler
+
+
+def equipement(eq_id, oids, intervalle=60, nom=None):
+    return {"id": eq_id, "nom": nom or f"eq{eq_id}", "ip": f"10.0.0.{eq_id}", "community": "public",
+            "intervalle": intervalle, "oids": oids}
+
+
+def ordonnanceur(load=lambda: [], poll=None, **kwargs):
+    async def rien(equipement, oid_ids):
+        pass
+    return PollScheduler(load, poll or rien, max_jitter=0, **kwargs)
+
+
+def echeances(scheduler):
+    """Entrées du tas encore valides : {equipement_id: échéance}."""
+    return {eq_id: due for due, _, eq_id, generation in scheduler._heap
+            if eq_id in scheduler._jobs and scheduler._jobs[eq_id].generation == generation}
+
+
+def test_ajouts_modifications_et_suppressions():
+    scheduler = ordonnanceur()
+    scheduler.apply([equipement(1, {10: 60}), equipement(2, {20: 30})], now=100)
+    assert echeances(scheduler) == {1: 100, 2: 100}
+    assert scheduler.stats["added"] == 2
+
+    # Renommage seul : pas de replanification ; nouvel intervalle : replanifié
+    scheduler.apply([equipement(1, {10: 60}, nom="coeur"), equipement(2, {20: 10})], now=105)
+    assert scheduler._jobs[1].equipement["nom"] == "coeur"
+    assert scheduler._jobs[2].oid_intervalle == {20: 10.0}
+    assert scheduler.stats["updated"] == 2
+
+    scheduler.apply([equipement(2, {20: 10})], now=110)
+    assert set(scheduler._jobs) == {2} and scheduler.stats["removed"] == 1
+    # L'entrée de l'équipement supprimé reste dans le tas mais est ignorée
+    assert echeances(scheduler) == {2: 100}
+
+
+def test_notify_relit_les_equipements_sans_attendre():
+    liste = [equipement(1, {10: 60})]
+    collectes = []
+
+    async def poll(eq, oid_ids):
+        collectes.append((eq["id"], oid_ids))
+
+    async def scenario():
+        scheduler = ordonnanceur(lambda: list(liste), poll, reconcile_interval=3600)
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.05)
+        liste.append(equipement(2, {20: 60}))
+        scheduler.notify()
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert collectes == [(1, [10]), (2, [20])]
+    assert scheduler.stats["reconciles"] == 2
+
+
+def test_intervalles_par_oid_et_retard():
+    lancees = []
+
+    async def poll(eq, oid_ids):
+        lancees.append(sorted(oid_ids))
+        await asyncio.sleep(10)
+
+    async def arreter(job):
+        job.task.cancel()
+        await asyncio.gather(job.task, return_exceptions=True)
+
+    async def scenario():
+        scheduler = ordonnanceur(poll=poll, tick=1)
+        # 10 toutes les 10 s, 11 suit l'équipement (60 s), 12 toutes les 30 s
+        scheduler.apply([equipement(1, {10: 10, 11: None, 12: 30})], now=0)
+        job = scheduler._jobs[1]
+
+        scheduler._start(job, now=0.5)   # tout est dû : un seul GET, 0,5 s de retard
+        await asyncio.sleep(0)
+        assert job.oid_due == {10: 10, 11: 60, 12: 30} and job.due == 10
+
+        scheduler._start(job, now=10.2)  # collecte précédente en cours : tour sauté, cadence gardée
+        assert scheduler.stats["overruns"] == 1 and job.oid_due[10] == 20
+
+        await arreter(job)
+        scheduler._start(job, now=29.5)  # 10 (dû à 20) et 12 (dû à 30, dans le tick) partent ensemble
+        assert job.oid_due == {10: 30, 11: 60, 12: 60}
+
+        await asyncio.sleep(0)
+        await arreter(job)
+        scheduler._start(job, now=75)    # plus d'un intervalle de retard : on repart de maintenant
+        assert job.oid_due[10] == 85
+        await asyncio.sleep(0)
+        await arreter(job)
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert lancees == [[10, 11, 12], [10, 12], [10, 11, 12]]
+    lag = scheduler.lag_snapshot()
+    assert lag["count"] == 3 and lag["overruns"] == 1
+    assert lag["max"] == 45.0 and lag["per_equipement"] == {1: 45.0}
@@ -0,0 +1,73 @@
+import pytest
+from pyasn1.type.univ import Integer  # type: ignore
+
+import snmp_client
+from snmp_client import est_texte, valeur_numerique
+
+
+def test_type_declare_texte():
+    assert est_texte("Display String") and est_texte("ipaddress")
+    assert not est_texte("Integer") and not est_texte(None)
+
+
+def test_valeur_numerique():
+    assert valeur_numerique(42, "Counter32") == 42.0
+    # Nombre publié en OctetString (UCD laLoad)
+    assert valeur_numerique(" 0.15 ", "Float") == 0.15
+    with pytest.raises(ValueError):
+        valeur_numerique("Linux", "Integer")
+    with pytest.raises(ValueError):
+        valeur_numerique("10", "OctetString")
+
+
+class ErreurSnmp(int):
+    def prettyPrint(self):
+        return "tooBig" if self == snmp_client.TOO_BIG else "genErr"
+
+
+def faux_get(limite, paquets):
+    """getCmd factice : tooBig au-delà de ``limite`` varbinds, sinon la position de chaque OID."""
+    def getCmd(engine, community, transport, context, *objets):
+        paquets.append(len(objets))
+        if len(objets) > limite:
+            yield None, ErreurSnmp(snmp_client.TOO_BIG), 0, []
+        else:
+            yield None, 0, 0, [(objet, Integer(len(paquets))) for objet in objets]
+    return getCmd
+
+
+def test_too_big_coupe_le_paquet_et_retient_la_taille(monkeypatch):
+    paquets = []
+    monkeypatch.setattr(snmp_client, "getCmd", faux_get(3, paquets))
+    monkeypatch.setattr(snmp_client, "SNMP_MAX_VARBINDS", 8)
+    monkeypatch.setattr(snmp_client, "_max_varbinds", {})
+    oids = [f"1.3.6.1.2.1.2.2.1.10.{i}" for i in range(8)]
+
+    resultats = snmp_client.get_snmp_values("192.0.2.10", "public", oids)
+    assert [r["status"] for r in resultats] == ["UP"] * 8
+    # 8 → tooBig, 4 → tooBig, puis 2 + 2, 4 → tooBig, 2 + 2
+    assert paquets == [8, 4, 2, 2, 4, 2, 2]
+    assert snmp_client._max_varbinds == {("192.0.2.10", 161): 2}
+
+    # Taille retenue pour cette cible : plus de tooBig au relevé suivant
+    del paquets[:]
+    snmp_client.get_snmp_values("192.0.2.10", "public", oids)
+    assert paquets == [2, 2, 2, 2]
+
+    # Une autre cible repart de SNMP_MAX_VARBINDS
+    del paquets[:]
+    snmp_client.get_snmp_values("192.0.2.11:1161", "public", oids[:3])
+    assert paquets == [3]
+    assert snmp_client._max_varbinds[("192.0.2.10", 161)] == 2
+
+
+def test_resultats_dans_l_ordre_des_oid(monkeypatch):
+    paquets = []
+    monkeypatch.setattr(snmp_client, "getCmd", faux_get(1, paquets))
+    monkeypatch.setattr(snmp_client, "SNMP_MAX_VARBINDS", 4)
+    monkeypatch.setattr(snmp_client, "_max_varbinds", {})
+
+    resultats = snmp_client.get_snmp_values("192.0.2.12", "public", ["1.3.6.1.2.1.1.3.0"] * 3)
+    # 3 → tooBig, puis 1 + 2 → tooBig, puis 1 + 1 : valeur = numéro du paquet qui a répondu
+    assert paquets == [3, 1, 2, 1, 1]
+    assert [r["value"] for r in resultats] == [2, 4, 5]
@@ -0,0 +1,150 @@
+import threading
+
+import pytest
+
+from fake_pg import FakePool
+from retention import RetentionJob
+from storage import PgRow, PostgresBackend, to_pyformat
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = PostgresBackend(pool=FakePool(str(tmp_path / "pg.sqlite")))
+    conn = backend.connect()
+    with conn:
+        conn.execute("CREATE TABLE OID (id INTEGER PRIMARY KEY AUTOINCREMENT, nomParametre TEXT, typeValeur TEXT)")
+        conn.execute("""CREATE TABLE DonneeEquipement (id INTEGER PRIMARY KEY AUTOINCREMENT, equipement_id INTEGER,
+                        oid_id INTEGER, valeur REAL, indice TEXT, timestamp TEXT)""")
+        conn.execute("""CREATE TABLE Event (id INTEGER PRIMARY KEY AUTOINCREMENT, oid_id INTEGER, equipement_id INTEGER,
+                        type_alerte TEXT, valeur_actuelle REAL, seuil_declencheur REAL, message TEXT, niveau TEXT,
+                        horodatage TEXT, indice TEXT)""")
+    conn.close()
+    yield backend
+    backend.close()
+
+
+def test_to_pyformat():
+    assert to_pyformat("SELECT * FROM OID WHERE id = ? AND nom = ?") == "SELECT * FROM OID WHERE id = %s AND nom = %s"
+    # Les % littéraux sont doublés pour psycopg2
+    assert to_pyformat("SELECT 1 WHERE nom LIKE '%cpu%' AND id = ?") == "SELECT 1 WHERE nom LIKE '%%cpu%%' AND id = %s"
+    # Un ? entre guillemets n'est pas un paramètre
+    assert (to_pyformat("""SELECT 'quoi ?', "a?b" FROM t WHERE n = 'l''as ?' AND id = ?""")
+            == """SELECT 'quoi ?', "a?b" FROM t WHERE n = 'l''as ?' AND id = %s""")
+
+
+def test_pgrow_nom_de_colonne_sans_casse():
+    row = PgRow((3, "CPU"), {"id": 0, "nomparametre": 1})
+    assert row[0] == 3 and row[1] == "CPU"
+    assert row["nomParametre"] == row["nomparametre"] == "CPU"
+    assert row["ID"] == 3
+    assert tuple(row) == (3, "CPU")
+    # dict(row) garde les clés telles que renvoyées par PostgreSQL : à ne pas relire en camelCase
+    assert dict(zip(row.keys(), row)) == {"id": 3, "nomparametre": "CPU"}
+
+
+def test_lignes_du_curseur(backend):
+    conn = backend.connect()
+    conn.execute("INSERT INTO OID (nomParametre, typeValeur) VALUES (?, ?)", ("CPU", "Integer"))
+    row = conn.execute("SELECT id, nomParametre, typeValeur FROM OID WHERE nomParametre LIKE '%P%'").fetchone()
+    assert row["nomParametre"] == "CPU" and row["typeValeur"] == "Integer"
+    assert row.keys() == ["id", "nomparametre", "typevaleur"]
+    conn.close()
+
+
+def test_bulk_insert_copy(backend):
+    conn = backend.connect()
+    with conn:
+        backend.bulk_insert(conn, "sample", [(1, 2, 3.5, None, "2026-01-01 00:00:00"), (1, 2, 4.0, "1.2", None)])
+        backend.bulk_insert(conn, "event", [
+            (2, 1, "seuil", 95.0, 90.0, 'Alerte "CPU", valeur\nhaute', "CRITICAL", "2026-01-01 00:00:00", "3"),
+            (2, 1, "seuil", 10.0, None, "", "INFO", None, None),
+        ])
+    samples = conn.execute("SELECT valeur, indice, timestamp FROM DonneeEquipement ORDER BY id").fetchall()
+    events = conn.execute("SELECT message, seuil_declencheur, horodatage, indice FROM Event ORDER BY id").fetchall()
+    conn.close()
+
+    assert [tuple(r) for r in samples] == [(3.5, None, "2026-01-01 00:00:00"), (4.0, "1.2", None)]
+    assert tuple(events[0]) == ('Alerte "CPU", valeur\nhaute', 90.0, "2026-01-01 00:00:00", "3")
+    # Champ vide quoté : chaîne vide, pas NULL
+    assert tuple(events[1]) == ("", None, None, None)
+    assert backend.snapshot()["copied_rows"] == 4
+
+
+def test_lastrowid(backend):
+    conn = backend.connect()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO OID (nomParametre, typeValeur) VALUES (?, ?)", ("CPU", "Integer"))
+    premier = cur.lastrowid
+    cur.execute("INSERT INTO OID (nomParametre, typeValeur) VALUES (?, ?)", ("RAM", "Integer"))
+    assert cur.lastrowid == premier + 1
+    conn.commit()
+    conn.close()
+
+    # Rendue au pool, la connexion peut servir à une autre session : lecture refusée
+    with pytest.raises(RuntimeError):
+        cur.lastrowid
+
+
+def test_lastrowid_sans_insert_garde_la_transaction(backend):
+    conn = backend.connect()
+    with conn:
+        conn.execute("INSERT INTO OID (nomParametre, typeValeur) VALUES (?, ?)", ("CPU", "Integer"))
+
+    autre = backend.connect()   # session neuve : lastval() non défini
+    cur = autre.cursor()
+    cur.execute("UPDATE OID SET typeValeur = ? WHERE nomParametre = ?", ("Float", "CPU"))
+    assert cur.lastrowid is None
+    # L'erreur de lastval() n'a pas annulé la mise à jour en cours
+    autre.commit()
+    autre.close()
+    assert conn.execute("SELECT typeValeur FROM OID").fetchone()["typeValeur"] == "Float"
+    conn.close()
+
+
+def test_connexion_rendue_au_pool_sans_transaction_ouverte(backend):
+    conn = backend.connect()
+    conn.execute("INSERT INTO OID (nomParametre, typeValeur) VALUES (?, ?)", ("CPU", "Integer"))
+    conn.close()   # sans commit : annulé avant de retourner au pool
+
+    conn = backend.connect()
+    assert conn.execute("SELECT COUNT(*) AS n FROM OID").fetchone()["n"] == 0
+    with pytest.raises(ZeroDivisionError):
+        with conn:
+            conn.execute("INSERT INTO OID (nomParametre, typeValeur) VALUES (?, ?)", ("CPU", "Integer"))
+            1 / 0
+    assert conn.execute("SELECT COUNT(*) AS n FROM OID").fetchone()["n"] == 0
+    conn.close()
+
+
+def test_pool_plein_attend_une_connexion(tmp_path):
+    backend = PostgresBackend(pool=FakePool(str(tmp_path / "pg.sqlite")), maxconn=1, pool_timeout=5)
+    premiere = backend.connect()
+    obtenue = threading.Event()
+
+    def emprunter():
+        backend.connect().close()
+        obtenue.set()
+
+    thread = threading.Thread(target=emprunter, daemon=True)
+    thread.start()
+    assert not obtenue.wait(0.2)        # attend au lieu de lever PoolError
+    premiere.close()
+    assert obtenue.wait(5)
+    assert backend.snapshot()["waits"] == 1
+    backend.close()
+
+
+def test_pool_plein_delai_depasse(tmp_path):
+    backend = PostgresBackend(pool=FakePool(str(tmp_path / "pg.sqlite")), maxconn=1, pool_timeout=0.1)
+    conn = backend.connect()
+    with pytest.raises(RuntimeError):
+        backend.connect()
+    conn.close()
+    backend.connect().close()           # la place est bien rendue
+    assert backend.snapshot()["timeouts"] == 1
+    backend.close()
+
+
+def test_vacuum_incremental_ignore_sous_postgresql(backend):
+    RetentionJob(backend.connect, vacuum_pages=100).enable_incremental_vacuum()
+    assert not any("PRAGMA" in sql for raw in backend.pool.all for sql in raw.log)
@@ -0,0 +1,55 @@
+import json
+
+from stream import EventBroker
+
+
+def test_abonnement_et_desabonnement():
+    broker = EventBroker(buffer=10, max_clients=2)
+    a, b = broker.subscribe(), broker.subscribe()
+    assert broker.subscribe() is None  # max_clients atteint
+
+    broker.on_record("sample", (1, 10, 42.0, None, "2026-01-01 10:00:00"))
+    message = a.queue.get_nowait()
+    assert message.startswith("event: sample\n")
+    assert json.loads(message.split("data: ", 1)[1])["valeur"] == 42.0
+    assert b.queue.qsize() == 1
+
+    broker.unsubscribe(b)
+    broker.publish("alert", {"niveau": "CRITICAL"})
+    assert a.queue.qsize() == 1 and b.queue.qsize() == 1
+    assert broker.subscribe() is not None  # place libérée
+    assert broker.snapshot()["refused"] == 1
+
+
+def test_flux_se_termine_et_libere_la_place():
+    broker = EventBroker(buffer=10)
+    subscriber = broker.subscribe()
+    flux = broker.stream(subscriber, heartbeat=0.01)
+
+    assert next(flux).startswith("retry: ")
+    assert next(flux) == ": ping\n\n"  # rien à envoyer
+    broker.publish("sample", {"valeur": 1})
+    assert next(flux).startswith("event: sample")
+
+    flux.close()  # navigateur parti
+    assert broker.snapshot()["clients"] == 0
+
+
+def test_client_lent_decroche():
+    broker = EventBroker(buffer=2)
+    lent, rapide = broker.subscribe(), broker.subscribe()
+    flux = broker.stream(lent, heartbeat=0.01)
+    next(flux)
+
+    for i in range(3):
+        broker.publish("sample", {"valeur": i})
+        rapide.queue.get_nowait()
+
+    # Le troisième message ne tient pas : le client lent est décroché, pas les autres
+    assert lent.dropped
+    assert broker.snapshot()["dropped_clients"] == 1 and broker.snapshot()["clients"] == 1
+    # Son flux se termine : le navigateur se reconnecte et recharge /latest
+    assert list(flux) == []
+
+    broker.publish("sample", {"valeur": 3})
+    assert rapide.queue.qsize() == 1
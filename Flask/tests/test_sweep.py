@@ -0,0 +1,73 @@
+import time
+
+import sweep
+from sweep import SweepManager
+
+
+def lignes(*oid_ids):
+    return [{"equipement_id": 1, "equipement_nom": "sw1", "ip": "10.0.0.1", "community": "public",
+             "oid_id": oid_id, "oid": f"1.3.6.1.2.1.1.{oid_id}.0", "nomParametre": f"p{oid_id}",
+             "typeValeur": "Integer"} for oid_id in oid_ids]
+
+
+def attendre(balayage, delai=5):
+    fin = time.monotonic() + delai
+    while not balayage.done and time.monotonic() < fin:
+        time.sleep(0.01)
+    assert balayage.done
+
+
+def test_une_ligne_en_erreur_n_arrete_pas_le_balayage(monkeypatch):
+    async def get_values(ip, community, oids):
+        return [{"status": "UP", "info": str(i), "value": i} for i, _ in enumerate(oids)]
+
+    def on_value(row, res, indice):
+        if row["oid_id"] == 2:
+            raise KeyError("typevaleur")
+
+    monkeypatch.setattr(sweep, "get_snmp_values_async", get_values)
+    balayage = SweepManager(on_value).start(lignes(1, 2, 3))
+    attendre(balayage)
+
+    resultats = balayage.snapshot()["results"]
+    assert [r["parametre"] for r in resultats] == ["p1", "p2", "p3"]
+    assert all(r["status"] == "UP" for r in resultats)
+    assert "non enregistré" in resultats[1]["info"]
+    assert "non enregistré" not in resultats[0]["info"]
+
+
+def test_delai_depasse(monkeypatch):
+    async def get_values(ip, community, oids):
+        import asyncio
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(sweep, "get_snmp_values_async", get_values)
+    balayage = SweepManager(lambda row, res, indice: None, deadline=0.1).start(lignes(1, 2))
+    attendre(balayage)
+
+    assert [r["status"] for r in balayage.snapshot()["results"]] == ["DOWN", "DOWN"]
+
+
+def test_les_oid_walk_sont_parcourus(monkeypatch):
+    demandes, enregistres = [], []
+
+    async def get_values(ip, community, oids):
+        demandes.append(oids)
+        return [{"status": "UP", "info": "1", "value": 1} for _ in oids]
+
+    async def walk(ip, community, oid, max_repetitions):
+        rows = [(str(i), {"status": "UP", "info": str(i), "value": i}) for i in (1, 2)]
+        return {"status": "UP", "info": f"{len(rows)} lignes", "rows": rows}
+
+    rows = lignes(1, 2)
+    rows[1].update(modeCollecte="WALK", maxRepetitions=10)
+    monkeypatch.setattr(sweep, "get_snmp_values_async", get_values)
+    monkeypatch.setattr(sweep, "walk_snmp_table_async", walk)
+    balayage = SweepManager(lambda row, res, indice: enregistres.append((row["oid_id"], indice))).start(rows)
+    attendre(balayage)
+
+    # Le GET groupé ne contient que l'OID scalaire ; la table donne une mesure par ligne
+    assert demandes == [[rows[0]["oid"]]]
+    assert enregistres == [(1, None), (2, "1"), (2, "2")]
+    resultats = balayage.snapshot()["results"]
+    assert [(r["status"], r["info"]) for r in resultats] == [("UP", "1"), ("UP", "2 lignes")]
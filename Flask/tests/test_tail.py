@@ -0,0 +1,38 @@
+import sqlite3
+
+from tail import IngestTail
+
+EVENT = """CREATE TABLE Event (id INTEGER PRIMARY KEY AUTOINCREMENT, oid_id INTEGER, equipement_id INTEGER,
+           type_alerte TEXT, valeur_actuelle REAL, seuil_declencheur REAL, message TEXT, niveau TEXT,
+           horodatage TEXT, indice TEXT)"""
+
+
+def test_demarrage_reessaye_apres_un_echec(tmp_path):
+    path = str(tmp_path / "bdd.sqlite")
+    conn = sqlite3.connect(path)
+    # Ancien schéma : pas de table Event, pas de colonne indice
+    conn.execute("""CREATE TABLE DonneeEquipement (id INTEGER PRIMARY KEY AUTOINCREMENT, equipement_id INTEGER,
+                    oid_id INTEGER, valeur REAL, timestamp TEXT)""")
+    conn.execute("INSERT INTO DonneeEquipement (equipement_id, oid_id, valeur) VALUES (1, 1, 5)")
+    conn.commit()
+
+    tail = IngestTail(lambda: sqlite3.connect(path), interval=60)
+    assert tail.start() is False
+    assert not tail.running() and tail.stats["errors"] == 1
+
+    # Schéma mis à jour : le démarrage suivant réussit, en partant de la fin des tables
+    conn.execute("ALTER TABLE DonneeEquipement ADD COLUMN indice TEXT")
+    conn.execute(EVENT)
+    conn.commit()
+    recus = []
+    tail.subscribe(lambda kind, params: recus.append((kind, params)))
+    assert tail.start() is True and tail.running()
+    assert tail.start() is False
+    tail.stop()
+
+    conn.execute("INSERT INTO DonneeEquipement (equipement_id, oid_id, valeur, indice, timestamp) "
+                 "VALUES (1, 2, 7, '3', '2026-06-01 00:00:00')")
+    conn.commit()
+    conn.close()
+    assert tail.poll() == 1
+    assert recus == [("sample", (1, 2, 7.0, "3", "2026-06-01 00:00:00"))]
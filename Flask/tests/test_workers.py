@@ -0,0 +1,79 @@
+import threading
+import time
+
+import workers
+from scheduler import PollScheduler
+from workers import HashRing, ShardedPollers
+
+
+def test_hashring_repartition_stable():
+    ring = HashRing(range(4))
+    avant = {eq: ring.node(eq) for eq in range(2000)}
+    assert set(avant.values()) == {0, 1, 2, 3}
+    # Chaque worker reçoit une part raisonnable
+    assert min(list(avant.values()).count(n) for n in range(4)) > 2000 / 4 * 0.6
+
+    # Même anneau, même attribution (les workers le recalculent chacun de leur côté)
+    autre = HashRing(range(4))
+    assert all(autre.node(eq) == node for eq, node in avant.items())
+
+    # Passer à 5 workers ne déplace qu'environ 1/5 des équipements, tous vers le nouveau
+    ring5 = HashRing(range(5))
+    apres = {eq: ring5.node(eq) for eq in range(2000)}
+    deplaces = [eq for eq in avant if avant[eq] != apres[eq]]
+    assert len(deplaces) < 2000 * 0.3
+    assert {apres[eq] for eq in deplaces} == {4}
+
+
+def test_lag_snapshot_meme_forme_que_le_scheduler():
+    pollers = ShardedPollers(2, dispatch=lambda kind, params: None)
+    pollers._reports = {
+        0: {"stats": {"overruns": 1}, "lags": [0.1, 0.2], "per_equipement": {1: 0.2}},
+        1: {"stats": {"overruns": 2}, "lags": [0.3, 0.4, 5.0], "per_equipement": {2: None}},
+    }
+    snapshot = pollers.lag_snapshot()
+    local = PollScheduler(lambda: [], None).lag_snapshot()
+
+    assert snapshot.keys() == local.keys()
+    assert snapshot["count"] == 5
+    assert snapshot["max"] == 5.0
+    assert snapshot["p50"] == 0.3
+    assert snapshot["overruns"] == 3
+    assert snapshot["per_equipement"] == {1: 0.2, 2: None}
+
+
+class FakeProcess:
+    def __init__(self, alive=False):
+        self.alive = alive
+        self.exitcode = 1
+
+    def is_alive(self):
+        return self.alive
+
+
+def test_un_worker_qui_plante_ne_bloque_pas_les_autres(monkeypatch):
+    pollers = ShardedPollers(2, dispatch=lambda kind, params: None)
+    relances = []
+
+    def spawn(index, backoff=1.0):
+        relances.append(index)
+        pollers._workers[index] = [FakeProcess(alive=True), None, time.monotonic(), backoff]
+
+    monkeypatch.setattr(pollers, "_spawn", spawn)
+    monkeypatch.setattr(workers, "WORKER_MAX_BACKOFF", 60.0)
+    now = time.monotonic()
+    # Worker 1 plante en boucle (délai déjà long), worker 0 meurt une fois après des heures de service
+    pollers._workers = {1: [FakeProcess(), None, now, 30.0], 0: [FakeProcess(), None, now - 3600, 1.0]}
+
+    thread = threading.Thread(target=pollers._supervise, daemon=True)
+    thread.start()
+    try:
+        fin = time.monotonic() + 5
+        while 0 not in relances and time.monotonic() < fin:
+            time.sleep(0.05)
+    finally:
+        pollers._stopping.set()
+        thread.join(2)
+
+    assert relances == [0]
+    assert pollers._restarts[1][1] == 60.0
@@ -0,0 +1,287 @@
+import asyncio
+import bisect
+import hashlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import metrics
+from ingest import now_utc
+from logs import logger
+from scheduler import resume_lags
+
+
+# --------------------------------------------------------------------
+# ⚙️ Paramètres
+# --------------------------------------------------------------------
+POLLER_WORKERS = int(os.environ.get("POLLER_WORKERS", "0"))          # 0 = collecte dans le processus principal
+WORKER_QUEUE_MAX = int(os.environ.get("WORKER_QUEUE_MAX", "1000"))    # lots en attente vers l'écrivain
+WORKER_BATCH_SIZE = int(os.environ.get("WORKER_BATCH_SIZE", "200"))   # enregistrements par message
+WORKER_FLUSH_INTERVAL = float(os.environ.get("WORKER_FLUSH_INTERVAL", "0.2"))
+WORKER_STATS_INTERVAL = float(os.environ.get("WORKER_STATS_INTERVAL", "10"))
+WORKER_VNODES = 64                    # points par worker sur l'anneau de hachage
+WORKER_MAX_BACKOFF = 30.0             # délai max avant de relancer un worker qui plante en boucle
+
+
+# --------------------------------------------------------------------
+# 🔵 Hachage cohérent des équipements
+# --------------------------------------------------------------------
+def _hash(value):
+    return int.from_bytes(hashlib.md5(str(value).encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Attribue chaque équipement à un worker.
+
+    Avec des nœuds virtuels, passer de N à N+1 workers ne déplace qu'environ
+    1/(N+1) des équipements : les autres gardent leur worker et leur état
+    d'alerte.
+    """
+
+    def __init__(self, nodes, vnodes=WORKER_VNODES):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node(self, key):
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[i]
+
+
+# --------------------------------------------------------------------
+# 📤 Côté worker : tout part vers le processus parent
+# --------------------------------------------------------------------
+class QueueSink:
+    """Remplace, dans un worker, l'IngestWriter, le cache des dernières valeurs et le diffuseur SSE.
+
+    Les enregistrements sont regroupés en lots (WORKER_BATCH_SIZE, ou toutes
+    les WORKER_FLUSH_INTERVAL s) avant de traverser la file inter-processus,
+    suivis des compteurs et histogrammes de metrics accumulés depuis l'envoi
+    précédent. Toutes les méthodes sont appelées depuis la boucle asyncio du worker.
+    """
+
+    def __init__(self, out_queue, index):
+        self.out_queue = out_queue
+        self.index = index
+        self._batch = []
+
+    def _add(self, kind, params):
+        self._batch.append((kind, params))
+        if len(self._batch) >= WORKER_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self.out_queue.put(("batch", self.index, batch))  # bloque si l'écrivain est saturé
+        # 📊 Métriques de collecte (RTT, timeouts, retard, alertes) ajoutées à celles du parent
+        deltas = metrics.registry.take_deltas()
+        if deltas:
+            self.out_queue.put(("metrics", self.index, deltas))
+
+    # Interface de IngestWriter
+    def push(self, kind, params):
+        self._add(kind, params)
+
+    async def push_async(self, kind, params):
+        self._add(kind, params)
+
+    def push_sample(self, equipement_id, oid_id, valeur, indice=None, timestamp=None):
+        self._add("sample", (equipement_id, oid_id, valeur, indice, timestamp or now_utc()))
+
+    async def push_sample_async(self, equipement_id, oid_id, valeur, indice=None, timestamp=None):
+        self.push_sample(equipement_id, oid_id, valeur, indice, timestamp)
+
+    def push_event(self, oid_id, equipement_id, type_alerte, valeur_actuelle, seuil_declencheur, message, niveau,
+                   horodatage=None, indice=None):
+        self._add("event", (oid_id, equipement_id, type_alerte, valeur_actuelle, seuil_declencheur,
+                            message, niveau, horodatage or now_utc(), indice))
+
+    # Interface de LatestValues / EventBroker utilisée par la collecte
+    def set_niveau(self, equipement_id, oid_id, niveau, indice=None):
+        self._add("niveau", (equipement_id, oid_id, niveau, indice))
+
+    def mark_down(self, equipement_id, oid_id, info, indice=None):
+        self._add("down", (equipement_id, oid_id, info, indice))
+
+    def publish(self, event, data):
+        pass  # le parent republie à la réception de "down"
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(WORKER_FLUSH_INTERVAL)
+            self.flush()
+
+
+def worker_main(index, nb_workers, out_queue, control_queue):
+    """Point d'entrée d'un worker : sa part des équipements, sa propre boucle de collecte."""
+    import app
+    from scheduler import PollScheduler, SCHEDULER_RECONCILE_INTERVAL
+
+    ring = HashRing(range(nb_workers))
+    sink = QueueSink(out_queue, index)
+    logger.source = f"worker-{index}"
+    # La collecte de app.py écrit dans ces objets : dans un worker, ils renvoient vers le parent
+    app.ingest_writer = app.latest_values = app.event_broker = sink
+
+    def charger_equipements():
+        return [e for e in app.charger_equipements() if ring.node(e["id"]) == index]
+
+    scheduler = PollScheduler(charger_equipements, app.poll_snmp_device)
+    # Pas d'invalidation venue du serveur web dans ce processus : seuils relus à chaque réconciliation
+    app.threshold_cache.ttl = min(app.threshold_cache.ttl, SCHEDULER_RECONCILE_INTERVAL)
+    app.alert_states.load(app.get_db_connection)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+
+        def control():
+            while True:
+                message = control_queue.get()
+                if message == "stop":
+                    loop.call_soon_threadsafe(stop.set)
+                    return
+                if message == "reconcile":
+                    scheduler.notify()
+
+        async def report():
+            while True:
+                await asyncio.sleep(WORKER_STATS_INTERVAL)
+                lags, per_equipement = scheduler.recent_lags()
+                out_queue.put(("stats", index, {"stats": dict(scheduler.stats), "lags": lags,
+                                                "per_equipement": per_equipement}))
+
+        stop = asyncio.Event()
+        threading.Thread(target=control, daemon=True).start()
+        tasks = [asyncio.create_task(coro) for coro in (scheduler.run(), sink.run(), report())]
+        await stop.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        sink.flush()
+
+    try:
+        asyncio.run(main())
+    finally:
+        app.shutdown_snmp_executor()
+        logger.stop()
+
+
+# --------------------------------------------------------------------
+# 🧩 Côté parent : supervision des workers
+# --------------------------------------------------------------------
+class ShardedPollers:
+    """Lance N workers de collecte, relaie leurs lots vers ``dispatch`` et relance ceux qui plantent.
+
+    S'utilise à la place du PollScheduler local : notify() et
+    lag_snapshot() ont la même forme (retards de tous les workers réunis,
+    d'après leur dernier rapport). ``stats`` compte les workers, relances et
+    lots reçus ; les compteurs d'ordonnancement de chaque worker sont dans
+    worker_stats().
+    """
+
+    def __init__(self, nb_workers, dispatch):
+        self.nb_workers = nb_workers
+        self.dispatch = dispatch          # dispatch(kind, params) pour chaque enregistrement reçu
+        # spawn : pas de fork d'un processus qui a déjà des threads (Flask, pool SNMP) ; idem sous Windows
+        self._ctx = multiprocessing.get_context("spawn")
+        self._queue = self._ctx.Queue(maxsize=WORKER_QUEUE_MAX)
+        self._workers = {}                # index -> [Process, file de contrôle, lancé à, backoff]
+        self._restarts = {}               # index -> (relance prévue à, backoff) d'un worker mort
+        self._reports = {}
+        self._stopping = threading.Event()
+        self.stats = dict.fromkeys(("workers", "restarts", "batches", "records"), 0)
+
+    def _spawn(self, index, backoff=1.0):
+        control = self._ctx.Queue()
+        process = self._ctx.Process(target=worker_main, args=(index, self.nb_workers, self._queue, control),
+                                    name=f"poller-{index}", daemon=True)
+        process.start()
+        self._workers[index] = [process, control, time.monotonic(), backoff]
+
+    def start(self):
+        for index in range(self.nb_workers):
+            self._spawn(index)
+        self.stats["workers"] = self.nb_workers
+        threading.Thread(target=self._drain, name="workers-drain", daemon=True).start()
+        threading.Thread(target=self._supervise, name="workers-supervisor", daemon=True).start()
+        return self
+
+    def _drain(self):
+        while not self._stopping.is_set():
+            try:
+                message, index, payload = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if message == "stats":
+                self._reports[index] = payload
+                continue
+            if message == "metrics":
+                metrics.registry.merge(payload)
+                continue
+            self.stats["batches"] += 1
+            self.stats["records"] += len(payload)
+            for kind, params in payload:
+                try:
+                    self.dispatch(kind, params)
+                except Exception as e:
+                    logger.error("worker_rejet", "Enregistrement du worker {worker} rejeté : {erreur}", worker=index,
+                                 erreur=str(e))
+
+    def _supervise(self):
+        while not self._stopping.wait(0.5):
+            now = time.monotonic()
+            for index, (process, control, started, backoff) in list(self._workers.items()):
+                if process.is_alive() or self._stopping.is_set():
+                    continue
+                if index not in self._restarts:
+                    # 💥 Worker mort : relance prévue, avec un délai croissant s'il plante dès le démarrage
+                    backoff = min(WORKER_MAX_BACKOFF, backoff * 2) if now - started < 10 else 1.0
+                    self._restarts[index] = (now + backoff, backoff)
+                    logger.error("worker_arret", "Worker {worker} arrêté (code {code}), relance dans {delai:g} s",
+                                 worker=index, code=process.exitcode, delai=backoff)
+                    continue
+                # Échéance propre à chaque worker : un worker qui plante en boucle ne retarde pas les autres
+                restart_at, backoff = self._restarts[index]
+                if now >= restart_at:
+                    del self._restarts[index]
+                    self._spawn(index, backoff)
+                    self.stats["restarts"] += 1
+
+    def notify(self):
+        """Relecture immédiate des équipements dans chaque worker."""
+        for _, control, _, _ in self._workers.values():
+            control.put("reconcile")
+
+    def lag_snapshot(self):
+        lags, per_equipement = [], {}
+        for report in self._reports.values():
+            lags.extend(report["lags"])
+            per_equipement.update(report["per_equipement"])
+        overruns = sum(report["stats"]["overruns"] for report in self._reports.values())
+        return resume_lags(lags, overruns, per_equipement)
+
+    def worker_stats(self):
+        return {index: report["stats"] for index, report in sorted(self._reports.items())}
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        for _, control, _, _ in self._workers.values():
+            control.put("stop")
+        for process, _, _, _ in self._workers.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        # Derniers lots envoyés par les workers avant leur arrêt
+        while True:
+            try:
+                message, index, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if message == "batch":
+                for kind, params in payload:
+                    self.dispatch(kind, params)
+            elif message == "metrics":
+                metrics.registry.merge(payload)
@@ -0,0 +1,39 @@
+"""Point d'entrée WSGI du site, sans collecte.
+
+    gunicorn -w 4 -k gthread --threads 32 -b 0.0.0.0:5000 --chdir Flask wsgi:application
+    waitress-serve --listen=*:5000 --threads=8 wsgi:application   (Windows, depuis Flask/)
+
+Serveur à threads obligatoire : le tableau de bord et les événements
+gardent une réponse /stream (SSE) ouverte par onglet. Avec les workers
+sync de gunicorn (défaut), chaque onglet bloque un worker entier jusqu'à
+son timeout : quelques onglets suffisent à rendre le site indisponible.
+Prévoir --threads au-delà du nombre d'onglets attendus par worker.
+
+La collecte tourne à part (python Flask/collector.py) : chaque processus
+web suit les mesures et alertes qu'elle écrit en BDD pour /latest et /stream.
+Chaque processus web écrit son propre journal, LOG_DIR/web-<pid>.jsonl.
+"""
+from flask import request # type: ignore
+
+from app import app as application, demarrer_web
+from logs import logger
+
+# Un fichier par worker : plusieurs processus ne peuvent pas faire tourner le même fichier
+logger.source = "web-{pid}"
+
+_serveur_verifie = False
+
+
+def verifier_serveur():
+    """Signale une fois par processus un serveur sans threads (workers sync de gunicorn)."""
+    global _serveur_verifie
+    if not _serveur_verifie:
+        _serveur_verifie = True
+        if not request.environ.get("wsgi.multithread"):
+            logger.warning("serveur_sync", "Serveur WSGI sans threads : chaque flux /stream bloque un worker, "
+                                           "lancer gunicorn avec -k gthread --threads N")
+
+
+# Démarré à la première requête de chaque processus (après le fork du serveur)
+application.before_request(verifier_serveur)
+application.before_request(demarrer_web)